@@ -0,0 +1,555 @@
+# app/cache_sim.py
+"""
+캐시 교체 정책 시뮬레이터 (FIFO / LRU / CLOCK / S3-FIFO).
+
+정책, 용량, 접근 열을 받아서 접근마다 정확한 이벤트 열을 만든다.
+
+  이벤트      key  queue   의미
+  hit         k    q       q에 있던 k 적중
+  miss        k    -       어느 큐에도 없음
+  insert      k    q       k를 q의 머리(가장 최근 쪽)에 넣음
+  evict       k    q       k를 q에서 내보냄 (캐시에서 사라짐. S3-FIFO의 S → G는 evict + ghost insert)
+  promote     k    q       k를 q로 올림 (LRU: MRU 위치로, S3-FIFO: S → M)
+  reinsert    k    q       꼬리에서 한 번 더 기회를 줌 (CLOCK 참조 비트, S3-FIFO M의 freq > 0)
+  ghost_hit   k    G       캐시에는 없지만 ghost 큐에 있던 k (S3-FIFO: 바로 M으로 들어감)
+
+큐는 전부 array.array 위의 링 버퍼 / 인덱스 연결 리스트이고, key는 정수 id로 바꿔서 다룬다.
+이벤트도 열 단위(bytearray / array)로 저장하므로 긴 접근 열(수백만 건)도 그대로 돌린다.
+record_events=False면 카운터만 세서 정책별 hit ratio 비교(compare_policies)에 쓴다.
+
+S3-FIFO: S(용량의 10%) + M(90%) + ghost G(M과 같은 항목 수, key만).
+  - 적중: freq = min(freq + 1, 3), 위치는 그대로
+  - 미스: G에 있으면 M으로, 아니면 S로 넣는다 (가득 찼으면 먼저 evict)
+  - S 꼬리: freq >= 1 이면 M으로 promote, 아니면 G로 (evict)
+  - M 꼬리: freq > 0 이면 freq - 1 하고 M 머리로 reinsert, 아니면 evict
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+POLICIES = ("fifo", "lru", "clock", "s3fifo")
+POLICY_TITLES = {"fifo": "FIFO", "lru": "LRU", "clock": "CLOCK", "s3fifo": "S3-FIFO"}
+
+HIT, MISS, INSERT, EVICT, PROMOTE, REINSERT, GHOST_HIT = range(7)
+EVENT_NAMES = ("hit", "miss", "insert", "evict", "promote", "reinsert", "ghost_hit")
+NO_QUEUE = 255
+
+# S3-FIFO 파라미터 (논문 기본값)
+S3_SMALL_RATIO = 0.1
+S3_MAX_FREQ = 3
+S3_MOVE_TO_MAIN = 1
+# hit ratio 추이를 이 정도 구간으로 나눠서 요약
+RATIO_POINTS = 50
+
+
+class _Ring:
+    """고정 용량 FIFO. 머리(push) = 가장 최근, 꼬리(pop) = 가장 오래된 것."""
+
+    def __init__(self, capacity: int):
+        self.buf = array("i", [-1]) * max(1, capacity)
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+
+    def push(self, key: int) -> None:
+        self.buf[(self.start + self.size) % len(self.buf)] = key
+        self.size += 1
+
+    def pop(self) -> int:
+        key = self.buf[self.start]
+        self.start = (self.start + 1) % len(self.buf)
+        self.size -= 1
+        return key
+
+    def full(self) -> bool:
+        return self.size >= self.capacity
+
+    def newest_first(self) -> List[int]:
+        n = len(self.buf)
+        return [self.buf[(self.start + i) % n] for i in range(self.size - 1, -1, -1)]
+
+
+class _Policy:
+    queue_names: Tuple[str, ...] = ("cache",)
+    ghost_queues: Tuple[int, ...] = ()
+
+    def __init__(self, capacity: int, sim: "CacheSimulation"):
+        self.capacity = capacity
+        self.sim = sim
+
+    def access(self, key: int) -> bool:
+        raise NotImplementedError
+
+    def queue_capacities(self) -> List[int]:
+        return [self.capacity]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """큐별 내용 (머리 → 꼬리). 렌더용."""
+        raise NotImplementedError
+
+
+class _FIFO(_Policy):
+    def __init__(self, capacity: int, sim: "CacheSimulation"):
+        super().__init__(capacity, sim)
+        self.ring = _Ring(capacity)
+        self.present: Dict[int, bool] = {}
+
+    def access(self, key: int) -> bool:
+        emit = self.sim.emit
+        if key in self.present:
+            emit(HIT, key, 0)
+            return True
+        emit(MISS, key, NO_QUEUE)
+        if self.ring.full():
+            old = self.ring.pop()
+            del self.present[old]
+            emit(EVICT, old, 0)
+        self.ring.push(key)
+        self.present[key] = True
+        emit(INSERT, key, 0)
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"queues": [self.ring.newest_first()]}
+
+
+class _LRU(_Policy):
+    """슬롯 배열 위의 이중 연결 리스트. head = MRU, tail = LRU."""
+
+    def __init__(self, capacity: int, sim: "CacheSimulation"):
+        super().__init__(capacity, sim)
+        self.key_of = array("i", [-1]) * capacity
+        self.prev = array("i", [-1]) * capacity
+        self.next = array("i", [-1]) * capacity
+        self.slot: Dict[int, int] = {}
+        self.head = self.tail = -1
+
+    def _unlink(self, s: int) -> None:
+        p, n = self.prev[s], self.next[s]
+        if p >= 0:
+            self.next[p] = n
+        else:
+            self.head = n
+        if n >= 0:
+            self.prev[n] = p
+        else:
+            self.tail = p
+
+    def _push_head(self, s: int) -> None:
+        self.prev[s], self.next[s] = -1, self.head
+        if self.head >= 0:
+            self.prev[self.head] = s
+        self.head = s
+        if self.tail < 0:
+            self.tail = s
+
+    def access(self, key: int) -> bool:
+        emit = self.sim.emit
+        s = self.slot.get(key)
+        if s is not None:
+            emit(HIT, key, 0)
+            if s != self.head:
+                self._unlink(s)
+                self._push_head(s)
+                emit(PROMOTE, key, 0)
+            return True
+        emit(MISS, key, NO_QUEUE)
+        if len(self.slot) < self.capacity:
+            s = len(self.slot)
+        else:
+            s = self.tail
+            old = self.key_of[s]
+            self._unlink(s)
+            del self.slot[old]
+            emit(EVICT, old, 0)
+        self.key_of[s] = key
+        self.slot[key] = s
+        self._push_head(s)
+        emit(INSERT, key, 0)
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        order, s = [], self.head
+        while s >= 0:
+            order.append(self.key_of[s])
+            s = self.next[s]
+        return {"queues": [order]}
+
+
+class _Clock(_Policy):
+    """slot 고리 + 참조 비트. 가득 차면 hand가 비트 1인 칸을 0으로 바꾸며(reinsert) 지나가고 0인 칸을 교체."""
+
+    def __init__(self, capacity: int, sim: "CacheSimulation"):
+        super().__init__(capacity, sim)
+        self.key_of = array("i", [-1]) * capacity
+        self.ref = bytearray(capacity)
+        self.slot: Dict[int, int] = {}
+        self.hand = 0
+
+    def access(self, key: int) -> bool:
+        emit = self.sim.emit
+        s = self.slot.get(key)
+        if s is not None:
+            self.ref[s] = 1
+            emit(HIT, key, 0)
+            return True
+        emit(MISS, key, NO_QUEUE)
+        if len(self.slot) < self.capacity:
+            s = len(self.slot)
+        else:
+            while self.ref[self.hand]:
+                self.ref[self.hand] = 0
+                emit(REINSERT, self.key_of[self.hand], 0)
+                self.hand = (self.hand + 1) % self.capacity
+            s = self.hand
+            old = self.key_of[s]
+            del self.slot[old]
+            emit(EVICT, old, 0)
+            self.hand = (self.hand + 1) % self.capacity
+        self.key_of[s] = key
+        self.ref[s] = 0
+        self.slot[key] = s
+        emit(INSERT, key, 0)
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        # 고리는 slot 순서 그대로 (hand 위치와 참조 비트를 같이 그림)
+        n = len(self.slot)
+        return {
+            "queues": [[self.key_of[s] for s in range(n)]],
+            "hand": self.hand if n >= self.capacity else n,
+            "bits": [self.ref[s] for s in range(n)],
+        }
+
+
+class _S3FIFO(_Policy):
+    queue_names = ("S", "M", "G")
+    ghost_queues = (2,)
+
+    def __init__(self, capacity: int, sim: "CacheSimulation"):
+        super().__init__(capacity, sim)
+        if capacity < 2:
+            raise ValueError("s3fifo needs capacity >= 2")
+        self.small_cap = max(1, int(round(capacity * S3_SMALL_RATIO)))
+        self.main_cap = capacity - self.small_cap
+        self.small = _Ring(self.small_cap)
+        self.main = _Ring(self.main_cap)
+        # ghost: key → 들어간 순번. 링에는 (key, 순번)을 같이 두고, 꺼낼 때 순번이 다르면 이미 빠진 것
+        self.ghost = _Ring(self.main_cap)
+        self.ghost_seq = array("q", [0]) * self.main_cap
+        self.ghost_of: Dict[int, int] = {}
+        self._seq = 0
+        self.where: Dict[int, int] = {}     # key → 0 (S) / 1 (M)
+        self.freq = bytearray()             # key id로 인덱싱
+
+    def queue_capacities(self) -> List[int]:
+        return [self.small_cap, self.main_cap, self.main_cap]
+
+    def _freq_slot(self, key: int) -> None:
+        if key >= len(self.freq):
+            self.freq.extend(bytes(key + 1 - len(self.freq)))
+
+    def _ghost_push(self, key: int) -> None:
+        if self.ghost.full():
+            old_pos = self.ghost.start
+            old = self.ghost.pop()
+            if self.ghost_of.get(old) == self.ghost_seq[old_pos]:
+                del self.ghost_of[old]
+        pos = (self.ghost.start + self.ghost.size) % len(self.ghost.buf)
+        self._seq += 1
+        self.ghost.push(key)
+        self.ghost_seq[pos] = self._seq
+        self.ghost_of[key] = self._seq
+
+    def _evict_main(self) -> None:
+        emit = self.sim.emit
+        while True:
+            t = self.main.pop()
+            if self.freq[t] > 0:
+                self.freq[t] -= 1
+                self.main.push(t)
+                emit(REINSERT, t, 1)
+                continue
+            del self.where[t]
+            emit(EVICT, t, 1)
+            return
+
+    def _evict_small(self) -> None:
+        emit = self.sim.emit
+        t = self.small.pop()
+        if self.freq[t] >= S3_MOVE_TO_MAIN:
+            if self.main.full():
+                self._evict_main()
+            self.freq[t] = 0
+            self.main.push(t)
+            self.where[t] = 1
+            emit(PROMOTE, t, 1)
+        else:
+            del self.where[t]
+            emit(EVICT, t, 0)
+            self._ghost_push(t)
+            emit(INSERT, t, 2)
+
+    def access(self, key: int) -> bool:
+        emit = self.sim.emit
+        self._freq_slot(key)
+        q = self.where.get(key)
+        if q is not None:
+            if self.freq[key] < S3_MAX_FREQ:
+                self.freq[key] += 1
+            emit(HIT, key, q)
+            return True
+        emit(MISS, key, NO_QUEUE)
+        ghost = key in self.ghost_of
+        if ghost:
+            del self.ghost_of[key]
+            emit(GHOST_HIT, key, 2)
+        # 캐시가 가득 찼으면 (S가 제 몫을 넘었으면 S에서, 아니면 M에서) 한 칸 비움
+        while len(self.where) >= self.capacity:
+            if self.small.size >= self.small_cap:
+                self._evict_small()
+            else:
+                self._evict_main()
+        self.freq[key] = 0
+        if ghost:
+            if self.main.full():
+                self._evict_main()
+            self.main.push(key)
+            self.where[key] = 1
+            emit(INSERT, key, 1)
+        else:
+            while self.small.full():
+                self._evict_small()
+            self.small.push(key)
+            self.where[key] = 0
+            emit(INSERT, key, 0)
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        live_ghosts = []
+        n = len(self.ghost.buf)
+        for i in range(self.ghost.size - 1, -1, -1):
+            pos = (self.ghost.start + i) % n
+            k = self.ghost.buf[pos]
+            if self.ghost_of.get(k) == self.ghost_seq[pos]:
+                live_ghosts.append(k)
+        return {
+            "queues": [self.small.newest_first(), self.main.newest_first(), live_ghosts],
+            "freq": {str(k): self.freq[k] for k in self.where},
+        }
+
+
+_POLICY_CLASSES = {"fifo": _FIFO, "lru": _LRU, "clock": _Clock, "s3fifo": _S3FIFO}
+
+
+def normalize_policy(name: Any) -> str:
+    key = str(name or "").lower().replace("-", "").replace("_", "").replace(" ", "")
+    if key in ("s3fifo", "s3"):
+        return "s3fifo"
+    if key in _POLICY_CLASSES:
+        return key
+    raise ValueError(f"unknown cache policy: {name} (expected one of {', '.join(POLICIES)})")
+
+
+class CacheSimulation:
+    """
+    simulate()의 결과. 이벤트는 열 단위로 들고 있다.
+      ev_kind / ev_key / ev_queue : 이벤트 열
+      access_starts[i]            : i번째 접근의 첫 이벤트 위치
+      hit_flags[i]                : 적중 여부
+    """
+
+    def __init__(self, policy: str, capacity: int, record_events: bool = True):
+        self.policy = normalize_policy(policy)
+        if capacity < 1:
+            raise ValueError("cache capacity must be >= 1")
+        self.capacity = capacity
+        self.record_events = record_events
+        self.labels: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.ev_kind = bytearray()
+        self.ev_key = array("i")
+        self.ev_queue = bytearray()
+        self.access_starts = array("q")
+        self.hit_flags = bytearray()
+        self.counts = [0] * len(EVENT_NAMES)
+        self.impl = _POLICY_CLASSES[self.policy](capacity, self)
+        self.frames: List[Dict[str, Any]] = []
+        self._framing = False
+
+    def emit(self, kind: int, key: int, queue: int) -> None:
+        self.counts[kind] += 1
+        if self.record_events or self._framing:
+            self.ev_kind.append(kind)
+            self.ev_key.append(key)
+            self.ev_queue.append(queue)
+
+    def intern(self, label: Any) -> int:
+        label = str(label)
+        k = self._ids.get(label)
+        if k is None:
+            k = self._ids[label] = len(self.labels)
+            self.labels.append(label)
+        return k
+
+    def run(self, accesses: Sequence[Any], frames: int = 0) -> "CacheSimulation":
+        """접근 열을 처리. 앞쪽 frames개 접근은 렌더용 큐 스냅샷도 남긴다."""
+        access = self.impl.access
+        for i, label in enumerate(accesses):
+            key = self.intern(label)
+            start = len(self.ev_kind)
+            self.access_starts.append(start)
+            # 프레임을 남기는 접근은 record_events=False여도 이벤트를 잠깐 모은다
+            self._framing = i < frames
+            hit = access(key)
+            self.hit_flags.append(hit)
+            if self._framing:
+                self.frames.append({
+                    "key": key,
+                    "hit": hit,
+                    "events": [
+                        [EVENT_NAMES[self.ev_kind[j]], self.ev_key[j],
+                         None if self.ev_queue[j] == NO_QUEUE else self.ev_queue[j]]
+                        for j in range(start, len(self.ev_kind))
+                    ],
+                    **self.impl.snapshot(),
+                })
+                if not self.record_events:
+                    del self.ev_kind[start:], self.ev_key[start:], self.ev_queue[start:]
+        self._framing = False
+        return self
+
+    # --- 읽기 ---
+    def __len__(self) -> int:
+        return len(self.hit_flags)
+
+    def events(self, i: int) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """i번째 접근의 이벤트 (이름, key, 큐 이름). record_events=False면 비어 있다."""
+        end = self.access_starts[i + 1] if i + 1 < len(self.access_starts) else len(self.ev_kind)
+        names = self.impl.queue_names
+        for j in range(self.access_starts[i] if self.record_events else end, end):
+            q = self.ev_queue[j]
+            yield EVENT_NAMES[self.ev_kind[j]], self.labels[self.ev_key[j]], None if q == NO_QUEUE else names[q]
+
+    def hit_ratio_series(self, points: int = RATIO_POINTS) -> List[float]:
+        """접근 열을 points개 구간으로 나눈 구간별 hit ratio."""
+        n = len(self)
+        if n == 0:
+            return []
+        width = max(1, -(-n // points))
+        return [
+            round(sum(self.hit_flags[s:s + width]) / len(self.hit_flags[s:s + width]), 4)
+            for s in range(0, n, width)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        n = len(self)
+        hits = self.counts[HIT]
+        return {
+            "policy": self.policy,
+            "capacity": self.capacity,
+            "accesses": n,
+            "unique_keys": len(self.labels),
+            "hits": hits,
+            "misses": self.counts[MISS],
+            "hit_ratio": round(hits / n, 4) if n else 0.0,
+            **{EVENT_NAMES[k] + "s": self.counts[k] for k in (EVICT, PROMOTE, REINSERT, GHOST_HIT)},
+        }
+
+
+def simulate(
+    policy: str,
+    capacity: int,
+    accesses: Sequence[Any],
+    frames: int = 0,
+    record_events: bool = True,
+) -> CacheSimulation:
+    return CacheSimulation(policy, int(capacity), record_events).run(accesses, frames)
+
+
+def compare_policies(capacity: int, accesses: Sequence[Any], policies: Sequence[str] = POLICIES) -> Dict[str, float]:
+    """같은 접근 열에 대한 정책별 hit ratio (이벤트는 저장하지 않음)."""
+    return {p: simulate(p, capacity, accesses, record_events=False).summary()["hit_ratio"] for p in policies}
+
+
+# === 렌더용 cache trace ===
+
+# 애니메이션으로 보여줄 앞쪽 접근 수 (나머지는 hit ratio 요약으로만)
+MAX_FRAMES = 40
+# 큐 하나에 칸으로 그릴 수 있는 최대 용량 (넘으면 요약만 그림)
+MAX_DRAW_SLOTS = 12
+# prepare 단계에서 (정책 5번) 동기로 시뮬레이션하므로 admission 밖에서도 1~2초 안에 끝나는 크기로 제한
+MAX_ACCESSES = 200_000
+# 정책마다 용량만큼 배열을 미리 잡으므로 상한을 둔다 (접근 열보다 큰 캐시는 의미도 없음)
+MAX_CAPACITY = MAX_ACCESSES
+# 예시 접근 열이 없을 때 (Belady 예제)
+DEFAULT_ACCESSES = "A B C D A B E A B C D E".split()
+DEFAULT_CAPACITY = 3
+
+
+def generate_workload(workload: Dict[str, Any]) -> List[int]:
+    """{"kind": "zipf" | "uniform" | "loop", "keys": 1000, "length": 100000, "alpha": 1.0, "seed": 1} → 접근 열."""
+    import numpy as np
+
+    kind = workload.get("kind", "zipf")
+    keys = int(workload.get("keys", 100))
+    length = int(workload.get("length", 1000))
+    if not 1 <= keys <= MAX_ACCESSES or not 1 <= length <= MAX_ACCESSES:
+        raise ValueError(f"workload needs 1 <= keys, length <= {MAX_ACCESSES}")
+    rng = np.random.default_rng(int(workload.get("seed", 1)))
+    if kind == "zipf":
+        weights = 1.0 / np.arange(1, keys + 1) ** float(workload.get("alpha", 1.0))
+        seq = rng.choice(keys, size=length, p=weights / weights.sum())
+    elif kind == "uniform":
+        seq = rng.integers(0, keys, size=length)
+    elif kind == "loop":
+        seq = np.arange(length) % keys
+    else:
+        raise ValueError(f"unknown workload kind: {kind}")
+    return seq.tolist()
+
+
+def build_cache_trace(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    {"policy": "s3fifo", "capacity": 4, "accesses": ["A", "B", ...] | "A B C", "workload": {...}, "title": "..."}
+    → 캐시 씬 입력:
+    {
+      "title", "policy", "capacity",
+      "queues": [{"name": "S", "capacity": 1, "ghost": false}, ...],
+      "labels": ["A", "B", ...],                 # 프레임에 나오는 key id → 이름
+      "frames": [{"key", "hit", "events": [[이름, key, 큐]], "queues": [[key, ...]], ("hand", "bits")}],
+      "summary": {...}, "ratio_series": [...], "compare": {"fifo": 0.41, ...}
+    }
+    """
+    policy = normalize_policy(spec.get("policy") or "lru")
+    capacity = int(spec.get("capacity") or DEFAULT_CAPACITY)
+    if capacity > MAX_CAPACITY:
+        raise ValueError(f"cache capacity too large ({capacity} > {MAX_CAPACITY})")
+    accesses = spec.get("accesses")
+    if isinstance(accesses, str):
+        accesses = accesses.replace(",", " ").split()
+    if not accesses:
+        accesses = generate_workload(spec["workload"]) if spec.get("workload") else DEFAULT_ACCESSES
+    if len(accesses) > MAX_ACCESSES:
+        raise ValueError(f"too many accesses ({len(accesses)} > {MAX_ACCESSES})")
+
+    probe = CacheSimulation(policy, capacity, record_events=False)
+    capacities = probe.impl.queue_capacities()
+    drawable = max(capacities) <= MAX_DRAW_SLOTS
+    sim = simulate(policy, capacity, accesses, frames=MAX_FRAMES if drawable else 0, record_events=False)
+    seen = 1 + max((max([f["key"], *(e[1] for e in f["events"])]) for f in sim.frames), default=-1)
+    return {
+        "title": str(spec.get("title") or f"{POLICY_TITLES[policy]} cache (capacity {capacity})"),
+        "policy": policy,
+        "capacity": capacity,
+        "queues": [
+            {"name": name, "capacity": cap, "ghost": q in probe.impl.ghost_queues}
+            for q, (name, cap) in enumerate(zip(probe.impl.queue_names, capacities))
+        ],
+        "labels": sim.labels[:seen],
+        "frames": sim.frames,
+        "summary": sim.summary(),
+        "ratio_series": sim.hit_ratio_series(),
+        "compare": compare_policies(capacity, accesses),
+    }
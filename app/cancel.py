@@ -0,0 +1,180 @@
+# app/cancel.py
+"""
+요청 단위 deadline / 취소 토큰.
+
+/generate 한 번의 요청이 거치는 모든 단계(LLM 호출, manim 서브프로세스)에
+같은 CancelToken을 넘겨서,
+  - 클라이언트 연결이 끊기거나
+  - deadline이 지나면
+남은 LLM 호출을 건너뛰고 manim 프로세스 그룹을 종료한다.
+"""
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any
+
+# 취소된 작업 기록 (최근 N개만 유지)
+CANCELLED_LOG: Deque[Dict[str, Any]] = deque(maxlen=200)
+
+# manim 종료 대기 시간: SIGTERM 후 이 시간 안에 안 죽으면 SIGKILL
+KILL_GRACE_S = 2.0
+POLL_INTERVAL_S = 0.2
+
+
+class RequestCancelled(Exception):
+    """deadline 초과 또는 클라이언트 이탈로 요청이 중단되었을 때."""
+
+    def __init__(self, reason: str, stage: Optional[str] = None):
+        super().__init__(f"{reason} (stage={stage})" if stage else reason)
+        self.reason = reason
+        self.stage = stage
+
+
+class CancelToken:
+    """
+    요청 하나에 대한 deadline + 취소 플래그.
+
+    - deadline_s=None 이면 시간 제한 없음 (취소만 가능)
+    - tenant: 요청을 보낸 테넌트 키 (없으면 default)
+    - stage(name) 으로 현재 단계를 기록해 두면, 취소 시 어떤 작업이
+      완료/중단되었는지 CANCELLED_LOG에 남는다.
+    """
+
+    def __init__(self, deadline_s: Optional[float] = None, tenant: Optional[str] = None):
+        # 요청을 보낸 테넌트 (app.scheduler가 공정 분배에 사용)
+        self.tenant = tenant
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + deadline_s if deadline_s else None
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+        self.current_stage: Optional[str] = None
+        self.completed_stages: List[str] = []
+
+    # --- 상태 조회 ---
+    def remaining(self) -> Optional[float]:
+        """deadline까지 남은 시간(초). deadline이 없으면 None."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.expired():
+            self.cancel("deadline exceeded")
+        return self._event.is_set()
+
+    # --- 제어 ---
+    def cancel(self, reason: str = "cancelled") -> None:
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self._event.set()
+        CANCELLED_LOG.append({
+            "reason": reason,
+            "aborted_stage": self.current_stage,
+            "completed_stages": list(self.completed_stages),
+            "elapsed_s": round(time.monotonic() - self.started_at, 3),
+        })
+        print(f"⛔ request cancelled: {reason} (stage={self.current_stage})")
+
+    def check(self) -> None:
+        """취소되었으면 RequestCancelled를 던진다. 각 단계 시작 전에 호출."""
+        if self.cancelled:
+            raise RequestCancelled(self.reason or "cancelled", self.current_stage)
+
+    def stage(self, name: str) -> None:
+        """다음 단계로 진입. 이전 단계는 완료로 기록하고 취소 여부를 확인."""
+        if self.current_stage is not None:
+            self.completed_stages.append(self.current_stage)
+        self.current_stage = name
+        self.check()
+
+    def wait(self, timeout: float) -> bool:
+        """최대 timeout초 동안 취소를 기다린다. 취소되면 True."""
+        if self.deadline is not None:
+            timeout = min(timeout, self.remaining() or 0.0)
+        self._event.wait(timeout)
+        return self.cancelled
+
+
+def llm_timeout(token: Optional[CancelToken]) -> Dict[str, Any]:
+    """
+    OpenAI chat.completions.create 에 넘길 추가 kwargs.
+
+    호출 직전에 취소 여부를 확인하고, HTTP 요청 timeout을 남은 deadline으로
+    제한해서 LLM 호출이 요청 수명을 넘기지 않게 한다.
+    """
+    if token is None:
+        return {}
+    token.check()
+    remaining = token.remaining()
+    if remaining is None:
+        return {}
+    return {"timeout": max(remaining, 1.0)}
+
+
+def _kill_process_group(proc: subprocess.Popen) -> None:
+    """manim과 그 자식(ffmpeg, latex 등)까지 프로세스 그룹 단위로 종료."""
+    if proc.poll() is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGTERM)
+        else:
+            proc.terminate()
+        proc.wait(timeout=KILL_GRACE_S)
+    except subprocess.TimeoutExpired:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+        proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+def run_manim(
+    cmd: List[str],
+    token: Optional[CancelToken] = None,
+    env: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+) -> None:
+    """
+    subprocess.run(cmd, check=True) 대체.
+
+    manim을 새 세션(프로세스 그룹)으로 띄우고, token이 취소되면 그룹 전체를
+    종료한 뒤 RequestCancelled를 던진다. 종료 코드가 0이 아니면
+    subprocess.CalledProcessError를 던진다.
+    """
+    if token is not None:
+        token.check()
+
+    proc = subprocess.Popen(
+        cmd,
+        env=env,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    try:
+        while True:
+            try:
+                proc.wait(timeout=POLL_INTERVAL_S)
+                break
+            except subprocess.TimeoutExpired:
+                if token is not None and token.cancelled:
+                    _kill_process_group(proc)
+                    raise RequestCancelled(token.reason or "cancelled", token.current_stage)
+    except BaseException:
+        _kill_process_group(proc)
+        raise
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
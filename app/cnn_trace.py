@@ -0,0 +1,134 @@
+# app/cnn_trace.py
+"""
+CNN 수치 계산 (NumPy) → CNN trace IR.
+
+CNNParamScene 안에서 파이썬 루프로 계산하던 값들을 씬 밖에서 미리 계산한다.
+씬은 이 trace를 받아서 애니메이션만 담당한다.
+
+trace 예시 (input_size=4, kernel_size=3, stride=1, padding=1):
+{
+  "params": {"input_size": 4, "kernel_size": 3, "stride": 1, "padding": 1, "seed": 7},
+  "out_size": 4,
+  "pool_size": 2,
+  "padded": [[0, 0, 0, 0, 0, 0], ...],      # (input+2p) x (input+2p)
+  "kernel": [[1, 0, -1], ...],              # k x k
+  "feature_map": [[3, -2, ...], ...],       # out x out
+  "relu_mask": [[1, 0, ...], ...],          # feature_map < 0 이면 0 (ReLU로 잘린 칸)
+  "relu": [[3, 0, ...], ...],
+  "pooled": [[5, 3], [4, 7]],               # (out//2) x (out//2), 2x2 max pooling
+  "flatten": [5, 3, 4, 7],
+  "dense_w": [[...], ...],                  # NUM_CLASSES x len(flatten), 씬의 dense 간선 굵기 / 투명도
+  "logits": [...],                          # NUM_CLASSES 개
+  "softmax": [...]
+}
+"""
+from __future__ import annotations
+
+import copy
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+POOL_SIZE = 2
+NUM_CLASSES = 3
+# 입력 값 범위 [0, 9], 커널 값 {-1, 0, 1} (기존 씬과 동일)
+INPUT_MAX = 9
+KERNEL_VALUES = (-1, 0, 1)
+# dense 출력(logit)의 최대 절댓값
+LOGIT_SCALE = 2.0
+# 패딩 포함 입력 한 변의 상한 (28x28 MNIST, 32x32 CIFAR + 패딩이 들어가는 크기).
+# trace는 admission 전에 요청 경로에서 계산하므로 LLM이 준 큰 값을 그대로 받지 않는다
+MAX_CNN_SIZE = 64
+
+DEFAULT_CFG: Dict[str, int] = {
+    "input_size": 4,
+    "kernel_size": 3,
+    "stride": 1,
+    "padding": 1,
+    "seed": 7,
+}
+
+
+def normalize_cnn_cfg(cfg: Dict[str, Any]) -> Tuple[int, int, int, int, int]:
+    """cfg(dict) → (input_size, kernel_size, stride, padding, seed). 잘못된 값이면 ValueError."""
+    merged = {**DEFAULT_CFG, **{k: v for k, v in (cfg or {}).items() if v is not None}}
+    try:
+        input_size = int(merged["input_size"])
+        kernel_size = int(merged["kernel_size"])
+        stride = int(merged["stride"])
+        padding = int(merged["padding"])
+        seed = int(merged["seed"])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid cnn params: {e}")
+
+    if input_size < 1 or kernel_size < 1 or stride < 1 or padding < 0:
+        raise ValueError("input_size, kernel_size, stride must be >= 1 and padding >= 0")
+    if input_size + 2 * padding > MAX_CNN_SIZE:
+        raise ValueError(f"input_size + 2 * padding must be <= {MAX_CNN_SIZE}")
+    if kernel_size > input_size + 2 * padding:
+        raise ValueError("kernel_size must not exceed input_size + 2 * padding")
+    return input_size, kernel_size, stride, padding, seed
+
+
+@lru_cache(maxsize=256)
+def _build_cnn_trace(input_size: int, kernel_size: int, stride: int, padding: int, seed: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+
+    total = input_size + 2 * padding
+    padded = np.zeros((total, total), dtype=np.int64)
+    padded[padding:padding + input_size, padding:padding + input_size] = rng.integers(
+        0, INPUT_MAX + 1, size=(input_size, input_size)
+    )
+    kernel = rng.choice(KERNEL_VALUES, size=(kernel_size, kernel_size)).astype(np.int64)
+
+    # 합성곱: (out, out, k, k) 윈도우 뷰에 커널을 곱해서 합산
+    windows = sliding_window_view(padded, (kernel_size, kernel_size))[::stride, ::stride]
+    feature_map = np.einsum("ijrc,rc->ij", windows, kernel)
+    out_size = feature_map.shape[0]
+
+    relu_mask = feature_map >= 0
+    relu = np.where(relu_mask, feature_map, 0)
+
+    pooled_out = out_size // POOL_SIZE
+    cropped = relu[:pooled_out * POOL_SIZE, :pooled_out * POOL_SIZE]
+    pooled = cropped.reshape(pooled_out, POOL_SIZE, pooled_out, POOL_SIZE).max(axis=(1, 3))
+    flatten = pooled.reshape(-1)
+
+    # dense: 시드 고정 가중치 (NUM_CLASSES x len(flatten)), 출력은 [-LOGIT_SCALE, LOGIT_SCALE]로 정규화
+    dense_w = rng.uniform(-1.0, 1.0, size=(NUM_CLASSES, flatten.size))
+    logits = dense_w @ flatten.astype(np.float64)
+    peak = np.abs(logits).max() if logits.size else 0.0
+    if peak > 0:
+        logits = logits / peak * LOGIT_SCALE
+    exp = np.exp(logits - logits.max())
+    softmax = exp / exp.sum()
+
+    return {
+        "params": {
+            "input_size": input_size,
+            "kernel_size": kernel_size,
+            "stride": stride,
+            "padding": padding,
+            "seed": seed,
+        },
+        "out_size": int(out_size),
+        "pool_size": POOL_SIZE,
+        "padded": padded.tolist(),
+        "kernel": kernel.tolist(),
+        "feature_map": feature_map.tolist(),
+        "relu_mask": relu_mask.astype(np.int64).tolist(),
+        "relu": relu.tolist(),
+        "pooled": pooled.tolist(),
+        "flatten": flatten.tolist(),
+        "dense_w": np.round(dense_w, 3).tolist(),
+        "logits": [round(float(v), 6) for v in logits],
+        "softmax": [round(float(v), 6) for v in softmax],
+    }
+
+
+def build_cnn_trace(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """cfg → CNN trace IR. 같은 파라미터는 캐시에서 복사본을 돌려준다."""
+    trace = _build_cnn_trace(*normalize_cnn_cfg(cfg))
+    return copy.deepcopy(trace)
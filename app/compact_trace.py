@@ -0,0 +1,342 @@
+# app/compact_trace.py
+"""
+정렬 / 이벤트 trace의 압축 표현.
+
+기존 sorting trace는 step마다 배열 스냅샷("array")을 통째로 들고 있어서
+원소 n개 버블 정렬이면 LLM 출력, JSON 응답, 씬 파일에 숫자가 O(n³)개 실린다.
+여기서는 초기 배열 + 타입이 있는 연산 열로만 저장한다.
+
+  op  a  b   의미
+  C   i  j   compare(i, j) — 새 step 시작
+  N   0  0   compare 없는 step 시작
+  S   i  j   swap(i, j)
+  M   k  0   set_min(k)  (selection sort의 현재 최소값 후보)
+  W   k  v   배열[k] = v  (swap으로 설명 안 되는 스냅샷 변화. 삽입 / 병합 정렬, 잘못된 LLM 스냅샷 등)
+
+메모리에서는 열 단위 배열(bytearray / array.array)로 들고 (b 열은 정수가 아닌 W 값이 있으면
+타입을 그대로 보존하는 list),
+스냅샷은 필요할 때만 재생해서 만든다 (CHECKPOINT_EVERY step마다 체크포인트).
+
+JSON 형식 (format = "compact-v1"):
+  {"format": "compact-v1", "algorithm": "bubble_sort", "input": {"array": [5, 1, 4]},
+   "ops": "CSCSC", "a": [0, 0, 1, 1, 0], "b": [1, 1, 2, 2, 1], "metadata": {...}}
+  step 번호가 1, 2, 3, ... 이 아니면 "steps": [...] 열을 추가로 둔다.
+
+from_trace_ir / to_trace_ir로 기존 스키마와 오가며, step / compare / swap / min_index / array
+필드는 그대로 복원된다 (swap이 없던 step은 swap: false로 채워짐).
+"""
+from __future__ import annotations
+
+import json
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+FORMAT = "compact-v1"
+CHECKPOINT_EVERY = 256
+
+COMPARE, NOOP, SWAP, SET_MIN, WRITE = b"C"[0], b"N"[0], b"S"[0], b"M"[0], b"W"[0]
+STEP_OPS = (COMPARE, NOOP)
+VALID_OPS = frozenset(b"CNSMW")
+
+
+ValueColumn = Union[array, List[Any]]
+
+
+def _is_int(v: Any) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _value_column(values: Iterable[Any]) -> ValueColumn:
+    """
+    값 열: 전부 정수면 array('q'), 아니면 값을 그대로 둔 list.
+    (float 열로 바꾸면 정수 1이 1.0으로 돌아오므로 타입을 섞어서 보존한다)
+    """
+    values = list(values)
+    return array("q", values) if all(_is_int(v) for v in values) else values
+
+
+class _StepView(Sequence):
+    """step dict를 필요할 때만 만드는 읽기 전용 시퀀스 (len / 인덱스 / 슬라이스)."""
+
+    def __init__(self, trace: "CompactTrace"):
+        self._trace = trace
+
+    def __len__(self) -> int:
+        return len(self._trace)
+
+    def __getitem__(self, k: Union[int, slice]):
+        if isinstance(k, slice):
+            return [self._trace.step(i) for i in range(*k.indices(len(self)))]
+        return self._trace.step(k)
+
+
+class CompactTrace:
+    def __init__(
+        self,
+        algorithm: str,
+        initial: List[Any],
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        self.algorithm = algorithm
+        self.initial = list(initial)
+        self.metadata = metadata or {}
+        self.ops = bytearray()
+        self.a = array("i")
+        self.b: ValueColumn = array("q")
+        self.step_starts = array("i")          # step k가 시작하는 op 위치
+        self.step_numbers: Optional[array] = None   # 1, 2, 3, ... 이 아닐 때만
+        self._checkpoints: Optional[List[List[Any]]] = None
+
+    # --- 만들기 ---
+    def _emit(self, op: int, a: int, b: Any = 0) -> None:
+        if op in STEP_OPS:
+            self.step_starts.append(len(self.ops))
+        elif not self.step_starts:
+            raise ValueError("operation before the first step")
+        if isinstance(self.b, array) and not _is_int(b):
+            self.b = self.b.tolist()
+        self.ops.append(op)
+        self.a.append(a)
+        self.b.append(b)
+        self._checkpoints = None
+
+    def compare(self, i: int, j: int) -> None:
+        self._emit(COMPARE, i, j)
+
+    def empty_step(self) -> None:
+        self._emit(NOOP, 0)
+
+    def swap(self, i: int, j: int) -> None:
+        self._emit(SWAP, i, j)
+
+    def set_min(self, k: int) -> None:
+        self._emit(SET_MIN, k)
+
+    def write(self, k: int, value: Any) -> None:
+        self._emit(WRITE, k, value)
+
+    def number_step(self, number: int) -> None:
+        """방금 시작한 step의 번호 (기본은 1부터 순서대로)."""
+        k = len(self.step_starts) - 1
+        if self.step_numbers is None:
+            if number == k + 1:
+                return
+            self.step_numbers = array("i", range(1, k + 1))
+        self.step_numbers.append(number)
+
+    # --- 읽기 ---
+    def __len__(self) -> int:
+        return len(self.step_starts)
+
+    def _op_range(self, k: int) -> Tuple[int, int]:
+        start = self.step_starts[k]
+        end = self.step_starts[k + 1] if k + 1 < len(self.step_starts) else len(self.ops)
+        return start, end
+
+    def step(self, k: int) -> Dict[str, Any]:
+        """step k (스냅샷 제외): {"step", "compare"?, "swap", "min_index"?}."""
+        if k < 0:
+            k += len(self)
+        start, end = self._op_range(k)
+        s: Dict[str, Any] = {"step": self.step_numbers[k] if self.step_numbers is not None else k + 1}
+        if self.ops[start] == COMPARE:
+            s["compare"] = [self.a[start], int(self.b[start])]
+        s["swap"] = False
+        for p in range(start + 1, end):
+            op = self.ops[p]
+            if op == SWAP:
+                s["swap"] = True
+            elif op == SET_MIN:
+                s["min_index"] = self.a[p]
+        return s
+
+    @property
+    def steps(self) -> _StepView:
+        return _StepView(self)
+
+    def _apply(self, arr: List[Any], k: int) -> None:
+        start, end = self._op_range(k)
+        for p in range(start + 1, end):
+            op = self.ops[p]
+            if op == SWAP:
+                i, j = self.a[p], int(self.b[p])
+                arr[i], arr[j] = arr[j], arr[i]
+            elif op == WRITE:
+                arr[self.a[p]] = self.b[p]
+
+    def snapshot(self, k: int) -> List[Any]:
+        """step k를 실행한 뒤의 배열. 가장 가까운 체크포인트부터 재생."""
+        if k < 0:
+            k += len(self)
+        if self._checkpoints is None:
+            self._build_checkpoints()
+        base = k // CHECKPOINT_EVERY
+        arr = list(self._checkpoints[base])
+        for s in range(base * CHECKPOINT_EVERY, k + 1):
+            self._apply(arr, s)
+        return arr
+
+    def iter_snapshots(self) -> Iterator[List[Any]]:
+        arr = list(self.initial)
+        for k in range(len(self)):
+            self._apply(arr, k)
+            yield list(arr)
+
+    def final(self) -> List[Any]:
+        return self.snapshot(-1) if len(self) else list(self.initial)
+
+    def _build_checkpoints(self) -> None:
+        # _checkpoints[c] = step c*CHECKPOINT_EVERY 직전의 배열
+        checkpoints = [list(self.initial)]
+        arr = list(self.initial)
+        for k in range(len(self)):
+            self._apply(arr, k)
+            if (k + 1) % CHECKPOINT_EVERY == 0:
+                checkpoints.append(list(arr))
+        self._checkpoints = checkpoints
+
+    def num_swaps(self) -> int:
+        return self.ops.count(SWAP)
+
+    def chunk_bytes(self, start_step: int, end_step: int) -> bytes:
+        """step [start_step, end_step)의 연산 열 원본 바이트 (섹션 캐시 키용)."""
+        start = self.step_starts[start_step] if start_step < len(self) else len(self.ops)
+        end = self.step_starts[end_step] if end_step < len(self) else len(self.ops)
+        values = self.b[start:end]
+        raw = values.tobytes() if isinstance(values, array) else json.dumps(values).encode()
+        return bytes(self.ops[start:end]) + self.a[start:end].tobytes() + raw
+
+    # --- 변환 ---
+    def cleaned(self) -> "CompactTrace":
+        """
+        씬 재생용 정리: compare가 없는 step과, 바로 앞 step과 (i, j, swap 여부)가 같은 중복 step을 뺀다.
+        남은 step은 원래 step 번호를 유지한다.
+        """
+        out = CompactTrace(self.algorithm, self.initial, self.metadata)
+        prev = None
+        for k in range(len(self)):
+            start, end = self._op_range(k)
+            if self.ops[start] != COMPARE:
+                continue
+            key = (self.a[start], self.b[start], SWAP in self.ops[start + 1:end])
+            if key == prev:
+                continue
+            prev = key
+            for p in range(start, end):
+                out._emit(self.ops[p], self.a[p], self.b[p])
+            if self.step_numbers is not None:
+                out.number_step(self.step_numbers[k])
+            else:
+                out.number_step(k + 1)
+        return out
+
+    @classmethod
+    def from_trace_ir(cls, trace_ir: Dict[str, Any]) -> "CompactTrace":
+        """기존 스키마(step마다 array 스냅샷) → 압축. 스냅샷과 재생 결과가 다르면 W로 보정."""
+        arr = list((trace_ir.get("input") or {}).get("array") or [])
+        n = len(arr)
+        trace = cls(trace_ir.get("algorithm", "Sorting"), arr, trace_ir.get("metadata"))
+        state = list(arr)
+        for idx, s in enumerate(trace_ir.get("trace", []) or []):
+            cmp_ = s.get("compare")
+            if cmp_ is not None:
+                if not (isinstance(cmp_, list) and len(cmp_) == 2 and all(isinstance(v, int) for v in cmp_)):
+                    raise ValueError(f"trace[{idx}].compare must be [i, j]")
+                i, j = cmp_
+                if not (0 <= i < n and 0 <= j < n):
+                    raise ValueError(f"trace[{idx}].compare indices out of range")
+                trace.compare(i, j)
+            else:
+                trace.empty_step()
+            trace.number_step(int(s.get("step", idx + 1)))
+            min_idx = s.get("min_index")
+            if min_idx is not None:
+                if not (isinstance(min_idx, int) and 0 <= min_idx < n):
+                    raise ValueError(f"trace[{idx}].min_index out of range")
+                trace.set_min(min_idx)
+            if s.get("swap") and cmp_ is not None:
+                trace.swap(i, j)
+                state[i], state[j] = state[j], state[i]
+            snap = s.get("array")
+            if isinstance(snap, list) and len(snap) == n:
+                for k, v in enumerate(snap):
+                    if state[k] != v or type(state[k]) is not type(v):
+                        trace.write(k, v)
+                        state[k] = v
+        return trace
+
+    def to_trace_ir(self) -> Dict[str, Any]:
+        """압축 → 기존 스키마 (step마다 array 스냅샷 포함)."""
+        out_steps = []
+        for k, snap in enumerate(self.iter_snapshots()):
+            s = self.step(k)
+            s["array"] = snap
+            out_steps.append(s)
+        doc: Dict[str, Any] = {"algorithm": self.algorithm, "input": {"array": list(self.initial)}, "trace": out_steps}
+        if self.metadata:
+            doc["metadata"] = self.metadata
+        return doc
+
+    def to_json(self) -> Dict[str, Any]:
+        doc: Dict[str, Any] = {
+            "format": FORMAT,
+            "algorithm": self.algorithm,
+            "input": {"array": list(self.initial)},
+            "ops": self.ops.decode("ascii"),
+            "a": self.a.tolist(),
+            "b": list(self.b),
+        }
+        if self.step_numbers is not None:
+            doc["steps"] = self.step_numbers.tolist()
+        if self.metadata:
+            doc["metadata"] = self.metadata
+        return doc
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_json(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, doc: Dict[str, Any]) -> "CompactTrace":
+        trace = cls(doc.get("algorithm", "Sorting"), doc["input"]["array"], doc.get("metadata"))
+        trace.ops = bytearray(doc["ops"].encode("ascii"))
+        trace.a = array("i", doc["a"])
+        trace.b = _value_column(doc["b"])
+        trace.step_starts = array("i", (p for p, op in enumerate(trace.ops) if op in STEP_OPS))
+        if "steps" in doc:
+            trace.step_numbers = array("i", doc["steps"])
+        return trace
+
+    def validate(self) -> List[str]:
+        errors: List[str] = []
+        if not (len(self.ops) == len(self.a) == len(self.b)):
+            return ["ops, a and b must have the same length"]
+        if self.ops and self.ops[0] not in STEP_OPS:
+            errors.append("ops must start with a step (C or N)")
+        if self.step_numbers is not None and len(self.step_numbers) != len(self):
+            errors.append("steps must have one number per step")
+        n = len(self.initial)
+        for p, op in enumerate(self.ops):
+            if op not in VALID_OPS:
+                errors.append(f"ops[{p}]: unknown op {chr(op)!r}")
+                break
+            if op in (COMPARE, SWAP) and not (0 <= self.a[p] < n and 0 <= self.b[p] < n):
+                errors.append(f"ops[{p}]: indices out of range")
+                break
+            if op in (SET_MIN, WRITE) and not 0 <= self.a[p] < n:
+                errors.append(f"ops[{p}]: index out of range")
+                break
+        return errors
+
+
+def is_compact(doc: Dict[str, Any]) -> bool:
+    return doc.get("format") == FORMAT
+
+
+def load_trace(doc: Union[Dict[str, Any], CompactTrace]) -> CompactTrace:
+    """압축 / 기존 스키마 어느 쪽이든 CompactTrace로."""
+    if isinstance(doc, CompactTrace):
+        return doc
+    if is_compact(doc):
+        return CompactTrace.from_json(doc)
+    return CompactTrace.from_trace_ir(doc)
@@ -0,0 +1,271 @@
+# app/cost.py
+"""
+렌더 비용 추정 + admission control.
+
+렌더 전에 IR만 보고
+  plays      : self.play 호출 수 (manim은 play마다 partial movie 1개 + 고정 오버헤드)
+  duration_s : 영상 길이 (프레임 수 ∝ 길이 × fps)
+  render_s   : 예상 렌더 시간 = (STARTUP_S + SEC_PER_PLAY·plays + SEC_PER_VIDEO_S·duration·품질배수) × 보정값
+를 계산한다. 보정값은 렌더러(kind)별로 실제 렌더 시간을 관측해서 EWMA로 갱신한다.
+
+admit()은 예상 시간이 RENDER_BUDGET_S를 넘으면 더 싼 설정(품질 → 모드)으로 내려 보고,
+그래도 넘으면 거절한다.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.tex_cache import SHARED_CACHE_ROOT
+
+# 한 요청이 쓸 수 있는 예상 렌더 시간 상한
+RENDER_BUDGET_S = float(os.getenv("RENDER_BUDGET_S", "300"))
+
+# 기본 모델 계수 (-ql 기준, 보정 전)
+STARTUP_S = 4.0          # manim import + 씬 파일 로드
+SEC_PER_PLAY = 0.15      # play 1회의 고정 비용 (partial movie 파일 열고 닫기)
+SEC_PER_VIDEO_S = 1.0    # 영상 1초를 그리는 비용
+QUALITY_FACTOR = {"l": 1.0, "m": 3.0, "h": 8.0, "p": 14.0, "k": 30.0}
+QUALITY_LADDER = ("k", "p", "h", "m", "l")
+
+# 보정: 관측값/예측값 비율의 EWMA (kind별)
+CALIBRATION_ALPHA = 0.2
+CALIBRATION_PATH = SHARED_CACHE_ROOT / "cost_calibration.json"
+_calibration: Dict[str, float] = {}
+_calibration_lock = threading.Lock()
+
+
+@dataclass
+class CostEstimate:
+    kind: str
+    plays: int
+    duration_s: float
+    render_s: float                  # 보정 후 예상 렌더 시간
+    base_s: float                    # 보정 전 (모델 계수만)
+    quality: str = "l"
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["duration_s"] = round(self.duration_s, 2)
+        d["render_s"] = round(self.render_s, 2)
+        d["base_s"] = round(self.base_s, 2)
+        return d
+
+
+@dataclass
+class Admission:
+    action: str                      # "accept" | "downgrade" | "reject"
+    estimate: CostEstimate
+    requested: Optional[CostEstimate] = None
+
+    @property
+    def rejected(self) -> bool:
+        return self.action == "reject"
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {"action": self.action, "estimate": self.estimate.to_dict(), "budget_s": RENDER_BUDGET_S}
+        if self.requested is not None:
+            d["requested"] = self.requested.to_dict()
+        return d
+
+
+# === 1. 렌더러별 play 수 / 영상 길이 모델 ===
+
+def _cnn_features(trace: Dict[str, Any], options: Dict[str, Any]) -> Tuple[int, float]:
+    from app.render_cnn_matrix import BATCH_OUT_SIZE, HEATMAP_CELL_THRESHOLD
+
+    out = trace["out_size"]
+    mode = options.get("mode", "auto")
+    heatmap = len(trace["padded"]) ** 2 > HEATMAP_CELL_THRESHOLD if mode == "auto" else mode == "heatmap"
+    if heatmap:
+        # 행 단위 sweep: 행마다 play 1회
+        return 20 + out, 20.0 + 0.1 * out
+    batched = options.get("batched")
+    if batched is None:
+        batched = out >= BATCH_OUT_SIZE
+    cells = out * out
+    pooled = (out // trace["pool_size"]) ** 2
+    # 커널 이동 + 숫자 등장이 칸마다 0.2초. batched면 행마다 Succession 1회
+    conv_plays = 2 * out if batched else 2 * cells
+    relu_plays = 2 if batched else cells
+    pool_plays = out if batched else 2 * pooled
+    plays = 30 + conv_plays + relu_plays + pool_plays
+    duration = 18.0 + 0.2 * cells + 0.15 * relu_plays + 0.3 * pool_plays
+    return plays, duration
+
+
+def _sorting_features(trace_ir: Dict[str, Any], options: Dict[str, Any]) -> Tuple[int, float]:
+    from app.compact_trace import load_trace
+    from app.render_sorting import BAR_MODE_THRESHOLD, MAX_BAR_PLAYS
+
+    trace = load_trace(trace_ir).cleaned()
+    steps = len(trace)
+    mode = options.get("mode", "auto")
+    bars = len(trace.initial) > BAR_MODE_THRESHOLD if mode == "auto" else mode == "bars"
+    if bars:
+        plays = min(steps, MAX_BAR_PLAYS) + 4
+        return plays, 5.0 + min(40.0, 0.4 * plays)
+    swaps = trace.num_swaps()
+    # 비교: 하이라이트 + 제거 (0.5초), swap: 색 → 이동 → 복원 (1.0초)
+    plays = 4 + 2 * steps + 3 * swaps
+    return plays, 4.0 + 0.5 * steps + 1.0 * swaps
+
+
+def _attention_features(attn_ir: Dict[str, Any], options: Dict[str, Any]) -> Tuple[int, float]:
+    from app.render_seq_attention import HEATMAP_TOKEN_THRESHOLD
+
+    n = len(attn_ir["tokens"])
+    mode = options.get("mode", "auto")
+    heatmap = (n > HEATMAP_TOKEN_THRESHOLD or bool(attn_ir.get("heads"))) if mode == "auto" else mode == "heatmap"
+    if heatmap:
+        return 8, 8.0
+    return 18, 14.0 + 0.1 * n
+
+
+def _flow_features(flow_ir: Dict[str, Any], options: Dict[str, Any]) -> Tuple[int, float]:
+    ops = flow_ir.get("ops", [])
+    flows = sum(1 for op in ops if op.get("kind") == "flow")
+    # 제목 + 배치 + 마무리, 연산마다 준비(설명 교체) 0.4초 + 동작 0.5~1.0초
+    plays = 4 + 2 * len(ops)
+    return plays, 4.0 + 1.0 * len(ops) + 0.4 * flows
+
+
+def _grid_features(grid_trace: Dict[str, Any], options: Dict[str, Any]) -> Tuple[int, float]:
+    from app.render_grid import BATCH_STEPS, step_groups
+
+    steps = grid_trace["steps"]
+    batched = options.get("batched")
+    if batched is None:
+        batched = len(steps) >= BATCH_STEPS
+    groups = step_groups(grid_trace, bool(batched))
+    # 제목 + 행렬 등장 + 마무리. step 하나: 하이라이트 0.4 + 칸 채우기 0.6 + 제거 0.2초,
+    # 묶음 하나: 설명 교체 + Succession (step마다 0.5초)
+    singles = sum(1 for g in groups if len(g) == 1)
+    merged = len(steps) - singles
+    plays = 4 + 3 * singles + 2 * (len(groups) - singles)
+    return plays, 4.0 + 1.2 * singles + 0.2 * (len(groups) - singles) + 0.5 * merged
+
+
+def _cache_features(cache_trace: Dict[str, Any], options: Dict[str, Any]) -> Tuple[int, float]:
+    frames = len(cache_trace.get("frames", []))
+    # 제목 + 큐 + 요약 3회, 접근마다 요청 / 강조 0.5초 + 재배치 0.6초
+    plays = 5 + 2 * frames
+    return plays, 6.0 + 1.1 * frames
+
+
+def _generic_features(ir: Dict[str, Any], options: Dict[str, Any]) -> Tuple[int, float]:
+    # LLM이 만든 코드라 알 수 없음 → anim IR의 이벤트 수로 대충
+    events = len(ir.get("events", []) or ir.get("steps", []) or [])
+    return 10 + events, 10.0 + 0.5 * events
+
+
+# 기본 렌더러들의 값. app.renderers.register()가 렌더러를 등록할 때 kind별로 덮어쓴다
+FEATURES = {
+    "cnn": _cnn_features,
+    "sorting": _sorting_features,
+    "seq_attention": _attention_features,
+    "flow": _flow_features,
+    "grid": _grid_features,
+    "cache": _cache_features,
+    "generic": _generic_features,
+}
+
+# 예산을 넘을 때 시도할 더 싼 모드 (앞에서부터)
+CHEAPER_OPTIONS: Dict[str, List[Dict[str, Any]]] = {
+    "cnn": [{"batched": True}, {"mode": "heatmap"}],
+    "sorting": [{"mode": "bars"}],
+    "seq_attention": [{"mode": "heatmap"}],
+    "flow": [],
+    "grid": [{"batched": True}],
+    "cache": [],
+    "generic": [],
+}
+
+
+# === 2. 추정 / 보정 ===
+
+def _load_calibration() -> None:
+    if _calibration or not CALIBRATION_PATH.exists():
+        return
+    try:
+        _calibration.update(json.loads(CALIBRATION_PATH.read_text()))
+    except (OSError, ValueError):
+        pass
+
+
+def calibration(kind: str) -> float:
+    with _calibration_lock:
+        _load_calibration()
+        return _calibration.get(kind, 1.0)
+
+
+def estimate_cost(kind: str, ir: Dict[str, Any], quality: str = "l", **options: Any) -> CostEstimate:
+    """IR → 예상 play 수 / 영상 길이 / 렌더 시간. options는 렌더러의 mode / batched 인자."""
+    plays, duration = FEATURES[kind](ir, options)
+    base = STARTUP_S + SEC_PER_PLAY * plays + SEC_PER_VIDEO_S * duration * QUALITY_FACTOR[quality]
+    return CostEstimate(kind, plays, duration, base * calibration(kind), base, quality, dict(options))
+
+
+def observe(estimate: CostEstimate, actual_s: float, fraction_rendered: float = 1.0) -> None:
+    """
+    실제 렌더 시간으로 kind별 보정값 갱신.
+    fraction_rendered: 섹션 캐시 덕분에 일부만 렌더했으면 그 비율 (전체 렌더 시간으로 환산).
+    """
+    if fraction_rendered <= 0 or estimate.base_s <= 0:
+        return
+    full_s = actual_s / fraction_rendered
+    ratio = min(max(full_s / estimate.base_s, 0.1), 10.0)
+    with _calibration_lock:
+        _load_calibration()
+        old = _calibration.get(estimate.kind, 1.0)
+        _calibration[estimate.kind] = (1 - CALIBRATION_ALPHA) * old + CALIBRATION_ALPHA * ratio
+        try:
+            CALIBRATION_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = CALIBRATION_PATH.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(_calibration))
+            os.replace(tmp, CALIBRATION_PATH)
+        except OSError:
+            pass
+
+
+# === 3. admission control ===
+
+def admit(
+    kind: str,
+    ir: Dict[str, Any],
+    quality: str = "l",
+    budget_s: float = RENDER_BUDGET_S,
+    **options: Any,
+) -> Admission:
+    """
+    예상 렌더 시간이 budget_s 이하면 accept. 넘으면
+      1) 품질을 한 단계씩 낮추고
+      2) 렌더러의 더 싼 모드(CHEAPER_OPTIONS)를 차례로 적용해서
+    예산 안에 들어오는 첫 설정으로 downgrade. 끝까지 안 되면 reject.
+    """
+    requested = estimate_cost(kind, ir, quality, **options)
+    if requested.render_s <= budget_s:
+        return Admission("accept", requested)
+
+    candidates: List[Tuple[str, Dict[str, Any]]] = []
+    start = QUALITY_LADDER.index(quality) if quality in QUALITY_LADDER else len(QUALITY_LADDER) - 1
+    for q in QUALITY_LADDER[start + 1:]:
+        candidates.append((q, dict(options)))
+    merged = dict(options)
+    for cheaper in CHEAPER_OPTIONS.get(kind, []):
+        merged = {**merged, **cheaper}
+        candidates.append(("l", dict(merged)))
+
+    best = requested
+    for q, opts in candidates:
+        est = estimate_cost(kind, ir, q, **opts)
+        if est.render_s <= budget_s:
+            return Admission("downgrade", est, requested)
+        if est.render_s < best.render_s:
+            best = est
+    return Admission("reject", best, requested)
+
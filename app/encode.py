@@ -0,0 +1,164 @@
+# app/encode.py
+"""
+마스터 렌더 1개 → 파생 포맷 후처리 (manim 재실행 없음).
+
+  master.mp4 ──ffmpeg (병렬)──▶ webm    VP9, CRF (mp4보다 보통 30~50% 작음)
+                              ├▶ gif     palettegen/paletteuse 2-pass 필터 (1회 실행)
+                              ├▶ poster  마지막 장면 JPEG (정렬 완료, softmax 결과 등)
+                              └▶ mobile  360p / 저비트레이트 H.264 baseline, faststart
+
+파생 파일은 마스터 내용 해시로 DERIVED_CACHE_DIR에 캐시하고,
+job 디렉토리의 마스터 옆(<basename>.webm, <basename>.poster.jpg ...)에 링크한다.
+같은 IR이면 섹션 캐시 → 같은 마스터 → 파생 파일도 캐시 적중.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from app.cancel import CancelToken, run_manim
+from app.media_store import prune_files
+from app.sections import FFMPEG_BIN, SECTION_CACHE_DIR, SECTION_CACHE_QUOTA_BYTES
+
+DERIVED_CACHE_DIR = SECTION_CACHE_DIR / "derived"
+
+GIF_FPS = 12
+GIF_WIDTH = 480
+MOBILE_HEIGHT = 360
+# 마지막 프레임에서 이만큼 앞을 포스터로 (페이드아웃 직전)
+POSTER_FROM_END_S = 0.5
+
+# variant → (확장자, ffmpeg 출력 옵션)
+DERIVATIVES: Dict[str, tuple] = {
+    "webm": ("webm", [
+        "-c:v", "libvpx-vp9", "-b:v", "0", "-crf", "36",
+        "-deadline", "good", "-cpu-used", "4", "-row-mt", "1",
+        "-pix_fmt", "yuv420p", "-an",
+    ]),
+    "gif": ("gif", [
+        "-filter_complex",
+        f"[0:v]fps={GIF_FPS},scale={GIF_WIDTH}:-1:flags=lanczos,split[a][b];"
+        "[a]palettegen=stats_mode=diff[p];[b][p]paletteuse=dither=bayer:bayer_scale=5",
+        "-loop", "0",
+    ]),
+    "poster": ("jpg", ["-frames:v", "1", "-q:v", "3"]),
+    "mobile": ("mp4", [
+        "-c:v", "libx264", "-profile:v", "baseline", "-preset", "veryfast",
+        "-crf", "30", "-maxrate", "400k", "-bufsize", "800k",
+        "-vf", f"scale=-2:{MOBILE_HEIGHT}", "-pix_fmt", "yuv420p",
+        "-movflags", "+faststart", "-an",
+    ]),
+}
+
+# 재생 가능한 영상 variant (포스터 제외). choose_variant 후보
+VIDEO_VARIANTS = ("master", "webm", "mobile", "gif")
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _variant_name(stem: str, variant: str) -> str:
+    """demo + webm → demo.webm, demo + mobile → demo.mobile.mp4"""
+    ext = DERIVATIVES[variant][0]
+    return f"{stem}.{ext}" if variant == ext else f"{stem}.{variant}.{ext}"
+
+
+def variant_path(master: Path, variant: str) -> Path:
+    """job 디렉토리 안에서 마스터 옆 파생 파일 경로."""
+    return master.with_name(_variant_name(master.stem, variant))
+
+
+def _ffmpeg_cmd(master: Path, variant: str, out: Path, threads: int) -> List[str]:
+    ext, opts = DERIVATIVES[variant]
+    cmd = [FFMPEG_BIN, "-y", "-loglevel", "error"]
+    if variant == "poster":
+        cmd += ["-sseof", f"-{POSTER_FROM_END_S}"]
+    cmd += ["-i", str(master), "-threads", str(threads), *opts, "-f", _muxer(ext), str(out)]
+    return cmd
+
+
+def _muxer(ext: str) -> str:
+    return {"jpg": "image2", "mp4": "mp4", "webm": "webm", "gif": "gif"}[ext]
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _encode_one(master: Path, digest: str, variant: str, threads: int, token: Optional[CancelToken]) -> Path:
+    cached = DERIVED_CACHE_DIR / digest[:2] / _variant_name(digest, variant)
+    if cached.exists():
+        os.utime(cached)
+    else:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        # 임시 이름(.part)에 쓰므로 포맷은 -f로 지정하고, 끝나면 rename으로 게시
+        part = cached.with_name(f"{cached.name}.{uuid.uuid4().hex[:12]}.part")
+        try:
+            run_manim(_ffmpeg_cmd(master, variant, part, threads), token=token)
+            os.replace(part, cached)
+        finally:
+            if part.exists():
+                part.unlink()
+    out = variant_path(master, variant)
+    _link_or_copy(cached, out)
+    return out
+
+
+def encode_derivatives(
+    master_path: str,
+    variants: Iterable[str],
+    token: Optional[CancelToken] = None,
+) -> Dict[str, str]:
+    """
+    마스터 영상 → 요청한 파생 포맷들을 병렬 ffmpeg으로 생성.
+    반환: {"master": path, variant: path, ...}. 모르는 variant면 ValueError.
+    """
+    master = Path(master_path)
+    wanted = list(dict.fromkeys(variants))
+    unknown = [v for v in wanted if v not in DERIVATIVES]
+    if unknown:
+        raise ValueError(f"unknown variants: {unknown} (choose from {sorted(DERIVATIVES)})")
+
+    result = {"master": str(master)}
+    if not wanted:
+        return result
+
+    digest = _file_digest(master)
+    # ffmpeg 프로세스끼리 코어를 나눠 쓴다
+    threads = max(1, (os.cpu_count() or 1) // len(wanted))
+    with ThreadPoolExecutor(max_workers=len(wanted)) as pool:
+        futures = {v: pool.submit(_encode_one, master, digest, v, threads, token) for v in wanted}
+        for v, fut in futures.items():
+            result[v] = str(fut.result())
+
+    prune_files(SECTION_CACHE_DIR, SECTION_CACHE_QUOTA_BYTES)
+    return result
+
+
+def choose_variant(paths: Dict[str, str], accept: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    paths(encode_derivatives 결과) 중 클라이언트가 받을 수 있는(accept) 영상 variant에서
+    가장 작은 파일의 이름. accept가 없으면 모든 영상 variant가 후보.
+    """
+    allowed = set(accept) if accept is not None else set(VIDEO_VARIANTS)
+    candidates = [
+        (os.path.getsize(p), name)
+        for name, p in paths.items()
+        if name in VIDEO_VARIANTS and name in allowed and os.path.exists(p)
+    ]
+    return min(candidates)[1] if candidates else None
@@ -0,0 +1,437 @@
+# app/graph_layout.py
+"""
+노드 / 간선 그래프 자동 배치 (NumPy만 사용, manim 없이 호스트에서도 import 가능).
+
+  layered_layout   : Sugiyama 방식 DAG 배치 (사이클 제거 → 층 배정 → 더미 노드 → barycenter 교차 감소 → 좌표)
+  force_layout     : Fruchterman-Reingold 힘 기반 배치 (쌍별 반발력을 (n, n) 배열로 한 번에 계산)
+  remove_overlaps  : 노드 사각형이 겹치지 않게 밀어내기
+  fit_to_frame     : 노드 크기를 고려해서 manim 프레임 좌표(중심 ORIGIN)에 맞춤
+  graph_layout     : 위 단계를 묶은 진입점. DAG면 layered, 아니면 force
+
+좌표는 manim 프레임 단위 (기본 14.2 x 8), 반환은 (n, 3) 배열이라 mobject.move_to에 바로 쓸 수 있다.
+노드 수백 개도 수 ms ~ 수십 ms.
+app.layout_utils가 그대로 다시 내보내고, layout_graph()로 mobject에 적용한다.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FRAME_WIDTH = 14.2
+FRAME_HEIGHT = 8.0
+FRAME_MARGIN = 0.5
+
+# 노드 크기를 모를 때 (layout_utils의 DEFAULT_NODE_WIDTH / HEIGHT와 같은 값)
+DEFAULT_SIZE = (1.2, 0.6)
+LAYER_GAP = 1.2
+NODE_GAP = 0.5
+CROSSING_SWEEPS = 8
+FORCE_ITERATIONS = 80
+OVERLAP_ITERATIONS = 60
+
+Edge = Tuple[int, int]
+
+
+def _sizes(n: int, sizes: Optional[Sequence[Sequence[float]]]) -> np.ndarray:
+    if sizes is None:
+        return np.tile(np.array(DEFAULT_SIZE, dtype=float), (n, 1))
+    return np.asarray(sizes, dtype=float).reshape(n, 2)
+
+
+def _clean_edges(n: int, edges: Sequence[Sequence[int]]) -> List[Edge]:
+    """범위 밖 / 자기 자신 / 중복 간선 제거."""
+    seen, out = set(), []
+    for e in edges:
+        a, b = int(e[0]), int(e[1])
+        if a == b or not (0 <= a < n and 0 <= b < n) or (a, b) in seen:
+            continue
+        seen.add((a, b))
+        out.append((a, b))
+    return out
+
+
+def _as_3d(xy: np.ndarray) -> np.ndarray:
+    return np.hstack([xy, np.zeros((len(xy), 1))])
+
+
+# === 1. Sugiyama 계층 배치 ===
+
+def _acyclic(n: int, edges: List[Edge]) -> Tuple[List[Edge], int]:
+    """DFS로 back edge를 뒤집어 DAG로 만든다. (간선, 뒤집은 수)"""
+    out: List[List[int]] = [[] for _ in range(n)]
+    for a, b in edges:
+        out[a].append(b)
+    state = [0] * n          # 0 미방문, 1 스택 위, 2 완료
+    back = set()
+    for root in range(n):
+        if state[root]:
+            continue
+        stack = [(root, 0)]
+        state[root] = 1
+        while stack:
+            v, i = stack[-1]
+            if i < len(out[v]):
+                stack[-1] = (v, i + 1)
+                w = out[v][i]
+                if state[w] == 1:
+                    back.add((v, w))
+                elif state[w] == 0:
+                    state[w] = 1
+                    stack.append((w, 0))
+            else:
+                state[v] = 2
+                stack.pop()
+    dag = [(b, a) if (a, b) in back else (a, b) for a, b in edges]
+    return list(dict.fromkeys(dag)), len(back)
+
+
+def _layers(n: int, edges: List[Edge]) -> np.ndarray:
+    """최장 경로 층 배정 (Kahn 위상 정렬)."""
+    indeg = np.zeros(n, dtype=int)
+    out: List[List[int]] = [[] for _ in range(n)]
+    for a, b in edges:
+        out[a].append(b)
+        indeg[b] += 1
+    layer = np.zeros(n, dtype=int)
+    queue = [v for v in range(n) if indeg[v] == 0]
+    while queue:
+        v = queue.pop()
+        for w in out[v]:
+            layer[w] = max(layer[w], layer[v] + 1)
+            indeg[w] -= 1
+            if indeg[w] == 0:
+                queue.append(w)
+    return layer
+
+
+def _order_layers(layer: np.ndarray, edges: List[Edge], n_real: int) -> List[List[int]]:
+    """barycenter 휴리스틱으로 층별 순서를 정한다 (아래로 / 위로 번갈아 sweep)."""
+    depth = int(layer.max()) + 1 if len(layer) else 0
+    layers: List[List[int]] = [[] for _ in range(depth)]
+    for v in range(len(layer)):
+        layers[layer[v]].append(v)
+    ups: List[List[int]] = [[] for _ in range(len(layer))]
+    downs: List[List[int]] = [[] for _ in range(len(layer))]
+    for a, b in edges:
+        downs[a].append(b)
+        ups[b].append(a)
+    pos = [0.0] * len(layer)
+    for row in layers:
+        for i, v in enumerate(row):
+            pos[v] = i
+
+    def sweep(rng, neighbours):
+        for k in rng:
+            row = layers[k]
+            keys = []
+            for i, v in enumerate(row):
+                nb = neighbours[v]
+                keys.append((sum(pos[w] for w in nb) / len(nb) if nb else pos[v], i))
+            row[:] = [row[i] for _, i in sorted(keys)]
+            for i, v in enumerate(row):
+                pos[v] = i
+
+    for s in range(CROSSING_SWEEPS):
+        if s % 2 == 0:
+            sweep(range(1, depth), ups)
+        else:
+            sweep(range(depth - 2, -1, -1), downs)
+    return layers
+
+
+def layered_layout(
+    n: int,
+    edges: Sequence[Sequence[int]],
+    sizes: Optional[Sequence[Sequence[float]]] = None,
+    direction: str = "LR",
+    layer_gap: float = LAYER_GAP,
+    node_gap: float = NODE_GAP,
+) -> np.ndarray:
+    """
+    Sugiyama 방식 계층 배치. direction: "LR"(층이 왼→오) / "TB"(위→아래).
+    사이클은 back edge를 뒤집어 처리하고, 두 층 이상 건너는 간선은 더미 노드로 나눠서 교차를 줄인다.
+    반환: (n, 3) 중심 좌표 (프레임 맞춤 전).
+    """
+    size = _sizes(n, sizes)
+    if n == 0:
+        return np.zeros((0, 3))
+    dag, _ = _acyclic(n, _clean_edges(n, edges))
+    layer = _layers(n, dag)
+
+    # 긴 간선 → 더미 노드 체인 (크기 0)
+    layer_list = list(layer)
+    split: List[Edge] = []
+    for a, b in dag:
+        prev = a
+        for k in range(layer[a] + 1, layer[b]):
+            layer_list.append(k)
+            split.append((prev, len(layer_list) - 1))
+            prev = len(layer_list) - 1
+        split.append((prev, b))
+    layer_all = np.array(layer_list, dtype=int)
+    layers = _order_layers(layer_all, split, n)
+
+    # 층 방향 축(along) / 층 안 축(across)의 노드 크기
+    horizontal = direction.upper() != "TB"
+    along = np.zeros(len(layer_all))
+    across = np.zeros(len(layer_all))
+    along[:n] = size[:, 0] if horizontal else size[:, 1]
+    across[:n] = size[:, 1] if horizontal else size[:, 0]
+
+    # 층 좌표: 층마다 가장 두꺼운 노드 기준
+    thickness = np.array([max((along[v] for v in row), default=0.0) for row in layers])
+    starts = np.concatenate([[0.0], np.cumsum(thickness[:-1] + layer_gap)])
+    layer_coord = starts + thickness / 2
+
+    # 층 안 좌표: 순서대로 쌓은 뒤, 이웃 평균 쪽으로 당기고 겹침은 순서를 지키며 밀어냄
+    # 더미 노드도 node_gap 만큼 자리를 차지해서 긴 간선(직선 화살표)이 노드를 관통하지 않게 한다
+    pad = np.full(len(layer_all), node_gap)
+    coord = np.zeros(len(layer_all))
+    for row in layers:
+        widths = across[row] + pad[row]
+        offs = np.cumsum(widths) - widths / 2
+        coord[row] = offs - offs.mean() if len(row) else offs
+    ea = np.array([a for a, _ in split], dtype=int)
+    eb = np.array([b for _, b in split], dtype=int)
+    degree = np.bincount(np.concatenate([ea, eb]), minlength=len(layer_all))
+    for _ in range(4):
+        # 이웃 좌표 평균 (모든 노드 한 번에)
+        total = np.bincount(ea, coord[eb], len(layer_all)) + np.bincount(eb, coord[ea], len(layer_all))
+        want_all = np.where(degree > 0, total / np.maximum(degree, 1), coord)
+        for row in layers:
+            if not row:
+                continue
+            want = want_all[row]
+            half = (across[row] + pad[row]) / 2
+            # 순서를 지키면서 최소 간격 보장: placed - 누적간격 이 단조 증가하도록
+            offs = np.concatenate([[0.0], np.cumsum(half[:-1] + half[1:])])
+            placed = offs + np.maximum.accumulate(want - offs)
+            # 오른쪽으로 밀린 만큼 전체를 되돌려 평균 위치를 유지
+            placed -= (placed - want).mean()
+            coord[row] = placed
+
+    xy = np.zeros((n, 2))
+    lc = layer_coord[layer_all[:n]]
+    if horizontal:
+        xy[:, 0], xy[:, 1] = lc, -coord[:n]
+    else:
+        xy[:, 0], xy[:, 1] = coord[:n], -lc
+    xy -= (xy.max(axis=0) + xy.min(axis=0)) / 2
+    return _as_3d(xy)
+
+
+# === 2. 힘 기반 배치 ===
+
+def force_layout(
+    n: int,
+    edges: Sequence[Sequence[int]],
+    sizes: Optional[Sequence[Sequence[float]]] = None,
+    iterations: int = FORCE_ITERATIONS,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Fruchterman-Reingold. 반발력은 (n, n) 차분 배열로 한 번에, 인력은 간선 배열로 np.add.at.
+    이상적인 간선 길이 k는 노드 크기에서 잡는다. 반환: (n, 3) 중심 좌표 (프레임 맞춤 전).
+    """
+    size = _sizes(n, sizes)
+    if n <= 1:
+        return np.zeros((n, 3))
+    e = np.array(_clean_edges(n, edges), dtype=int).reshape(-1, 2)
+    k = float(np.mean(np.linalg.norm(size, axis=1))) + NODE_GAP
+    rng = np.random.default_rng(seed)
+    angle = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    pos = np.stack([np.cos(angle), np.sin(angle)], axis=1) * k * np.sqrt(n) / 2
+    pos += rng.normal(scale=0.01 * k, size=pos.shape)
+    temp = k * np.sqrt(n) / 4
+    cool = temp / (iterations + 1)
+
+    for _ in range(iterations):
+        dx = pos[:, 0:1] - pos[:, 0]
+        dy = pos[:, 1:2] - pos[:, 1]
+        dist2 = np.maximum(dx * dx + dy * dy, 1e-4)
+        np.fill_diagonal(dist2, np.inf)
+        rep = (k * k) / dist2
+        disp = np.stack([(dx * rep).sum(axis=1), (dy * rep).sum(axis=1)], axis=1)
+        if len(e):
+            d = pos[e[:, 0]] - pos[e[:, 1]]
+            length = np.maximum(np.linalg.norm(d, axis=1, keepdims=True), 1e-4)
+            pull = d * (length / k)
+            np.add.at(disp, e[:, 0], -pull)
+            np.add.at(disp, e[:, 1], pull)
+        # 연결 안 된 조각이 멀리 떠나지 않게 중심으로 약하게 당김
+        disp -= pos * 0.05
+        length = np.maximum(np.linalg.norm(disp, axis=1, keepdims=True), 1e-9)
+        pos += disp / length * np.minimum(length, temp)
+        temp = max(temp - cool, 0.01 * k)
+
+    pos -= (pos.max(axis=0) + pos.min(axis=0)) / 2
+    return _as_3d(pos)
+
+
+# === 3. 겹침 제거 / 프레임 맞춤 ===
+
+def remove_overlaps(
+    positions: np.ndarray,
+    sizes: Optional[Sequence[Sequence[float]]] = None,
+    gap: float = 0.2,
+    iterations: int = OVERLAP_ITERATIONS,
+) -> np.ndarray:
+    """
+    겹치는 노드 사각형 쌍을 겹침이 작은 축으로 반씩 밀어낸다 (모든 쌍을 한 번에 계산).
+    반환: 새 (n, 3) 배열.
+    """
+    pos = np.array(positions, dtype=float)[:, :2].copy()
+    n = len(pos)
+    if n <= 1:
+        return _as_3d(pos)
+    half = _sizes(n, sizes) / 2 + gap / 2
+    for _ in range(iterations):
+        d = pos[:, None, :] - pos[None, :, :]
+        over = half[:, None, :] + half[None, :, :] - np.abs(d)
+        mask = (over[..., 0] > 0) & (over[..., 1] > 0)
+        mask[np.tril_indices(n)] = False
+        if not mask.any():
+            break
+        i, j = np.nonzero(mask)
+        ov = over[i, j]
+        axis = np.argmin(ov, axis=1)
+        sign = np.sign(d[i, j, axis])
+        # 같은 자리에 있는 쌍은 번호 순으로 갈라놓는다
+        sign[sign == 0] = 1.0
+        push = np.zeros((len(i), 2))
+        push[np.arange(len(i)), axis] = sign * ov[np.arange(len(i)), axis] / 2
+        np.add.at(pos, i, push)
+        np.add.at(pos, j, -push)
+    return _as_3d(pos)
+
+
+def _overlaps(pos: np.ndarray, half: np.ndarray) -> bool:
+    d = np.abs(pos[:, None, :] - pos[None, :, :])
+    hit = (d < half[:, None, :] + half[None, :, :] - 1e-9).all(axis=2)
+    np.fill_diagonal(hit, False)
+    return bool(hit.any())
+
+
+def fit_to_frame(
+    positions: np.ndarray,
+    sizes: Optional[Sequence[Sequence[float]]] = None,
+    width: float = FRAME_WIDTH - 2 * FRAME_MARGIN,
+    height: float = FRAME_HEIGHT - 2 * FRAME_MARGIN,
+    center: Sequence[float] = (0.0, 0.0, 0.0),
+    grow: bool = False,
+) -> np.ndarray:
+    """
+    노드 중심 간 거리만 축별로 스케일해서 (노드 크기는 그대로) 바운딩 박스가 width x height 안에 들게 한다.
+    grow=False면 키우지는 않는다. 입력에 겹침이 없으면 겹침이 생기기 직전까지만 줄이므로,
+    아주 큰 그래프는 프레임을 넘을 수 있다 (manim 쪽에서는 layout_graph가 autorescale_group으로 마무리).
+    """
+    pos = np.array(positions, dtype=float)[:, :2]
+    n = len(pos)
+    if n == 0:
+        return np.zeros((0, 3))
+    half = _sizes(n, sizes) / 2
+    pos = pos - (pos.max(axis=0) + pos.min(axis=0)) / 2
+    target = np.ones(2)
+    for axis, limit in ((0, width), (1, height)):
+        lo, hi = pos[:, axis].argmin(), pos[:, axis].argmax()
+        span = pos[hi, axis] - pos[lo, axis]
+        if span <= 1e-9:
+            continue
+        # 가장자리 노드의 반 크기만큼 여유를 뺀 뒤 남는 폭
+        room = max(limit - half[hi, axis] - half[lo, axis], 0.0)
+        target[axis] = room / span if grow else min(1.0, room / span)
+
+    scale = target
+    if (target < 1.0).any() and not _overlaps(pos, half):
+        # scale(t) = 1 - t * (1 - target): 원래 배치(t=0) ~ 목표(t=1).
+        # 쌍 (i, j)는 두 축 모두에서 간격이 반 크기 합보다 작아질 때 겹치므로,
+        # 축별로 겹치기 시작하는 t를 구하고 두 축 중 큰 값의 최솟값까지만 줄인다.
+        d = np.abs(pos[:, None, :] - pos[None, :, :])
+        need = half[:, None, :] + half[None, :, :]
+        shrink = 1.0 - target
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_axis = np.where(
+                shrink > 0,
+                (1.0 - need / d) / np.where(shrink > 0, shrink, 1.0),
+                np.where(d < need, -np.inf, np.inf),
+            )
+        t_pair = np.nan_to_num(t_axis.max(axis=2), nan=np.inf, posinf=np.inf)
+        np.fill_diagonal(t_pair, np.inf)
+        t = float(np.clip(t_pair.min(), 0.0, 1.0))
+        scale = 1.0 - t * shrink
+    pos = pos * scale
+    lo, hi = (pos - half).min(axis=0), (pos + half).max(axis=0)
+    pos -= (lo + hi) / 2
+    return _as_3d(pos) + np.asarray(center, dtype=float)
+
+
+def is_dag(n: int, edges: Sequence[Sequence[int]]) -> bool:
+    return _acyclic(n, _clean_edges(n, edges))[1] == 0
+
+
+def graph_layout(
+    n: int,
+    edges: Sequence[Sequence[int]],
+    sizes: Optional[Sequence[Sequence[float]]] = None,
+    method: str = "auto",
+    direction: str = "LR",
+    width: float = FRAME_WIDTH - 2 * FRAME_MARGIN,
+    height: float = FRAME_HEIGHT - 2 * FRAME_MARGIN,
+    center: Sequence[float] = (0.0, 0.0, 0.0),
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    배치 → 겹침 제거 → 프레임 맞춤까지 한 번에. method: "auto" | "layered" | "force".
+    auto: 간선이 있고 DAG(사이클이 거의 없음)면 layered, 아니면 force.
+    """
+    edges = _clean_edges(n, edges)
+    if method == "auto":
+        method = "layered" if edges and is_dag(n, edges) else "force"
+    if method == "layered":
+        pos = layered_layout(n, edges, sizes, direction=direction)
+    elif method == "force":
+        pos = remove_overlaps(force_layout(n, edges, sizes, seed=seed), sizes)
+    else:
+        raise ValueError(f"unknown graph layout method: {method}")
+    return fit_to_frame(pos, sizes, width=width, height=height, center=center)
+
+
+# === 4. LLM anim IR 좌표 정리 ===
+
+# anim IR layout의 shape → 대략적인 크기 (layout_utils 기본 노드와 같은 값)
+SHAPE_SIZES = {"box": (1.2, 0.6), "rectangle": (1.2, 0.6), "circle": (0.6, 0.6), "dot": (0.2, 0.2)}
+# anim IR 좌표 범위 ([-5, 5]) → 프레임 안
+ANIM_IR_WIDTH = 12.0
+ANIM_IR_HEIGHT = 6.5
+
+
+def tidy_anim_layout(anim_ir: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    call_llm_anim_ir 결과의 layout 좌표를 정리한다 (제자리 수정 후 반환).
+    LLM 좌표를 시작점으로 겹침만 제거하고 프레임 안에 맞춘다. 좌표가 없거나 모두 같으면
+    actions의 target 순서로 간선을 만들어 graph_layout으로 새로 배치한다.
+    """
+    layout = [e for e in anim_ir.get("layout", []) or [] if isinstance(e, dict) and e.get("id") is not None]
+    if not layout:
+        return anim_ir
+    n = len(layout)
+    sizes = np.array([SHAPE_SIZES.get(str(e.get("shape", "box")).lower(), DEFAULT_SIZE) for e in layout])
+    raw = []
+    for e in layout:
+        p = e.get("position")
+        ok = isinstance(p, (list, tuple)) and len(p) >= 2 and all(isinstance(v, (int, float)) for v in p[:2])
+        raw.append([float(p[0]), float(p[1])] if ok else None)
+
+    if any(p is None for p in raw) or len({tuple(p) for p in raw}) <= 1:
+        index = {str(e["id"]): k for k, e in enumerate(layout)}
+        steps = [index[str(a.get("target"))] for a in anim_ir.get("actions", []) or []
+                 if isinstance(a, dict) and str(a.get("target")) in index]
+        edges = [(a, b) for a, b in zip(steps, steps[1:]) if a != b]
+        pos = graph_layout(n, edges, sizes, width=ANIM_IR_WIDTH, height=ANIM_IR_HEIGHT)
+    else:
+        pos = remove_overlaps(_as_3d(np.array(raw)), sizes)
+        pos = fit_to_frame(pos, sizes, width=ANIM_IR_WIDTH, height=ANIM_IR_HEIGHT)
+    for e, p in zip(layout, pos):
+        e["position"] = [round(float(p[0]), 2), round(float(p[1]), 2)]
+    return anim_ir
@@ -0,0 +1,390 @@
+# app/grid_ir.py
+"""
+GRID 패턴용 grid IR → grid trace (NumPy).
+
+LLM은 "무엇을 어떤 순서로 계산하는지"만 적은 grid IR을 만들고, 값 계산은 여기서 NumPy로 한다.
+씬(app.render_grid)은 결과 trace의 값만 그린다 (cnn_trace와 같은 분리).
+
+grid IR (LLM 출력 / 내장 알고리즘이 만드는 형식):
+{
+  "title": "Matrix Multiplication",
+  "matrices": [
+    {"name": "A", "values": [[1, 2], [3, 4]]},
+    {"name": "C", "shape": [2, 2], "row_labels": ["r0", "r1"], "col_labels": ["c0", "c1"]}   # 빈 칸
+  ],
+  "steps": [
+    {"caption": "C[0][0] = A row 0 · B col 0",
+     "ops": [
+        {"op": "highlight", "matrix": "A", "range": [0, 0, 0, 1]},          # [r0, c0, r1, c1] (끝 포함)
+        {"op": "compute", "matrix": "C", "cell": [0, 0], "fn": "dot",
+         "args": [{"matrix": "A", "range": [0, 0, 0, 1]}, {"matrix": "B", "range": [0, 0, 1, 0]}]},
+        {"op": "write", "matrix": "C", "cell": [1, 1], "value": 7}
+     ]}
+  ]
+}
+또는 내장 알고리즘: {"algorithm": "matmul" | "lcs" | "edit_distance" | "attention", "inputs": {...}}
+
+compute:
+  - 한 칸(cell) 대상: fn ∈ REDUCE_FNS. args 범위의 값을 모아 계산 → × scale + plus
+  - 범위(range) 대상: fn ∈ MAP_FNS. args[0]과 같은 모양의 결과를 범위 전체에 씀 (softmax는 행 단위)
+  args의 칸은 하이라이트되고, 대상 칸은 한 step 안에서 한 번에 채워진다.
+
+grid trace (씬 입력):
+{
+  "title": "...", "decimals": 0,
+  "matrices": [{"name", "rows", "cols", "values": [[v | null]], "row_labels", "col_labels"}],
+  "steps": [{"caption": "...", "highlights": [[m, r0, c0, r1, c1]], "writes": [[m, r, c, v]]}]
+}
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# 한 화면에 그릴 수 있는 상한 (넘으면 ValueError)
+MAX_GRID_MATRICES = 4
+MAX_GRID_CELLS = 144
+MAX_GRID_STEPS = 240
+CAPTION_MAX = 70
+LABEL_MAX = 6
+# 값이 전부 정수가 아니면 소수 둘째 자리까지 표시
+FLOAT_DECIMALS = 2
+
+REDUCE_FNS: Dict[str, Callable[..., float]] = {
+    "sum": np.sum,
+    "max": np.max,
+    "min": np.min,
+    "mean": np.mean,
+    "prod": np.prod,
+}
+MAP_FNS = ("copy", "relu", "softmax")
+ALGORITHMS = ("matmul", "lcs", "edit_distance", "attention")
+
+
+def _softmax_rows(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _clip(text: Any, limit: int) -> str:
+    text = str(text)
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+# === 1. 내장 알고리즘 → grid IR ===
+
+def _cell_op(matrix: str, r: int, c: int, fn: str, args: List[Tuple[str, int, int]], plus: float = 0) -> Dict[str, Any]:
+    return {
+        "op": "compute", "matrix": matrix, "cell": [r, c], "fn": fn, "plus": plus,
+        "args": [{"matrix": m, "cell": [i, j]} for m, i, j in args],
+    }
+
+
+def _matmul_ir(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    a, b = np.asarray(inputs["A"], dtype=float), np.asarray(inputs["B"], dtype=float)
+    if a.ndim != 2 or b.ndim != 2 or a.shape[1] != b.shape[0]:
+        raise ValueError(f"matmul needs A (n x k) and B (k x m), got {a.shape} and {b.shape}")
+    n, k = a.shape
+    m = b.shape[1]
+    steps = []
+    for i in range(n):
+        for j in range(m):
+            steps.append({
+                "caption": f"C[{i}][{j}] = A row {i} · B column {j}",
+                "ops": [{
+                    "op": "compute", "matrix": "C", "cell": [i, j], "fn": "dot",
+                    "args": [{"matrix": "A", "range": [i, 0, i, k - 1]}, {"matrix": "B", "range": [0, j, k - 1, j]}],
+                }],
+            })
+    return {
+        "title": inputs.get("title") or "Matrix Multiplication",
+        "matrices": [
+            {"name": "A", "values": a.tolist()},
+            {"name": "B", "values": b.tolist()},
+            {"name": "C", "shape": [n, m]},
+        ],
+        "steps": steps,
+    }
+
+
+def _string_table(inputs: Dict[str, Any], name: str) -> Tuple[str, str, Dict[str, Any]]:
+    a, b = str(inputs.get("a", "")), str(inputs.get("b", ""))
+    if not a or not b:
+        raise ValueError(f"{name} needs two non-empty strings a and b")
+    table = {
+        "name": name,
+        "shape": [len(a) + 1, len(b) + 1],
+        "row_labels": ["ε", *a],
+        "col_labels": ["ε", *b],
+    }
+    return a, b, table
+
+
+def _lcs_ir(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    a, b, table = _string_table(inputs, "L")
+    n, m = len(a), len(b)
+    base = [{"op": "write", "matrix": "L", "range": [0, 0, 0, m], "value": 0},
+            {"op": "write", "matrix": "L", "range": [1, 0, n, 0], "value": 0}]
+    steps = [{"caption": "empty prefix → LCS length 0", "ops": base}]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            if a[i - 1] == b[j - 1]:
+                op = _cell_op("L", i, j, "sum", [("L", i - 1, j - 1)], plus=1)
+                caption = f"'{a[i - 1]}' = '{b[j - 1]}': diagonal + 1"
+            else:
+                op = _cell_op("L", i, j, "max", [("L", i - 1, j), ("L", i, j - 1)])
+                caption = f"'{a[i - 1]}' ≠ '{b[j - 1]}': max(up, left)"
+            steps.append({"caption": caption, "ops": [op]})
+    return {"title": inputs.get("title") or f"LCS of {a} and {b}", "matrices": [table], "steps": steps}
+
+
+def _edit_distance_ir(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    a, b, table = _string_table(inputs, "D")
+    n, m = len(a), len(b)
+    base = [{"op": "write", "matrix": "D", "cell": [0, j], "value": j} for j in range(m + 1)]
+    base += [{"op": "write", "matrix": "D", "cell": [i, 0], "value": i} for i in range(1, n + 1)]
+    steps = [{"caption": "empty prefix → i insertions / deletions", "ops": base}]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            if a[i - 1] == b[j - 1]:
+                op = _cell_op("D", i, j, "sum", [("D", i - 1, j - 1)])
+                caption = f"'{a[i - 1]}' = '{b[j - 1]}': keep diagonal"
+            else:
+                op = _cell_op("D", i, j, "min", [("D", i - 1, j - 1), ("D", i - 1, j), ("D", i, j - 1)], plus=1)
+                caption = f"'{a[i - 1]}' ≠ '{b[j - 1]}': 1 + min(replace, delete, insert)"
+            steps.append({"caption": caption, "ops": [op]})
+    return {"title": inputs.get("title") or f"Edit distance: {a} → {b}", "matrices": [table], "steps": steps}
+
+
+def _attention_ir(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    tokens = [str(t) for t in inputs.get("tokens") or []]
+    if not tokens:
+        raise ValueError("attention grid needs tokens")
+    n = len(tokens)
+    if inputs.get("Q") is not None and inputs.get("K") is not None:
+        q, k = np.asarray(inputs["Q"], dtype=float), np.asarray(inputs["K"], dtype=float)
+    else:
+        # Q / K가 없으면 시드 고정 작은 정수 행렬
+        rng = np.random.default_rng(int(inputs.get("seed", 7)))
+        d = int(inputs.get("d", 2))
+        q, k = rng.integers(-2, 3, size=(n, d)).astype(float), rng.integers(-2, 3, size=(n, d)).astype(float)
+    if q.shape != k.shape or q.ndim != 2 or q.shape[0] != n:
+        raise ValueError(f"Q and K must both be {n} x d, got {q.shape} and {k.shape}")
+    d = q.shape[1]
+    scale = 1.0 / math.sqrt(d)
+    steps = []
+    for i in range(n):
+        for j in range(n):
+            steps.append({
+                "caption": f"score({tokens[i]}, {tokens[j]}) = q·k / √{d}",
+                "ops": [{
+                    "op": "compute", "matrix": "S", "cell": [i, j], "fn": "dot", "scale": scale,
+                    "args": [{"matrix": "Q", "range": [i, 0, i, d - 1]}, {"matrix": "K", "range": [j, 0, j, d - 1]}],
+                }],
+            })
+    for i in range(n):
+        steps.append({
+            "caption": f"softmax over row '{tokens[i]}'",
+            "ops": [{"op": "compute", "matrix": "W", "range": [i, 0, i, n - 1], "fn": "softmax",
+                     "args": [{"matrix": "S", "range": [i, 0, i, n - 1]}]}],
+        })
+    labels = {"row_labels": tokens, "col_labels": tokens}
+    return {
+        "title": inputs.get("title") or "Attention as a Grid",
+        "matrices": [
+            {"name": "Q", "values": q.tolist(), "row_labels": tokens},
+            {"name": "K", "values": k.tolist(), "row_labels": tokens},
+            {"name": "S", "shape": [n, n], **labels},
+            {"name": "W", "shape": [n, n], **labels},
+        ],
+        "steps": steps,
+    }
+
+
+_BUILTINS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "matmul": _matmul_ir,
+    "lcs": _lcs_ir,
+    "edit_distance": _edit_distance_ir,
+    "attention": _attention_ir,
+}
+
+
+def expand_algorithm(grid_ir: Dict[str, Any]) -> Dict[str, Any]:
+    """{"algorithm": ..., "inputs": ...} → 명시적 steps가 있는 grid IR. 이미 steps가 있으면 그대로."""
+    algo = grid_ir.get("algorithm")
+    if not algo or algo == "custom" or grid_ir.get("steps"):
+        return grid_ir
+    if algo not in _BUILTINS:
+        raise ValueError(f"unknown grid algorithm: {algo} (expected one of {', '.join(ALGORITHMS)})")
+    inputs = {"title": grid_ir.get("title"), **(grid_ir.get("inputs") or {})}
+    try:
+        return _BUILTINS[algo](inputs)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"invalid inputs for {algo}: {e}")
+
+
+# === 2. grid IR 실행 → grid trace ===
+
+class _Grid:
+    """실행 중인 행렬들. 빈 칸은 NaN."""
+
+    def __init__(self, specs: List[Dict[str, Any]]):
+        if not specs:
+            raise ValueError("grid IR needs at least one matrix")
+        if len(specs) > MAX_GRID_MATRICES:
+            raise ValueError(f"too many matrices for one grid scene ({len(specs)} > {MAX_GRID_MATRICES})")
+        self.index: Dict[str, int] = {}
+        self.values: List[np.ndarray] = []
+        self.meta: List[Dict[str, Any]] = []
+        for spec in specs:
+            name = str(spec.get("name", ""))
+            if not name or name in self.index:
+                raise ValueError(f"matrix names must be unique and non-empty: {name!r}")
+            if spec.get("values") is not None:
+                arr = np.array([[np.nan if v is None else v for v in row] for row in spec["values"]], dtype=float)
+            else:
+                rows, cols = (int(x) for x in spec.get("shape", ()))
+                arr = np.full((rows, cols), np.nan)
+            if arr.ndim != 2 or arr.size == 0:
+                raise ValueError(f"matrix {name} must be a non-empty 2D table")
+            if arr.size > MAX_GRID_CELLS:
+                raise ValueError(f"matrix {name} is too large to draw ({arr.size} > {MAX_GRID_CELLS} cells)")
+            self.index[name] = len(self.values)
+            self.values.append(arr)
+            self.meta.append({
+                "name": name,
+                "row_labels": [_clip(x, LABEL_MAX) for x in spec.get("row_labels") or []][: arr.shape[0]],
+                "col_labels": [_clip(x, LABEL_MAX) for x in spec.get("col_labels") or []][: arr.shape[1]],
+            })
+        self.initial = [v.copy() for v in self.values]
+
+    def matrix(self, name: Any) -> int:
+        if name not in self.index:
+            raise ValueError(f"unknown matrix: {name}")
+        return self.index[name]
+
+    def region(self, ref: Dict[str, Any]) -> Tuple[int, int, int, int, int]:
+        """{"matrix", "cell": [r, c]} | {"matrix", "range": [r0, c0, r1, c1]} → (m, r0, c0, r1, c1)."""
+        m = self.matrix(ref.get("matrix"))
+        if ref.get("range") is not None:
+            r0, c0, r1, c1 = (int(x) for x in ref["range"])
+        elif ref.get("cell") is not None:
+            r0, c0 = (int(x) for x in ref["cell"])
+            r1, c1 = r0, c0
+        else:
+            raise ValueError("op needs a cell or a range")
+        rows, cols = self.values[m].shape
+        r0, r1, c0, c1 = min(r0, r1), max(r0, r1), min(c0, c1), max(c0, c1)
+        if r0 < 0 or c0 < 0 or r1 >= rows or c1 >= cols:
+            raise ValueError(f"{self.meta[m]['name']}{[r0, c0, r1, c1]} is outside a {rows}x{cols} matrix")
+        return m, r0, c0, r1, c1
+
+    def read(self, region: Tuple[int, int, int, int, int]) -> np.ndarray:
+        m, r0, c0, r1, c1 = region
+        block = self.values[m][r0:r1 + 1, c0:c1 + 1]
+        if np.isnan(block).any():
+            raise ValueError(f"{self.meta[m]['name']}{[r0, c0, r1, c1]} reads an empty cell")
+        return block
+
+
+def _number(v: float) -> Any:
+    v = round(float(v), 4)
+    return int(v) if v.is_integer() else v
+
+
+def _compute(grid: _Grid, op: Dict[str, Any], target: Tuple[int, int, int, int, int]) -> np.ndarray:
+    fn = op.get("fn")
+    args = [grid.region(a) for a in op.get("args") or []]
+    if not args:
+        raise ValueError("compute needs at least one argument")
+    blocks = [grid.read(a) for a in args]
+    _, r0, c0, r1, c1 = target
+    shape = (r1 - r0 + 1, c1 - c0 + 1)
+    scale, plus = float(op.get("scale", 1.0)), float(op.get("plus", 0.0))
+
+    if fn in MAP_FNS:
+        x = blocks[0]
+        if x.shape != shape:
+            raise ValueError(f"{fn} needs an argument shaped like its target {shape}, got {x.shape}")
+        out = {"copy": lambda v: v, "relu": lambda v: np.maximum(v, 0), "softmax": _softmax_rows}[fn](x)
+        return out * scale + plus
+    if shape != (1, 1):
+        raise ValueError(f"{fn} writes a single cell; use one of {', '.join(MAP_FNS)} for a range")
+    if fn == "dot":
+        if len(blocks) != 2 or blocks[0].size != blocks[1].size:
+            raise ValueError("dot needs two arguments of the same length")
+        value = float(np.dot(blocks[0].ravel(), blocks[1].ravel()))
+    elif fn in REDUCE_FNS:
+        value = float(REDUCE_FNS[fn](np.concatenate([b.ravel() for b in blocks])))
+    else:
+        raise ValueError(f"unknown compute fn: {fn}")
+    return np.full(shape, value * scale + plus)
+
+
+def build_grid_trace(grid_ir: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    grid IR → grid trace. 모든 값은 여기서 계산한다.
+    행렬 / step이 너무 많거나, 없는 행렬·범위를 가리키거나, 빈 칸을 읽으면 ValueError.
+    """
+    grid_ir = expand_algorithm(grid_ir)
+    grid = _Grid(grid_ir.get("matrices") or [])
+    raw_steps = [s for s in grid_ir.get("steps") or [] if isinstance(s, dict)]
+    if not raw_steps:
+        raise ValueError("grid IR needs at least one step")
+    if len(raw_steps) > MAX_GRID_STEPS:
+        raise ValueError(f"too many steps for a grid scene ({len(raw_steps)} > {MAX_GRID_STEPS})")
+
+    steps: List[Dict[str, Any]] = []
+    for k, raw in enumerate(raw_steps):
+        highlights: List[List[int]] = []
+        writes: Dict[Tuple[int, int, int], Any] = {}
+        # 같은 step의 계산은 step 시작 시점 값을 읽는다 (쓰기는 step 끝에 한 번에 반영)
+        pending: List[Tuple[int, int, int, float]] = []
+        try:
+            for op in raw.get("ops") or []:
+                kind = op.get("op")
+                if kind == "highlight":
+                    highlights.append(list(grid.region(op)))
+                    continue
+                target = grid.region(op)
+                m, r0, c0, r1, c1 = target
+                if kind == "write":
+                    block = np.full((r1 - r0 + 1, c1 - c0 + 1), float(op["value"]))
+                elif kind == "compute":
+                    block = _compute(grid, op, target)
+                    highlights += [list(grid.region(a)) for a in op["args"]]
+                else:
+                    raise ValueError(f"unknown op: {kind}")
+                for (i, j), v in np.ndenumerate(block):
+                    pending.append((m, r0 + i, c0 + j, v))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"steps[{k}]: {e}")
+        for m, r, c, v in pending:
+            grid.values[m][r, c] = v
+            writes[(m, r, c)] = _number(v)
+        unique = []
+        for h in highlights:
+            if h not in unique:
+                unique.append(h)
+        steps.append({
+            "caption": _clip(raw.get("caption") or f"step {k + 1}", CAPTION_MAX),
+            "highlights": unique,
+            "writes": [[m, r, c, v] for (m, r, c), v in writes.items()],
+        })
+
+    def cells(arr: np.ndarray) -> List[List[Any]]:
+        return [[None if np.isnan(v) else _number(v) for v in row] for row in arr]
+
+    every = np.concatenate([v[~np.isnan(v)].ravel() for v in grid.values + grid.initial])
+    integral = bool(np.all(np.isclose(every, np.round(every))))
+    return {
+        "title": _clip(grid_ir.get("title") or "Grid", CAPTION_MAX),
+        "decimals": 0 if integral else FLOAT_DECIMALS,
+        "matrices": [
+            {**meta, "rows": arr.shape[0], "cols": arr.shape[1], "values": cells(arr)}
+            for meta, arr in zip(grid.meta, grid.initial)
+        ],
+        "steps": steps,
+    }
@@ -0,0 +1,259 @@
+# app/job_queue.py
+"""
+렌더 팜용 공유 작업 큐.
+
+API는 렌더 작업(renderer kind, IR, quality, 렌더러 인자)을 큐에 넣고,
+여러 호스트의 렌더 워커(app.render_worker)가 lease를 잡고 꺼내 간다.
+
+  queued ──claim──▶ running ──complete──▶ done
+     ▲                 │ ├──fail (재시도 남음)──┘ (다시 queued)
+     │                 │ └──fail / lease 만료 + 재시도 소진──▶ failed
+     └──lease 만료─────┘   (워커가 죽으면 heartbeat가 끊겨 lease가 만료됨)
+  queued / running ──cancel──▶ cancelled (워커는 다음 heartbeat에서 알아채고 manim 종료)
+
+백엔드는 RENDER_QUEUE_URL로 고른다. 지금은 sqlite:///경로 하나
+(공유 스토리지에 두면 여러 호스트가 같이 쓸 수 있음. NFS에서는 WAL이 안 되므로 rollback journal 사용).
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.tenants import BATCH, policy_for
+from app.tex_cache import SHARED_CACHE_ROOT
+
+RENDER_QUEUE_URL = os.getenv("RENDER_QUEUE_URL", f"sqlite:///{SHARED_CACHE_ROOT / 'render_queue.sqlite3'}")
+LEASE_S = float(os.getenv("RENDER_LEASE_S", "60"))
+MAX_ATTEMPTS = int(os.getenv("RENDER_MAX_ATTEMPTS", "3"))
+# 오래 기다린 작업의 우선순위를 올리는 비율 (scheduler.AGING_RATE와 같은 의미)
+QUEUE_AGING_RATE = float(os.getenv("RENDER_AGING_RATE", "1.0"))
+# claim 시 한 번에 살펴보는 후보 수 (테넌트 상한에 걸린 작업을 건너뛰기 위함)
+CLAIM_SCAN = 64
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS render_jobs (
+    id            TEXT PRIMARY KEY,
+    kind          TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    tenant        TEXT NOT NULL,
+    batch         INTEGER NOT NULL DEFAULT 0,
+    cost_s        REAL NOT NULL DEFAULT 0,
+    state         TEXT NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    created_at    REAL NOT NULL,
+    started_at    REAL,
+    finished_at   REAL,
+    result        TEXT,
+    error         TEXT
+);
+CREATE INDEX IF NOT EXISTS render_jobs_state ON render_jobs (state, batch, created_at);
+"""
+
+
+@dataclass
+class QueuedJob:
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    tenant: str
+    state: str
+    attempts: int
+    cost_s: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "QueuedJob":
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            tenant=row["tenant"],
+            state=row["state"],
+            attempts=row["attempts"],
+            cost_s=row["cost_s"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "tenant": self.tenant,
+            "state": self.state,
+            "attempts": self.attempts,
+            "cost_s": round(self.cost_s, 2),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class SQLiteJobStore:
+    """SQLite 파일 하나를 큐로 쓰는 백엔드. 상태 변경은 모두 BEGIN IMMEDIATE 트랜잭션."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        # executescript는 자체적으로 커밋하므로 트랜잭션 밖에서
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    class _Tx:
+        def __init__(self, conn: sqlite3.Connection):
+            self.conn = conn
+
+        def __enter__(self) -> sqlite3.Connection:
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb) -> None:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def _tx(self) -> "SQLiteJobStore._Tx":
+        return self._Tx(self._conn())
+
+    # --- API 쪽 ---
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        tenant: str,
+        cost_s: float = 0.0,
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        with self._tx() as db:
+            db.execute(
+                "INSERT INTO render_jobs (id, kind, payload, tenant, batch, cost_s, state, max_attempts, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), tenant, int(policy_for(tenant).klass == BATCH),
+                 cost_s, QUEUED, max_attempts, time.time()),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[QueuedJob]:
+        row = self._conn().execute("SELECT * FROM render_jobs WHERE id = ?", (job_id,)).fetchone()
+        return QueuedJob.from_row(row) if row else None
+
+    def cancel(self, job_id: str) -> bool:
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE render_jobs SET state = ?, finished_at = ? WHERE id = ? AND state IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            )
+            return cur.rowcount > 0
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT state, COUNT(*) AS n FROM render_jobs GROUP BY state").fetchall()
+        return {r["state"]: r["n"] for r in rows}
+
+    # --- 워커 쪽 ---
+    def claim(self, worker_id: str, kinds: Optional[Sequence[str]] = None, lease_s: float = LEASE_S) -> Optional[QueuedJob]:
+        """
+        실행할 작업 하나를 lease와 함께 가져간다. 없으면 None.
+        순서: interactive 먼저 → (예상 비용 − aging × 대기 시간)이 작은 것 먼저.
+        테넌트별 동시 렌더 상한(policy.max_renders)은 팜 전체 기준으로 지킨다.
+        """
+        now = time.time()
+        with self._tx() as db:
+            self._expire_leases(db, now)
+            params: List[Any] = [QUEUED]
+            kind_filter = ""
+            if kinds:
+                kind_filter = f" AND kind IN ({','.join('?' * len(kinds))})"
+                params += list(kinds)
+            rows = db.execute(
+                f"SELECT * FROM render_jobs WHERE state = ?{kind_filter}"
+                f" ORDER BY batch, cost_s - ? * (? - created_at), created_at LIMIT {CLAIM_SCAN}",
+                params + [QUEUE_AGING_RATE, now],
+            ).fetchall()
+            running = {
+                r["tenant"]: r["n"]
+                for r in db.execute(
+                    "SELECT tenant, COUNT(*) AS n FROM render_jobs WHERE state = ? GROUP BY tenant", (RUNNING,)
+                )
+            }
+            for row in rows:
+                if running.get(row["tenant"], 0) >= policy_for(row["tenant"]).max_renders:
+                    continue
+                db.execute(
+                    "UPDATE render_jobs SET state = ?, attempts = attempts + 1, lease_owner = ?,"
+                    " lease_expires = ?, started_at = ? WHERE id = ?",
+                    (RUNNING, worker_id, now + lease_s, now, row["id"]),
+                )
+                return self.get(row["id"])
+        return None
+
+    def _expire_leases(self, db: sqlite3.Connection, now: float) -> None:
+        """heartbeat가 끊긴(워커가 죽은) 작업: 재시도 남았으면 다시 queued, 아니면 failed."""
+        db.execute(
+            "UPDATE render_jobs SET state = ?, error = 'lease expired (worker lost)', finished_at = ?"
+            " WHERE state = ? AND lease_expires < ? AND attempts >= max_attempts",
+            (FAILED, now, RUNNING, now),
+        )
+        db.execute(
+            "UPDATE render_jobs SET state = ?, lease_owner = NULL, lease_expires = NULL"
+            " WHERE state = ? AND lease_expires < ?",
+            (QUEUED, RUNNING, now),
+        )
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_s: float = LEASE_S) -> bool:
+        """lease 연장. 작업을 잃었으면(취소 / lease 만료 후 다른 워커가 가져감) False."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE render_jobs SET lease_expires = ? WHERE id = ? AND state = ? AND lease_owner = ?",
+                (time.time() + lease_s, job_id, RUNNING, worker_id),
+            )
+            return cur.rowcount > 0
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE render_jobs SET state = ?, result = ?, finished_at = ?, lease_expires = NULL"
+                " WHERE id = ? AND state = ? AND lease_owner = ?",
+                (DONE, json.dumps(result), time.time(), job_id, RUNNING, worker_id),
+            )
+            return cur.rowcount > 0
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True) -> None:
+        """실패 기록. retry이고 시도 횟수가 남았으면 다시 queued."""
+        with self._tx() as db:
+            db.execute(
+                "UPDATE render_jobs SET"
+                " state = CASE WHEN ? AND attempts < max_attempts THEN ? ELSE ? END,"
+                " error = ?, lease_owner = NULL, lease_expires = NULL,"
+                " finished_at = CASE WHEN ? AND attempts < max_attempts THEN NULL ELSE ? END"
+                " WHERE id = ? AND state = ? AND lease_owner = ?",
+                (int(retry), QUEUED, FAILED, error, int(retry), time.time(), job_id, RUNNING, worker_id),
+            )
+
+
+def open_job_store(url: str = RENDER_QUEUE_URL) -> SQLiteJobStore:
+    """RENDER_QUEUE_URL → 백엔드. 다른 백엔드는 같은 메서드를 구현해서 여기 추가."""
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(Path(url[len("sqlite:///"):]))
+    raise ValueError(f"unsupported render queue backend: {url}")
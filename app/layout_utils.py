@@ -1,6 +1,9 @@
 from manim import *
 from typing import List, Tuple, Dict, Optional
 
+from app.graph_layout import fit_to_frame, force_layout, graph_layout, layered_layout, remove_overlaps
+from app.tex_cache import COMPOSE_NUMBERS
+
 # === 1. 기본 색상 / 스타일 프리셋 ===
 
 NODE_FILL_COLOR = BLUE_E
@@ -20,6 +23,96 @@ V_GAP = 0.8  # 세로 간격
 
 # === 2. 노드 생성 유틸 ===
 
+# Text는 생성할 때마다 Pango 레이아웃 + SVG 파싱을 거치므로,
+# (텍스트, 크기, 색, 모양) 별로 원본 하나만 만들고 .copy()를 돌려준다.
+_MOBJECT_CACHE: Dict[tuple, Mobject] = {}
+MOBJECT_CACHE_MAX = 4096
+MOBJECT_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def _ckey(color) -> str:
+    return str(ManimColor(color)) if color is not None else "none"
+
+
+def _cached(key: tuple, build) -> Mobject:
+    proto = _MOBJECT_CACHE.get(key)
+    if proto is None:
+        MOBJECT_CACHE_STATS["misses"] += 1
+        proto = build()
+        if len(_MOBJECT_CACHE) < MOBJECT_CACHE_MAX:
+            _MOBJECT_CACHE[key] = proto
+    else:
+        MOBJECT_CACHE_STATS["hits"] += 1
+    return proto.copy()
+
+
+def cached_text(text: str, font_size: int = 24, color=NODE_TEXT_COLOR) -> Text:
+    """Text(text, font_size, color)의 캐시 버전. 원점에 놓인 복사본을 돌려준다."""
+    key = ("text", text, font_size, _ckey(color))
+    return _cached(key, lambda: Text(text, font_size=font_size, color=color))
+
+
+def create_number(value, decimals: int = 0, scale: float = 0.45, color=WHITE) -> VMobject:
+    """숫자 mobject. MathTex(str(value)).scale(scale).set_color(color) 대체.
+
+    COMPOSE_NUMBERS 이면 값마다 LaTeX를 돌리지 않고 숫자 글리프(0-9, '-', '.')를
+    조합하는 DecimalNumber를 쓴다. 글리프는 공유 Tex 캐시에 한 번만 컴파일된다.
+    """
+    text = f"{value:.{decimals}f}" if decimals else str(int(round(value)))
+    key = ("number", text, scale, _ckey(color), COMPOSE_NUMBERS)
+
+    def build():
+        if COMPOSE_NUMBERS:
+            mob = DecimalNumber(float(text), num_decimal_places=decimals)
+        else:
+            mob = MathTex(text)
+        return mob.scale(scale).set_color(color)
+
+    return _cached(key, build)
+
+
+def mobject_cache_stats() -> Dict[str, float]:
+    """캐시 hit / miss / hit_rate / 원본 개수."""
+    hits = MOBJECT_CACHE_STATS["hits"]
+    misses = MOBJECT_CACHE_STATS["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+        "size": len(_MOBJECT_CACHE),
+    }
+
+
+class MarkerPool:
+    """하이라이트 / 마커용 Circle 재사용 풀.
+
+    비교할 때마다 새 Circle을 만들지 않고, 다 쓴 마커를 release()로 돌려놓았다가
+    같은 모양이 필요할 때 다시 꺼내 쓴다.
+    """
+
+    def __init__(self):
+        self._free: Dict[tuple, List[Circle]] = {}
+        self.created = 0
+        self.reused = 0
+
+    def acquire_circle(self, radius: float, color=HIGHLIGHT_COLOR, stroke_width: float = 3) -> Circle:
+        key = (round(radius, 4), _ckey(color), stroke_width)
+        free = self._free.get(key)
+        if free:
+            self.reused += 1
+            return free.pop()
+        self.created += 1
+        marker = Circle(radius=radius, color=color, stroke_width=stroke_width)
+        marker._pool_key = key
+        return marker
+
+    def release(self, *markers: Circle) -> None:
+        for m in markers:
+            key = getattr(m, "_pool_key", None)
+            if key is not None:
+                self._free.setdefault(key, []).append(m)
+
 def create_box_node(
     text: str,
     width: float = DEFAULT_NODE_WIDTH,
@@ -29,17 +122,21 @@ def create_box_node(
     text_color = NODE_TEXT_COLOR,
     font_size: int = 24,
 ) -> VGroup:
-    """텍스트가 들어간 직사각형 노드 하나 생성."""
-    box = Rectangle(
-        width=width,
-        height=height,
-        stroke_color=stroke_color,
-        fill_color=fill_color,
-        fill_opacity=0.3,
-    )
-    label = Text(text, font_size=font_size, color=text_color)
-    label.move_to(box.get_center())
-    return VGroup(box, label)
+    """텍스트가 들어간 직사각형 노드 하나 생성 (같은 인자면 캐시된 원본의 복사본)."""
+    def build():
+        box = Rectangle(
+            width=width,
+            height=height,
+            stroke_color=stroke_color,
+            fill_color=fill_color,
+            fill_opacity=0.3,
+        )
+        label = cached_text(text, font_size=font_size, color=text_color)
+        label.move_to(box.get_center())
+        return VGroup(box, label)
+
+    key = ("box", text, width, height, _ckey(fill_color), _ckey(stroke_color), _ckey(text_color), font_size)
+    return _cached(key, build)
 
 
 def create_circle_node(
@@ -50,16 +147,20 @@ def create_circle_node(
     text_color = NODE_TEXT_COLOR,
     font_size: int = 24,
 ) -> VGroup:
-    """텍스트가 들어간 원형 노드 하나 생성."""
-    circ = Circle(
-        radius=radius,
-        stroke_color=stroke_color,
-        fill_color=fill_color,
-        fill_opacity=0.3,
-    )
-    label = Text(text, font_size=font_size, color=text_color)
-    label.move_to(circ.get_center())
-    return VGroup(circ, label)
+    """텍스트가 들어간 원형 노드 하나 생성 (같은 인자면 캐시된 원본의 복사본)."""
+    def build():
+        circ = Circle(
+            radius=radius,
+            stroke_color=stroke_color,
+            fill_color=fill_color,
+            fill_opacity=0.3,
+        )
+        label = cached_text(text, font_size=font_size, color=text_color)
+        label.move_to(circ.get_center())
+        return VGroup(circ, label)
+
+    key = ("circle", text, radius, _ckey(fill_color), _ckey(stroke_color), _ckey(text_color), font_size)
+    return _cached(key, build)
 
 
 # === 3. 레이아웃 배치 유틸 ===
@@ -95,6 +196,31 @@ def layout_grid(
     return group
 
 
+def layout_graph(
+    nodes: List[Mobject],
+    edges: List[Tuple[int, int]],
+    method: str = "auto",
+    direction: str = "LR",
+    center: np.ndarray = ORIGIN,
+    max_width: float = 12.0,
+    max_height: float = 6.5,
+) -> VGroup:
+    """노드 리스트를 간선(인덱스 쌍) 기준으로 자동 배치.
+
+    - method: "auto"(DAG면 계층, 아니면 힘 기반) / "layered" / "force" (app.graph_layout)
+    - 노드 실제 width / height로 겹침을 피하고, 그래도 넘치면 autorescale_group.
+    """
+    sizes = [(m.width, m.height) for m in nodes]
+    pos = graph_layout(len(nodes), edges, sizes, method=method, direction=direction,
+                       width=max_width, height=max_height)
+    for node, p in zip(nodes, pos):
+        node.move_to(p)
+    group = VGroup(*nodes)
+    autorescale_group(group, max_width=max_width, max_height=max_height)
+    group.move_to(center)
+    return group
+
+
 # === 4. Transformer 전용 레이아웃 템플릿 ===
 
 TRANSFORMER_LAYOUT_TEMPLATE: Dict[str, Dict] = {
@@ -200,6 +326,10 @@ def connect_nodes(src: VGroup, dst: VGroup, buff: float = 0.2, color=GRAY) -> Ar
     """두 노드 중심을 기준으로 오른쪽→왼쪽 또는 아래→위 방향 화살표 생성."""
     start = src.get_right()
     end = dst.get_left()
+    # 자동 배치(layout_graph)에서는 dst가 왼쪽에 올 수도 있다
+    if dst.get_center()[0] < src.get_center()[0]:
+        start = src.get_left()
+        end = dst.get_right()
 
     # 세로 방향 차이가 더 크면 위/아래 연결로 간주
     if abs(start[1] - end[1]) > abs(start[0] - end[0]):
@@ -222,7 +352,247 @@ def fanout_arrows(src: VGroup, dst_list: List[VGroup], color=GRAY, buff: float =
     return VGroup(*arrows)
 
 
-# === 8. Scene 헬퍼 믹스인 (선택적으로 상속해서 사용) ===
+# 간선 묶음에서 굵기 / 투명도를 나누는 단계 수 (슬롯 = EDGE_LEVELS^2 개의 VMobject)
+EDGE_LEVELS = 6
+
+
+def _edge_points(starts: np.ndarray, ends: np.ndarray, buff: float = 0.0) -> np.ndarray:
+    """간선 n개 → 직선 cubic bezier 점 (4n, 3). buff만큼 양 끝을 잘라낸다."""
+    d = ends - starts
+    if buff > 0 and len(d):
+        length = np.linalg.norm(d, axis=1, keepdims=True)
+        cut = np.minimum(buff, length / 2) / np.maximum(length, 1e-9)
+        starts, ends = starts + d * cut, ends - d * cut
+        d = ends - starts
+    return np.stack([starts, starts + d / 3, starts + 2 * d / 3, ends], axis=1).reshape(-1, 3)
+
+
+def _edge_levels(values: np.ndarray, levels: int) -> np.ndarray:
+    lo, hi = (values.min(), values.max()) if len(values) else (0.0, 0.0)
+    if hi - lo < 1e-9:
+        return np.zeros(len(values), dtype=int)
+    return np.rint((values - lo) / (hi - lo) * (levels - 1)).astype(int)
+
+
+class EdgeBundle(VGroup):
+    """간선 여러 개를 VMobject 몇 개에 몰아 담은 묶음 (dense 연결 / attention fan 용).
+
+    - 간선마다 Line을 만들지 않고, 굵기 / 투명도를 EDGE_LEVELS 단계로 나눈 슬롯 VMobject에
+      직선 bezier를 subpath로 이어 붙인다 → 간선 수천 개도 stroke 호출은 최대 EDGE_LEVELS^2 번.
+    - widths / opacities는 간선별 배열 (스칼라면 전체 공통). set_edge_weights로 바꾼다.
+    - 등장은 GrowEdges(모든 간선이 동시에 뻗음), 가중치 변화는 ReweightEdges.
+      shift / scale 등 일반 변환은 그대로 쓸 수 있다 (좌표는 슬롯 점에서 다시 읽음).
+    """
+
+    def __init__(
+        self,
+        starts,
+        ends,
+        widths=2.0,
+        opacities=1.0,
+        color=GRAY,
+        buff: float = 0.0,
+        levels: int = EDGE_LEVELS,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        starts = np.array(starts, dtype=float).reshape(-1, 3)
+        ends = np.array(ends, dtype=float).reshape(-1, 3)
+        n = len(starts)
+        self.levels = levels
+        self.edge_color = color
+        self.widths = np.broadcast_to(np.asarray(widths, dtype=float), (n,)).copy()
+        self.opacities = np.broadcast_to(np.asarray(opacities, dtype=float), (n,)).copy()
+        self.slot_edges = [np.zeros(0, dtype=int) for _ in range(levels * levels)]
+        self.add(*[VMobject(stroke_color=color) for _ in range(levels * levels)])
+        # 처음 한 번만 buff 적용해서 슬롯에 넣어 둔다
+        self.submobjects[0].set_points(_edge_points(starts, ends, buff))
+        self.slot_edges[0] = np.arange(n)
+        self.refresh_edges()
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.widths)
+
+    def edge_endpoints(self) -> Tuple[np.ndarray, np.ndarray]:
+        """현재 슬롯 점에서 간선별 (시작점, 끝점)을 읽는다."""
+        n = len(self.widths)
+        starts, ends = np.zeros((n, 3)), np.zeros((n, 3))
+        for slot, idx in zip(self.submobjects, self.slot_edges):
+            if len(idx) and len(slot.points) == 4 * len(idx):
+                pts = slot.points.reshape(-1, 4, 3)
+                starts[idx], ends[idx] = pts[:, 0], pts[:, 3]
+        return starts, ends
+
+    def refresh_edges(self) -> "EdgeBundle":
+        """widths / opacities 배열에 맞게 간선을 슬롯에 다시 나눠 담는다."""
+        starts, ends = self.edge_endpoints()
+        key = _edge_levels(self.widths, self.levels) * self.levels + _edge_levels(self.opacities, self.levels)
+        for k, slot in enumerate(self.submobjects):
+            idx = np.nonzero(key == k)[0]
+            self.slot_edges[k] = idx
+            slot.set_points(_edge_points(starts[idx], ends[idx]))
+            if len(idx):
+                slot.set_stroke(
+                    self.edge_color,
+                    width=float(self.widths[idx].mean()),
+                    opacity=float(np.clip(self.opacities[idx].mean(), 0.0, 1.0)),
+                )
+        return self
+
+    def set_edge_weights(self, widths=None, opacities=None) -> "EdgeBundle":
+        n = len(self.widths)
+        if widths is not None:
+            self.widths = np.broadcast_to(np.asarray(widths, dtype=float), (n,)).copy()
+        if opacities is not None:
+            self.opacities = np.broadcast_to(np.asarray(opacities, dtype=float), (n,)).copy()
+        return self.refresh_edges()
+
+
+def bundle_edges(
+    src_list: List[Mobject],
+    dst_list: List[Mobject],
+    pairs: Optional[List[Tuple[int, int]]] = None,
+    widths=2.0,
+    opacities=1.0,
+    color=GRAY,
+    buff: float = 0.1,
+) -> EdgeBundle:
+    """src_list[i] 오른쪽 → dst_list[j] 왼쪽 간선 묶음. pairs가 없으면 모든 (i, j) (완전 연결)."""
+    if pairs is None:
+        pairs = [(i, j) for i in range(len(src_list)) for j in range(len(dst_list))]
+    starts = [src_list[i].get_right() for i, _ in pairs]
+    ends = [dst_list[j].get_left() for _, j in pairs]
+    return EdgeBundle(starts, ends, widths=widths, opacities=opacities, color=color, buff=buff)
+
+
+class GrowEdges(Animation):
+    """EdgeBundle의 모든 간선을 시작점에서 동시에 뻗어 나가게 (간선마다 Create 대신 한 번에)."""
+
+    def __init__(self, bundle: EdgeBundle, **kwargs):
+        super().__init__(bundle, introducer=True, **kwargs)
+
+    def begin(self) -> None:
+        self.full_points = [slot.points.copy() for slot in self.mobject.submobjects]
+        super().begin()
+
+    def interpolate_mobject(self, alpha: float) -> None:
+        a = self.rate_func(alpha)
+        for slot, pts in zip(self.mobject.submobjects, self.full_points):
+            if len(pts):
+                p = pts.reshape(-1, 4, 3)
+                slot.points = (p[:, :1] + (p - p[:, :1]) * a).reshape(-1, 3)
+
+
+class ReweightEdges(Animation):
+    """EdgeBundle의 간선별 굵기 / 투명도를 목표 값으로 보간 (매 프레임 슬롯만 다시 나눔)."""
+
+    def __init__(self, bundle: EdgeBundle, widths=None, opacities=None, **kwargs):
+        self.target_widths, self.target_opacities = widths, opacities
+        super().__init__(bundle, **kwargs)
+
+    def begin(self) -> None:
+        bundle, n = self.mobject, self.mobject.edge_count
+        self.from_widths, self.from_opacities = bundle.widths.copy(), bundle.opacities.copy()
+        self.to_widths = self.from_widths if self.target_widths is None else np.broadcast_to(
+            np.asarray(self.target_widths, dtype=float), (n,)).copy()
+        self.to_opacities = self.from_opacities if self.target_opacities is None else np.broadcast_to(
+            np.asarray(self.target_opacities, dtype=float), (n,)).copy()
+        super().begin()
+
+    def interpolate_mobject(self, alpha: float) -> None:
+        a = self.rate_func(alpha)
+        self.mobject.set_edge_weights(
+            self.from_widths + (self.to_widths - self.from_widths) * a,
+            self.from_opacities + (self.to_opacities - self.from_opacities) * a,
+        )
+
+
+# === 8. 대형 행렬용 히트맵 (ImageMobject) ===
+
+HEATMAP_COLORS = (BLACK, WHITE)
+DIVERGING_COLORS = (RED_E, BLACK, BLUE_D)
+
+
+def create_heatmap(
+    values,
+    cell_size: float = 0.1,
+    colors=HEATMAP_COLORS,
+    vmin: Optional[float] = None,
+    vmax: Optional[float] = None,
+) -> ImageMobject:
+    """2D(또는 1D) 값 배열 → 픽셀 하나가 셀 하나인 이미지 mobject.
+
+    - 셀마다 Square/Text를 만들지 않으므로 셀 수와 무관하게 mobject 1개.
+    - colors: 값 범위 [vmin, vmax]에 균등 배치되는 색 stop 목록.
+    """
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim == 1:
+        arr = arr[None, :]
+    lo = float(arr.min()) if vmin is None else vmin
+    hi = float(arr.max()) if vmax is None else vmax
+
+    t = np.clip((arr - lo) / (hi - lo), 0.0, 1.0) if hi > lo else np.zeros_like(arr)
+    stops = np.array([ManimColor(c).to_rgb() for c in colors])
+    pos = t * (len(stops) - 1)
+    idx = np.clip(np.floor(pos).astype(int), 0, len(stops) - 2)
+    frac = (pos - idx)[..., None]
+    rgb = stops[idx] * (1 - frac) + stops[idx + 1] * frac
+
+    img = ImageMobject((rgb * 255).astype(np.uint8))
+    img.set_resampling_algorithm(RESAMPLING_ALGORITHMS["nearest"])
+    img.scale_to_fit_width(arr.shape[1] * cell_size)
+    return img
+
+
+def heatmap_cell_center(heatmap: Mobject, rows: int, cols: int, r: int, c: int) -> np.ndarray:
+    """히트맵의 (r, c) 셀 중심 좌표."""
+    cell_w = heatmap.width / cols
+    cell_h = heatmap.height / rows
+    return heatmap.get_corner(UL) + RIGHT * (c + 0.5) * cell_w + DOWN * (r + 0.5) * cell_h
+
+
+def heatmap_region(
+    heatmap: Mobject,
+    rows: int,
+    cols: int,
+    r0: int,
+    c0: int,
+    h: int,
+    w: int,
+    **kwargs,
+) -> Rectangle:
+    """히트맵의 (r0, c0)부터 h x w 셀을 덮는 사각형 (커널 / 풀링 창 표시용)."""
+    cell_w = heatmap.width / cols
+    cell_h = heatmap.height / rows
+    rect = Rectangle(width=w * cell_w, height=h * cell_h, **kwargs)
+    rect.move_to(
+        heatmap.get_corner(UL) + RIGHT * (c0 + w / 2) * cell_w + DOWN * (r0 + h / 2) * cell_h
+    )
+    return rect
+
+
+# === 9. Scene 헬퍼 믹스인 (선택적으로 상속해서 사용) ===
+
+class SectionMixin:
+    """섹션 단위 렌더용 믹스인 (app.sections 참고).
+
+    render_sections가 None이면 모든 섹션을 렌더. 리스트면 그 섹션들만 프레임을 만들고,
+    나머지 섹션은 skip_animations로 상태만 진행시킨다.
+    """
+
+    render_sections: Optional[List[str]] = None
+
+    def begin_section(self, name: str) -> None:
+        selected = self.render_sections
+        seen = self.__dict__.setdefault("_sections_seen", [])
+        if selected is not None and selected and all(s in seen for s in selected):
+            # 대상 섹션을 모두 끝냄 → 뒤는 렌더할 필요 없음
+            from manim.utils.exceptions import EndSceneEarlyException
+            raise EndSceneEarlyException()
+        seen.append(name)
+        self.next_section(name, skip_animations=selected is not None and name not in selected)
+
 
 class LayoutMixin:
     """공통 레이아웃 유틸을 Scene과 함께 쓰기 위한 믹스인."""
@@ -1,11 +1,14 @@
 # app/llm.py
 import os, json
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 from openai import OpenAI
 from app.schema import schema_errors, invariants_errors, validate_attention_ir  # 검증은 기존 함수 재사용:contentReference[oaicite:2]{index=2}
 from app.prompts import DOMAIN_PROMPTS
 from app.patterns import PatternType
+from app.cancel import llm_timeout
+from app.scheduler import llm_slot
+from app.toy_transformer import build_attention_ir
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -32,14 +35,16 @@ TEXT:
 {user_text}
 """.strip()
 
-def call_llm_stage1(user_text: str) -> Dict[str, Any]:
+def call_llm_stage1(user_text: str, token=None) -> Dict[str, Any]:
     prompt = build_prompt_stage1(user_text)
-    resp = client.chat.completions.create(
-        model="gpt-5",  
-        response_format={"type": "json_object"},
-        messages=[{"role": "system", "content": STAGE1_SYSTEM},
-                  {"role": "user", "content": prompt}],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-5",  
+            response_format={"type": "json_object"},
+            messages=[{"role": "system", "content": STAGE1_SYSTEM},
+                      {"role": "user", "content": prompt}],
+            **llm_timeout(token),
+        )
     return json.loads(resp.choices[0].message.content)
 
 # ---------- Stage 2: trace → IR ----------
@@ -64,15 +69,17 @@ TRACE JSON:
 """
 
 
-def call_llm_stage2(explain_json: Dict[str, Any], temperature: float = 0.0) -> Dict[str, Any]:
+def call_llm_stage2(explain_json: Dict[str, Any], temperature: float = 0.0, token=None) -> Dict[str, Any]:
     prompt = build_prompt_stage2(explain_json)
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        temperature=temperature,
-        response_format={"type": "json_object"},
-        messages=[{"role": "system", "content": STAGE2_SYSTEM},
-                  {"role": "user", "content": prompt}],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            temperature=temperature,
+            response_format={"type": "json_object"},
+            messages=[{"role": "system", "content": STAGE2_SYSTEM},
+                      {"role": "user", "content": prompt}],
+            **llm_timeout(token),
+        )
     return json.loads(resp.choices[0].message.content)
 
 # ---------- Validation wrapper ----------
@@ -114,7 +121,7 @@ def generate_ir_with_validation(user_text: str, max_retries_zero_temp: int = 2)
     return doc
 
 # ---------- Domain-level IR Generator ----------
-def call_llm_domain_ir(domain: str, user_text: str, temperature: float = 0.0) -> Dict[str, Any]:
+def call_llm_domain_ir(domain: str, user_text: str, temperature: float = 0.0, token=None) -> Dict[str, Any]:
     if domain not in DOMAIN_PROMPTS:
         raise ValueError(f"Unknown domain: {domain}")
 
@@ -140,15 +147,17 @@ def call_llm_domain_ir(domain: str, user_text: str, temperature: float = 0.0) ->
 
     final_prompt = base_prompt + "\n\n" + universal_rules
 
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": prompt_cfg["system"]},
-            {"role": "user", "content": final_prompt},
-        ],
-        temperature=temperature,
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": prompt_cfg["system"]},
+                {"role": "user", "content": final_prompt},
+            ],
+            temperature=temperature,
+            **llm_timeout(token),
+        )
 
     print("\n=== 🧠 LLM RAW OUTPUT ===")
     print(resp.choices[0].message.content)
@@ -157,11 +166,26 @@ def call_llm_domain_ir(domain: str, user_text: str, temperature: float = 0.0) ->
     return json.loads(resp.choices[0].message.content)
 
 
-def call_llm_attention_ir(user_text: str) -> dict:
-    # 도메인은 pattern과 1:1로 맞춘다
-    raw = call_llm_domain_ir("seq_attention", user_text)
-    # raw가 바로 attn_ir라고 가정 
-    attn_ir = raw
+def call_llm_attention_ir(user_text: str, token=None, local: bool = True, num_heads: Optional[int] = None) -> dict:
+    """
+    num_heads: None이면 LLM이 요청에서 뽑은 head 수 (언급이 없으면 1).
+    head 수가 잘못됐거나 IR 검증에 실패하면 ValueError.
+    """
+    if local:
+        # LLM은 문장 / head 수 추출만, weights / next_token은 로컬 NumPy 토이 transformer로 계산
+        raw = call_llm_domain_ir("seq_attention_sentence", user_text, token=token)
+        raw_text = (raw.get("raw_text") or user_text).strip()
+        if num_heads is None:
+            try:
+                num_heads = int(raw.get("num_heads") or 1)
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid num_heads: {raw.get('num_heads')!r}")
+        attn_ir = build_attention_ir(raw_text, num_heads=num_heads)
+    else:
+        # 도메인은 pattern과 1:1로 맞춘다
+        raw = call_llm_domain_ir("seq_attention", user_text, token=token)
+        # raw가 바로 attn_ir라고 가정 
+        attn_ir = raw
 
     errors = validate_attention_ir(attn_ir)
     if errors:
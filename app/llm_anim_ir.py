@@ -2,6 +2,8 @@
 import os, json
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.cancel import llm_timeout
+from app.scheduler import llm_slot
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -32,16 +34,18 @@ Convert the following pseudocode into a structured animation plan JSON:
 {json.dumps(pseudocode_json, ensure_ascii=False, indent=2)}
 """
 
-def call_llm_anim_ir(pseudocode_json: dict):
+def call_llm_anim_ir(pseudocode_json: dict, token=None):
     prompt = build_prompt_anim_ir(pseudocode_json)
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            **llm_timeout(token),
+        )
     return json.loads(resp.choices[0].message.content)
 
 
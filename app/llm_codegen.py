@@ -2,6 +2,8 @@
 import os, json
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.cancel import llm_timeout
+from app.scheduler import llm_slot
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -67,15 +69,17 @@ Output:
 
 
 
-def call_llm_codegen(anim_ir: dict):
+def call_llm_codegen(anim_ir: dict, token=None):
     prompt = build_prompt_codegen(anim_ir)
-    resp = client.chat.completions.create(
-        model="gpt-5",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-5",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            **llm_timeout(token),
+        )
     code = resp.choices[0].message.content
 
     code = code.replace("```python", "").replace("```", "").strip()
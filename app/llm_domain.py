@@ -3,6 +3,8 @@ import os, json
 from openai import OpenAI
 from dotenv import load_dotenv
 from app.llm import call_llm_domain_ir
+from app.cancel import llm_timeout
+from app.scheduler import llm_slot
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
@@ -17,6 +19,7 @@ Allowed domains:
 - "sorting"
 - "transformer"
 - "cache"
+- "table"
 - "math"
 - "generic"
 
@@ -25,23 +28,26 @@ Classification rules:
 - If the text mentions sorting, array, bubble sort, selection sort, insertion sort, quicksort → "sorting"
 - If the text mentions Transformer, self-attention, Query/Key/Value, attention heads → "transformer"
 - If the text mentions cache, FIFO, LRU, queues, eviction → "cache"
+- If the text mentions dynamic programming tables, LCS, edit distance, knapsack, matrix multiplication → "table"
 - If the text mentions derivatives, integrals, probability, expectation, variance, matrices → "math"
 - Otherwise → "generic"
 
 Return ONLY JSON. No extra text, no comments.
 """
 
-def call_llm_detect_domain(user_text: str) -> str:
+def call_llm_detect_domain(user_text: str, token=None) -> str:
     """LLM이 사용자 입력을 보고 도메인만 분류하게 하는 전용 함수."""
     prompt = f'Text:\n"""\n{user_text}\n"""\n\nReturn JSON with the "domain" field only.'
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": DOMAIN_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": DOMAIN_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            **llm_timeout(token),
+        )
     data = json.loads(resp.choices[0].message.content)
     domain = data.get("domain", "generic")
     return domain
@@ -51,6 +57,8 @@ import os, json
 from openai import OpenAI
 from dotenv import load_dotenv
 from app.llm import call_llm_domain_ir
+from app.cancel import llm_timeout
+from app.scheduler import llm_slot
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
@@ -65,6 +73,7 @@ Allowed domains:
 - "sorting"
 - "transformer"
 - "cache"
+- "table"
 - "math"
 - "generic"
 
@@ -73,30 +82,33 @@ Classification rules:
 - If the text mentions sorting, array, bubble sort, selection sort, insertion sort, quicksort → "sorting"
 - If the text mentions Transformer, self-attention, Query/Key/Value, attention heads → "transformer"
 - If the text mentions cache, FIFO, LRU, queues, eviction → "cache"
+- If the text mentions dynamic programming tables, LCS, edit distance, knapsack, matrix multiplication → "table"
 - If the text mentions derivatives, integrals, probability, expectation, variance, matrices → "math"
 - Otherwise → "generic"
 
 Return ONLY JSON. No extra text, no comments.
 """
 
-def call_llm_detect_domain(user_text: str) -> str:
+def call_llm_detect_domain(user_text: str, token=None) -> str:
     """LLM이 사용자 입력을 보고 도메인만 분류하게 하는 전용 함수."""
     prompt = f'Text:\n"""\n{user_text}\n"""\n\nReturn JSON with the "domain" field only.'
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": DOMAIN_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": DOMAIN_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            **llm_timeout(token),
+        )
     data = json.loads(resp.choices[0].message.content)
     domain = data.get("domain", "generic")
     return domain
 
-def build_sorting_trace_ir(user_text: str) -> dict:
+def build_sorting_trace_ir(user_text: str, token=None) -> dict:
     """
     정렬 trace는 도메인 템플릿 시스템(domain_ir)을 그대로 사용.
     (sorting_trace 템플릿은 prompts.py에 이미 존재함.)
     """
-    return call_llm_domain_ir("sorting_trace", user_text)
+    return call_llm_domain_ir("sorting_trace", user_text, token=token)
@@ -2,6 +2,8 @@
 import os, json
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.cancel import llm_timeout
+from app.scheduler import llm_slot
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -21,25 +23,29 @@ Return ONLY JSON: {"pattern": "<one_of_above>"}
 """
 
 
-def call_llm_pattern(user_text: str) -> str:
+def call_llm_pattern(user_text: str, token=None) -> str:
     """Ask the LLM to *recommend* a pattern."""
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": PATTERN_SYSTEM_PROMPT},
-            {
-                "role": "user",
-                "content": f"Text:\n'''{user_text}'''\nReturn only JSON.",
-            },
-        ],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": PATTERN_SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": f"Text:\n'''{user_text}'''\nReturn only JSON.",
+                },
+            ],
+            **llm_timeout(token),
+        )
     data = json.loads(resp.choices[0].message.content)
     return data.get("pattern", "flow")  # fallback to flow
 # app/llm_pattern.py
 import os, json
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.cancel import llm_timeout
+from app.scheduler import llm_slot
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -59,18 +65,20 @@ Return ONLY JSON: {"pattern": "<one_of_above>"}
 """
 
 
-def call_llm_pattern(user_text: str) -> str:
+def call_llm_pattern(user_text: str, token=None) -> str:
     """Ask the LLM to *recommend* a pattern."""
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": PATTERN_SYSTEM_PROMPT},
-            {
-                "role": "user",
-                "content": f"Text:\n'''{user_text}'''\nReturn only JSON.",
-            },
-        ],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": PATTERN_SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": f"Text:\n'''{user_text}'''\nReturn only JSON.",
+                },
+            ],
+            **llm_timeout(token),
+        )
     data = json.loads(resp.choices[0].message.content)
     return data.get("pattern", "flow")  # fallback to flow
@@ -2,6 +2,8 @@
 import os, json
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.cancel import llm_timeout
+from app.scheduler import llm_slot
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -73,20 +75,22 @@ Text to convert:
 Output JSON strictly matching the schema described above.
 """.strip()
 
-def call_llm_pseudocode_ir(user_text: str):
+def call_llm_pseudocode_ir(user_text: str, token=None):
     """
     자연어 설명을 도메인과 무관한 순수 pseudocode IR로 변환한다.
     이 단계에서는 domain을 붙이지 않는다.
     """
     prompt = build_prompt_pseudocode(user_text)
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT_PSEUDOCODE},
-            {"role": "user", "content": prompt},
-        ],
-    )
+    with llm_slot(token):
+        resp = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT_PSEUDOCODE},
+                {"role": "user", "content": prompt},
+            ],
+            **llm_timeout(token),
+        )
     result = json.loads(resp.choices[0].message.content)
 
     # metadata는 최소한 항상 존재하게만 해준다.
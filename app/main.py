@@ -1,121 +1,387 @@
 # app/main.py
 
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+from typing import List, Optional, Tuple
+
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from app.llm_pseudocode import call_llm_pseudocode_ir
-from app.llm import call_llm_domain_ir, call_llm_attention_ir
-from app.llm_domain import call_llm_detect_domain, build_sorting_trace_ir
+from app.llm_domain import call_llm_detect_domain
 
-from app.render_cnn_matrix import render_cnn_matrix
-from app.render_sorting import render_sorting
-from app.render_seq_attention import render_seq_attention
-
-from app.patterns import PatternType
-from app.schema import validate_attention_ir
 
 from app.llm_anim_ir import call_llm_anim_ir
 from app.llm_codegen import call_llm_codegen
+from app.graph_layout import tidy_anim_layout
+
+from app.cancel import CancelToken, RequestCancelled
+from app.media_store import STORE, MediaJob
+from app.encode import DERIVATIVES, choose_variant, encode_derivatives
+from app.cost import QUALITY_FACTOR, Admission, CostEstimate, admit
+from app.job_queue import CANCELLED, DONE, FAILED, open_job_store
+from app.render_jobs import render_and_observe
+from app.renderers import WARMUP_ON_STARTUP, PrepareError, lookup, run_warmups
+from app.scheduler import RENDER_SCHEDULER
+from app.tenants import DEFAULT_TENANT, RATE_LIMITER, resolve_tenant
+from app.storyboard import STORYBOARD_FORMATS, cairosvg, write_storyboard
+from app.video_delivery import video_response
 
-import tempfile
-import subprocess
+# 요청 하나가 쓸 수 있는 최대 시간 (LLM 호출 + 렌더 전체)
+GENERATE_DEADLINE_S = float(os.getenv("GENERATE_DEADLINE_S", "600"))
+# 클라이언트 연결 끊김 확인 주기
+DISCONNECT_POLL_S = 0.5
+# local: API 프로세스가 직접 렌더 / farm: 공유 큐(app.job_queue)에 넣고 렌더 워커가 처리
+RENDER_MODE = os.getenv("RENDER_MODE", "local")
+FARM_POLL_S = 0.5
 
 
 class GenerateRequest(BaseModel):
     text: str
+    deadline_s: Optional[float] = None
+    # 마스터 렌더에서 추가로 만들 파생 포맷 (webm / gif / poster / mobile)
+    formats: List[str] = []
+    # 클라이언트가 재생할 수 있는 variant. 이 중 가장 작은 파일을 preferred로 알려준다
+    accept: Optional[List[str]] = None
+    # manim 품질 (l / m / h / p / k). 예산을 넘으면 낮춰서 렌더될 수 있다
+    quality: str = "l"
+    # 호출자(강의 등) 키. 없으면 X-Tenant 헤더, 그것도 없으면 default
+    tenant: Optional[str] = None
+    # "svg" / "png": 렌더 전에 정지 키프레임(app.storyboard)도 만든다
+    storyboard: Optional[str] = None
+    # False면 영상은 렌더하지 않는다 (storyboard / IR만 확인)
+    video: bool = True
 
 
 app = FastAPI()
 
 
-@app.post("/generate")
-async def generate_visualization(req: GenerateRequest):
-    user_text = req.text
+@app.on_event("startup")
+async def warm_up_renderers() -> None:
+    """첫 요청이 폰트 / Tex 캐시가 빈 상태로 렌더하지 않도록 렌더러마다 작은 씬을 미리 렌더."""
+    if WARMUP_ON_STARTUP and RENDER_MODE == "local":
+        await asyncio.to_thread(run_warmups)
+
+
+def run_generate(
+    user_text: str,
+    token: CancelToken,
+    formats: Optional[List[str]] = None,
+    accept: Optional[List[str]] = None,
+    quality: str = "l",
+    storyboard: Optional[str] = None,
+    video: bool = True,
+) -> dict:
+    """
+    /generate 파이프라인 본체. 요청마다 media store에 job 디렉토리를 하나 만들고
+    결과 영상은 그 안에 쓴다. 영상이 안 나온 요청(검증 실패 등)의 job은 지운다.
+    formats가 있으면 마스터 렌더를 ffmpeg으로 파생 포맷들로 변환한다 (manim 재실행 없음).
+    storyboard 키프레임은 항상 이 job 디렉토리에 쓴다 (farm 모드에서도).
+    """
+    job = STORE.new_job("generate")
+    try:
+        result = _run_pipeline(user_text, token, job, quality, storyboard, video)
+        if "video_path" in result and (formats or accept):
+            token.stage("encode")
+            variants = encode_derivatives(result["video_path"], formats or [], token=token)
+            result["variants"] = variants
+            result["preferred"] = choose_variant(variants, accept)
+        if "video_path" in result and result.get("job_id"):
+            # 클라이언트는 서버 경로 대신 /videos URL로 받는다
+            result["video_url"] = _video_url(result["job_id"], result["video_path"])
+            if "variants" in result:
+                result["variant_urls"] = {
+                    name: _video_url(result["job_id"], path) for name, path in result["variants"].items()
+                }
+    except BaseException:
+        STORE.finish(job, ok=False)
+        raise
+    # farm 모드에서는 결과가 워커의 media job에 있으므로 이 job은 storyboard가 없으면 비어 있다
+    STORE.finish(job, ok=result.get("job_id") == job.id or bool(result.get("storyboard")))
+    return result
+
+
+def _video_url(job_id: str, path: str) -> str:
+    return f"/videos/{job_id}/{Path(path).name}"
+
+
+def _scheduled_render(
+    kind: str,
+    ir: dict,
+    token: CancelToken,
+    job: MediaJob,
+    quality: str,
+    cost_ir: Optional[dict] = None,
+    **kwargs,
+) -> Tuple[Optional[str], Admission, str]:
+    """
+    admission(예산 초과 시 downgrade / reject) → 렌더 → 비용 모델 보정.
+      RENDER_MODE=local: 이 프로세스에서 SJF 슬롯을 기다렸다가 렌더
+      RENDER_MODE=farm : 공유 큐에 넣고 렌더 워커가 끝낼 때까지 대기
+    cost_ir: 비용 추정용 IR (기본은 ir). 반환: (영상 경로, admission, 결과가 있는 media job id).
+    reject면 영상 경로는 None.
+    """
+    admission = admit(kind, cost_ir if cost_ir is not None else ir, quality)
+    if admission.rejected:
+        return None, admission, job.id
+    est = admission.estimate
+    if RENDER_MODE == "farm":
+        video_path, media_job = _farm_render(kind, ir, token, est, kwargs)
+        return video_path, admission, media_job or job.id
+    with RENDER_SCHEDULER.slot(est.render_s, token, label=kind):
+        video_path = render_and_observe(kind, ir, job, est, token, **kwargs)
+    return video_path, admission, job.id
+
+
+def _farm_render(
+    kind: str, ir: dict, token: CancelToken, est: CostEstimate, kwargs: dict
+) -> Tuple[Optional[str], Optional[str]]:
+    """렌더 작업을 공유 큐에 넣고 결과를 기다린다. 요청이 취소되면 큐 작업도 취소."""
+    store = _job_store()
+    remaining = token.remaining()
+    payload = {
+        "ir": ir,
+        "kwargs": kwargs,
+        "estimate": est.to_dict(),
+        "deadline_at": time.time() + remaining if remaining is not None else None,
+    }
+    qid = store.enqueue(kind, payload, token.tenant or DEFAULT_TENANT, est.render_s)
+    while True:
+        qjob = store.get(qid)
+        if qjob.state == DONE:
+            return qjob.result["video_path"], qjob.result["media_job"]
+        if qjob.state == FAILED:
+            raise RuntimeError(f"render job {qid} failed: {qjob.error}")
+        if qjob.state == CANCELLED:
+            raise RequestCancelled(token.reason or "render job cancelled", token.current_stage)
+        if token.wait(FARM_POLL_S):
+            store.cancel(qid)
+            token.check()
+
+
+_JOB_STORE = None
+
+
+def _job_store():
+    global _JOB_STORE
+    if _JOB_STORE is None:
+        _JOB_STORE = open_job_store()
+    return _JOB_STORE
+
+
+def _rejected(base: dict, admission: Admission) -> dict:
+    return {
+        **base,
+        "errors": [
+            f"estimated render time {admission.estimate.render_s:.0f}s exceeds budget "
+            f"even at the cheapest settings"
+        ],
+        "admission": admission.to_dict(),
+    }
+
+
+def _run_pipeline(
+    user_text: str,
+    token: CancelToken,
+    job: MediaJob,
+    quality: str = "l",
+    storyboard: Optional[str] = None,
+    video: bool = True,
+) -> dict:
+    """각 단계 진입 시 token으로 취소 여부를 확인한다."""
 
     # 1) pseudocode IR 생성
-    pseudo_ir = call_llm_pseudocode_ir(user_text)
+    token.stage("llm:pseudocode")
+    pseudo_ir = call_llm_pseudocode_ir(user_text, token=token)
 
     # 2) domain 분류
+    token.stage("llm:domain")
     try:
-        domain = call_llm_detect_domain(user_text)
+        domain = call_llm_detect_domain(user_text, token=token)
+    except RequestCancelled:
+        raise
     except Exception:
         domain = "generic"
 
     # 3) 패턴 LLM 추천
     from app.llm_pattern import call_llm_pattern
-    llm_pattern = call_llm_pattern(user_text)
+    token.stage("llm:pattern")
+    llm_pattern = call_llm_pattern(user_text, token=token)
 
     # 4) 최종 패턴 결정 (domain 우선)
     from app.patterns import resolve_pattern
     final_pattern = resolve_pattern(domain, llm_pattern)
+    # pseudocode IR에는 domain이 없으므로 여기서 붙인다 (FLOW 렌더러가 배치 선택에 사용)
+    pseudo_ir.setdefault("metadata", {})["domain"] = domain
 
-    # 5) 대표 도메인 처리 → 전용 렌더러 실행
-
-    # --- CNN ---
-    if domain == "cnn_param" and final_pattern == PatternType.GRID:
-        cnn_ir = call_llm_domain_ir("cnn_param", user_text)
-        cfg = cnn_ir.get("ir", {}).get("params", {})
+    # 5) 대표 도메인 처리 → 레지스트리의 전용 렌더러 실행
+    spec = lookup(domain, final_pattern)
+    if spec is not None and spec.prepare is not None:
+        base = {"domain": domain, "pattern": final_pattern.value}
+        token.stage(f"prepare:{spec.kind}")
+        try:
+            prepared = spec.prepare(user_text, token, pseudo_ir)
+        except PrepareError as e:
+            return {**base, **e.context, "errors": [str(e)]}
+        except ValueError as e:
+            return {**base, "errors": [str(e)]}
+        base.update(prepared.context)
 
-        video_path = render_cnn_matrix(
-            cfg,
-            out_basename=cnn_ir.get("basename", "cnn_param_demo"),
-            fmt=cnn_ir.get("out_format", "mp4"),
-        )
+        errors = spec.validate(prepared.ir)
+        if errors:
+            return {**base, "errors": errors}
 
-        return {
-            "domain": domain,
-            "pattern": final_pattern.value,
-            "cnn_ir": cnn_ir,
-            "video_path": video_path,
-        }
+        if storyboard and spec.storyboard is not None:
+            # manim 없이 IR에서 바로 그림 → 분류 / IR이 맞는지 영상 전에 확인
+            token.stage("storyboard")
+            frames = write_storyboard(spec.storyboard(prepared.ir), job, storyboard)
+            base["storyboard"] = [
+                {"label": f["label"], "url": _video_url(job.id, f["name"])} for f in frames
+            ]
+        if not video:
+            return {**base, spec.ir_key: prepared.ir}
 
-    # --- SORTING ---
-    if domain == "sorting" and final_pattern == PatternType.SEQUENCE:
-        sort_trace = build_sorting_trace_ir(user_text)
-        video_path = render_sorting(sort_trace)
+        token.stage(f"render:{spec.kind}")
+        video_path, admission, media_job = _scheduled_render(
+            spec.kind, prepared.ir, token, job, quality, **prepared.render_kwargs,
+        )
+        if video_path is None:
+            return _rejected(base, admission)
         return {
-            "domain": domain,
-            "pattern": final_pattern.value,
-            "sorting_trace": sort_trace,
+            **base,
+            spec.ir_key: prepared.ir,
             "video_path": video_path,
+            "job_id": media_job,
+            "admission": admission.to_dict(),
         }
 
-    # --- TRANSFORMER ---
-    if domain == "transformer" and final_pattern == PatternType.SEQ_ATTENTION:
-        attn_ir = call_llm_attention_ir(user_text)
-        errors = validate_attention_ir(attn_ir)
-        if errors:
-            return {
-                "domain": domain,
-                "pattern": final_pattern.value,
-                "errors": errors,
-            }
+    # 6) 레지스트리에 전용 렌더러가 없는 도메인 → generic fallback (anim IR + codegen)
 
-        video_path = render_seq_attention(attn_ir, out_basename="attn_demo")
+    token.stage("llm:anim_ir")
+    anim_ir = call_llm_anim_ir(pseudo_ir, token=token)
+    # LLM 좌표는 겹치거나 화면 밖일 때가 많아서 codegen 전에 정리
+    anim_ir = tidy_anim_layout(anim_ir)
+    if not video:
+        # generic 씬은 코드를 실행해야 그림이 나오므로 storyboard 없이 anim IR만
         return {
             "domain": domain,
             "pattern": final_pattern.value,
-            "attention_ir": attn_ir,
-            "video_path": video_path,
+            "pseudocode_ir": pseudo_ir,
+            "anim_ir": anim_ir,
+            "message": "storyboard is not available for generic scenes",
         }
+    token.stage("llm:codegen")
+    manim_code = call_llm_codegen(anim_ir, token=token)
 
-    # 6) 비대표 도메인 → 패턴 기반 베이스 렌더러 (추후 확장)
-    # 지금은 generic fallback만
-
-    anim_ir = call_llm_anim_ir(pseudo_ir)
-    manim_code = call_llm_codegen(anim_ir)
-
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp:
-        tmp.write(manim_code)
-        tmp_path = tmp.name
-
-    subprocess.run(["manim", "-ql", tmp_path, "AlgorithmScene", "--format", "mp4"])
+    token.stage("render:generic")
+    video_path, admission, media_job = _scheduled_render(
+        "generic", {"code": manim_code}, token, job, quality, cost_ir=anim_ir,
+    )
 
-    return {
+    result = {
         "domain": domain,
         "pattern": final_pattern.value,
         "pseudocode_ir": pseudo_ir,
         "anim_ir": anim_ir,
-        "message": "fallback generic visualization started",
     }
+    if video_path is None and admission.rejected:
+        return _rejected(result, admission)
+    result["message"] = "fallback generic visualization rendered"
+    result["admission"] = admission.to_dict()
+    if video_path is not None:
+        result["video_path"] = video_path
+        result["job_id"] = media_job
+    return result
+
+
+@app.post("/generate")
+async def generate_visualization(req: GenerateRequest, request: Request):
+    if req.quality not in QUALITY_FACTOR:
+        return JSONResponse(
+            status_code=422,
+            content={"error": f"unknown quality: {req.quality}", "supported": list(QUALITY_FACTOR)},
+        )
+    if req.storyboard is not None and req.storyboard not in STORYBOARD_FORMATS:
+        return JSONResponse(
+            status_code=422,
+            content={"error": f"unknown storyboard format: {req.storyboard}", "supported": list(STORYBOARD_FORMATS)},
+        )
+    if req.storyboard == "png" and cairosvg is None:
+        return JSONResponse(status_code=422, content={"error": "png storyboards need cairosvg", "supported": ["svg"]})
+    unknown = [f for f in req.formats if f not in DERIVATIVES]
+    if unknown:
+        return JSONResponse(
+            status_code=422,
+            content={"error": f"unknown formats: {unknown}", "supported": sorted(DERIVATIVES)},
+        )
+
+    tenant = resolve_tenant(req.tenant or request.headers.get("x-tenant"))
+    retry_after = RATE_LIMITER.try_acquire(tenant)
+    if retry_after > 0:
+        return JSONResponse(
+            status_code=429,
+            content={"error": "rate limit exceeded", "tenant": tenant},
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+    token = CancelToken(deadline_s=req.deadline_s or GENERATE_DEADLINE_S, tenant=tenant)
+
+    # 파이프라인은 블로킹 호출(LLM, manim)이라 스레드에서 돌리고,
+    # 여기서는 클라이언트 이탈 / deadline만 감시한다.
+    task = asyncio.ensure_future(asyncio.to_thread(
+        run_generate, req.text, token, req.formats, req.accept, req.quality, req.storyboard, req.video,
+    ))
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+        if done:
+            break
+        if await request.is_disconnected():
+            token.cancel("client disconnected")
+        if token.cancelled:
+            # 워커 스레드는 다음 단계 진입 시(혹은 manim 폴링 중) 스스로 중단된다.
+            return _cancelled_response(token)
+
+    try:
+        result = task.result()
+    except RequestCancelled:
+        return _cancelled_response(token)
+    if result.get("admission", {}).get("action") == "reject":
+        # 예산을 넘는 작업: 가장 싼 설정으로도 안 되면 렌더하지 않는다
+        return JSONResponse(status_code=413, content=result)
+    return result
+
+
+@app.api_route("/videos/{job_id}", methods=["GET", "HEAD"])
+@app.api_route("/videos/{job_id}/{name}", methods=["GET", "HEAD"])
+async def get_video(job_id: str, request: Request, name: Optional[str] = None):
+    """
+    media store 결과 파일 전송 (Range / ETag / 조건부 GET, app.video_delivery).
+    name이 없으면 job의 마스터 영상.
+    """
+    path = STORE.artifact(job_id, name)
+    if path is None:
+        return JSONResponse(status_code=404, content={"error": "video not found", "job_id": job_id})
+    STORE.touch(job_id)
+    # 첫 요청은 ETag용 해시를 계산하므로 스레드에서
+    try:
+        return await asyncio.to_thread(video_response, path, job_id, request.headers, request.method)
+    except FileNotFoundError:
+        # 그 사이 quota eviction으로 지워진 경우
+        return JSONResponse(status_code=404, content={"error": "video not found", "job_id": job_id})
+
 
+def _cancelled_response(token: CancelToken) -> JSONResponse:
+    status = 504 if token.reason == "deadline exceeded" else 499
+    return JSONResponse(
+        status_code=status,
+        content={
+            "error": "request cancelled",
+            "reason": token.reason,
+            "aborted_stage": token.current_stage,
+            "completed_stages": token.completed_stages,
+        },
+    )
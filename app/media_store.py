@@ -0,0 +1,263 @@
+# app/media_store.py
+"""
+렌더 결과 저장소.
+
+모든 렌더러가 고정 이름(media/videos/.../attn_demo.mp4)에 쓰던 것을
+요청(job)마다 고유 디렉토리에 쓰도록 바꾼다.
+
+  MEDIA_STORE_DIR/
+    cnn-3f9a1c2b7e4d/
+      cnn_param_demo.mp4      ← 최종 결과 (렌더러가 돌려주는 경로)
+      .inprogress             ← 렌더 중 표시 (eviction 대상에서 제외)
+      tmp/                    ← 씬 파일, manim media_dir 등 scratch (job 종료 시 삭제)
+
+- 디스크 quota(MEDIA_STORE_QUOTA_MB)를 넘으면 가장 오래 접근하지 않은 job부터 삭제 (LRU)
+- 마지막 접근 시각 = job 디렉토리 mtime (touch()로 갱신)
+- 최근 EVICT_MIN_AGE_S 안에 접근한 job / 렌더 중인 job은 지우지 않는다
+  → 동시에 도는 요청의 결과가 사라지지 않는다.
+"""
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+MEDIA_STORE_DIR = Path(os.getenv("MEDIA_STORE_DIR", str(PROJECT_ROOT / "media" / "jobs"))).resolve()
+MEDIA_STORE_QUOTA_BYTES = int(float(os.getenv("MEDIA_STORE_QUOTA_MB", "2048")) * 1024 * 1024)
+
+# 이 시간 안에 접근한 항목은 quota를 넘어도 지우지 않는다 (요청 deadline보다 길게)
+EVICT_MIN_AGE_S = float(os.getenv("MEDIA_EVICT_MIN_AGE_S", "900"))
+# .inprogress 표시가 이보다 오래되면 죽은 워커가 남긴 것으로 보고 무시
+STALE_PIN_S = 3600.0
+
+INPROGRESS = ".inprogress"
+# /videos/{job_id}가 마스터로 고르는 확장자 (앞이 우선). 영상만 — storyboard_NN.png 같은 정지 이미지는 제외
+MASTER_SUFFIXES = (".mp4", ".mov", ".webm", ".gif")
+JOB_ID_RE = re.compile(r"^[a-z_]+-[0-9a-f]{12}$")
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.stat(os.path.join(root, f)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+@contextmanager
+def _dir_lock(root: Path) -> Iterator[None]:
+    """같은 root를 쓰는 프로세스끼리 eviction이 겹치지 않게 하는 파일 락."""
+    root.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(root / ".lock", "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def evict_lru(
+    entries: List[Tuple[Path, float, int]],
+    quota_bytes: int,
+    min_age_s: float = EVICT_MIN_AGE_S,
+) -> List[Path]:
+    """
+    entries: (경로, 마지막 접근 시각, 크기). 합계가 quota_bytes 이하가 될 때까지
+    오래된 것부터 지운다. 최근 min_age_s 안에 접근한 항목은 건너뛴다.
+    """
+    total = sum(size for _, _, size in entries)
+    if total <= quota_bytes:
+        return []
+    now = time.time()
+    evicted = []
+    for path, last_access, size in sorted(entries, key=lambda e: e[1]):
+        if total <= quota_bytes:
+            break
+        if now - last_access < min_age_s:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        total -= size
+        evicted.append(path)
+    return evicted
+
+
+def prune_files(root: Path, quota_bytes: int, min_age_s: float = EVICT_MIN_AGE_S) -> List[Path]:
+    """root 아래 파일 단위 LRU 정리 (섹션 캐시 등). 마지막 접근 = mtime."""
+    if not root.exists():
+        return []
+    with _dir_lock(root):
+        entries = []
+        for p in root.rglob("*"):
+            if p.is_file() and p.name != ".lock":
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((p, st.st_mtime, st.st_size))
+        return evict_lru(entries, quota_bytes, min_age_s)
+
+
+class MediaJob:
+    """요청 하나의 출력 디렉토리."""
+
+    def __init__(self, job_id: str, path: Path):
+        self.id = job_id
+        self.dir = path
+        self.tmp_dir = path / "tmp"
+        # 마지막 render_sectioned 결과 요약 {"sections": n, "rendered": k} (비용 모델 보정용)
+        self.render_stats: Dict[str, int] = {}
+
+    def output_path(self, basename: str, fmt: str) -> Path:
+        """최종 결과 파일 경로. basename에 경로 구분자가 있으면 파일 이름만 쓴다."""
+        return self.dir / f"{Path(basename).name}.{fmt}"
+
+    def temp_dir(self, prefix: str = "scratch-") -> Path:
+        """job이 끝나면 같이 지워지는 scratch 디렉토리."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix=prefix, dir=self.tmp_dir))
+
+    def write_temp(self, content: str, suffix: str = ".py") -> Path:
+        """씬 코드 등을 scratch 파일로 저장 (delete=False 임시 파일 대체)."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(suffix=suffix, dir=self.tmp_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(content)
+        return Path(name)
+
+    def cleanup_temp(self) -> None:
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class MediaStore:
+    """job 디렉토리 생성 / 조회 / quota 기반 LRU eviction."""
+
+    def __init__(self, root: Path = MEDIA_STORE_DIR, quota_bytes: int = MEDIA_STORE_QUOTA_BYTES):
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+
+    def new_job(self, kind: str = "job") -> MediaJob:
+        kind = re.sub(r"[^a-z_]", "_", kind.lower()) or "job"
+        job_id = f"{kind}-{uuid.uuid4().hex[:12]}"
+        path = self.root / job_id
+        path.mkdir(parents=True)
+        (path / INPROGRESS).touch()
+        return MediaJob(job_id, path)
+
+    def finish(self, job: MediaJob, ok: bool = True) -> None:
+        """scratch 정리 + 렌더 중 표시 해제. 실패한 job은 디렉토리째 삭제."""
+        job.cleanup_temp()
+        if not ok:
+            shutil.rmtree(job.dir, ignore_errors=True)
+            return
+        try:
+            (job.dir / INPROGRESS).unlink()
+        except FileNotFoundError:
+            pass
+        self.touch(job.id)
+        self.enforce_quota()
+
+    @contextmanager
+    def job(self, kind: str = "job") -> Iterator[MediaJob]:
+        job = self.new_job(kind)
+        try:
+            yield job
+        except BaseException:
+            self.finish(job, ok=False)
+            raise
+        self.finish(job)
+
+    def get(self, job_id: str) -> Optional[MediaJob]:
+        if not JOB_ID_RE.match(job_id):
+            return None
+        path = self.root / job_id
+        return MediaJob(job_id, path) if path.is_dir() else None
+
+    def artifact(self, job_id: str, name: Optional[str] = None) -> Optional[Path]:
+        """
+        완료된 job의 결과 파일 경로 (/videos 용). 렌더 중이거나 없으면 None.
+        name이 없으면 마스터 영상 (파생 파일 <stem>.<variant>.<ext>가 아닌 것 중 MASTER_SUFFIXES 순서).
+        """
+        job = self.get(job_id)
+        if job is None or (job.dir / INPROGRESS).exists():
+            return None
+        if name is not None:
+            path = job.dir / name
+            ok = name == Path(name).name and not name.startswith(".") and path.is_file()
+            return path if ok else None
+        masters = [p for p in job.dir.iterdir() if p.is_file() and p.suffix in MASTER_SUFFIXES
+                   and "." not in p.stem and not p.name.startswith(".")]
+        masters.sort(key=lambda p: MASTER_SUFFIXES.index(p.suffix))
+        return masters[0] if masters else None
+
+    def touch(self, job_id: str) -> None:
+        """LRU용 마지막 접근 시각 갱신."""
+        try:
+            os.utime(self.root / job_id)
+        except FileNotFoundError:
+            pass
+
+    def usage(self) -> int:
+        return _tree_size(self.root) if self.root.exists() else 0
+
+    def enforce_quota(self) -> List[Path]:
+        """quota를 넘으면 오래 접근하지 않은 완료 job부터 삭제. 삭제한 경로 목록을 돌려준다."""
+        with self._lock, _dir_lock(self.root):
+            now = time.time()
+            entries = []
+            for path in self.root.iterdir():
+                if not path.is_dir() or not JOB_ID_RE.match(path.name):
+                    continue
+                pin = path / INPROGRESS
+                try:
+                    if pin.exists() and now - pin.stat().st_mtime < STALE_PIN_S:
+                        continue
+                    last_access = path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                entries.append((path, last_access, _tree_size(path)))
+            evicted = evict_lru(entries, self.quota_bytes)
+        for path in evicted:
+            print(f"🧹 evicted media job {path.name}")
+        return evicted
+
+
+STORE = MediaStore()
+
+
+@contextmanager
+def job_scope(job: Optional[MediaJob], kind: str) -> Iterator[MediaJob]:
+    """호출자가 job을 넘기면 그대로 쓰고(수명은 호출자 관리), 없으면 여기서 만들고 정리한다."""
+    if job is not None:
+        yield job
+        return
+    with STORE.job(kind) as own:
+        yield own
@@ -7,11 +7,13 @@ class PatternType(str, Enum):
     SEQUENCE = "sequence"
     FLOW = "flow"
     SEQ_ATTENTION = "seq_attention"
+    GENERIC = "generic"
 
 
 # 도메인 → 패턴 확정 (대표 도메인 처리)
 DOMAIN_TO_PATTERN = {
     "cnn_param": PatternType.GRID,
+    "table": PatternType.GRID,
     "sorting": PatternType.SEQUENCE,
     "bubble_sort": PatternType.SEQUENCE,
     "selection_sort": PatternType.SEQUENCE,
@@ -24,6 +26,9 @@ DOMAIN_TO_PATTERN = {
     "pipeline": PatternType.FLOW,
 }
 
+# 도메인 강제 매핑이 있어도 LLM이 grid를 추천하면 GRID로 (행렬 곱 / attention 행렬 등)
+GRID_OVERRIDE_DOMAINS = {"math", "transformer"}
+
 VALID_PATTERNS = {
     "grid": PatternType.GRID,
     "sequence": PatternType.SEQUENCE,
@@ -32,6 +37,10 @@ VALID_PATTERNS = {
 }
 
 def resolve_pattern(domain: str, llm_pattern: str) -> PatternType:
+    # 0) 격자로 그릴 수 있는 도메인은 LLM의 grid 추천을 따른다
+    if domain in GRID_OVERRIDE_DOMAINS and llm_pattern.lower() == PatternType.GRID.value:
+        return PatternType.GRID
+
     # 1) 도메인 강제 매핑이 있으면 도메인 우선
     if domain in DOMAIN_TO_PATTERN:
         return DOMAIN_TO_PATTERN[domain]
@@ -59,7 +59,7 @@ User text:
     "algorithm": "<detected_sorting_algorithm>",
     "input": { "array": [...] },
     "trace": [
-      { "step": 1, "compare": [i, j], "swap": true/false, "array": [...] },
+      { "step": 1, "compare": [i, j], "swap": true/false },
       ...
     ]
   }}
@@ -70,6 +70,8 @@ User text:
   - If the user does NOT mention any algorithm, choose the algorithm that best fits the description.
   - "array" must come from the user request.
   - "trace" must be a fully detailed chronological step list for THAT algorithm.
+  - Do NOT repeat the whole array in every step; the array state is replayed from "input.array" and the swaps.
+  - For selection_sort you may add "min_index": k to a step to mark the current minimum candidate.
   - Do NOT output anything except valid JSON.
   """
   },
@@ -120,6 +122,104 @@ Rules:
 - "next_token.probs" MUST have the same length as "candidates" and sum to approximately 1.0.
 - Do NOT output anything except the JSON object. No explanations, no comments.
 
+USER REQUEST:
+{text}
+"""
+    },
+
+    # GRID 패턴(app.grid_ir)용: 행렬과 연산 순서만 적고 값 계산은 로컬 NumPy
+    "grid": {
+        "system": "You are a precise JSON generator for grid / matrix visualization IRs. Output ONLY JSON.",
+        "template": """
+Describe the USER REQUEST as a grid IR. Do NOT compute results yourself; the renderer computes every value.
+
+If the request is one of these common algorithms, output ONLY the algorithm and its inputs:
+{{"title": "...", "algorithm": "matmul", "inputs": {{"A": [[1, 2], [3, 4]], "B": [[5, 6], [7, 8]]}}}}
+{{"title": "...", "algorithm": "lcs", "inputs": {{"a": "ABCB", "b": "BDCAB"}}}}
+{{"title": "...", "algorithm": "edit_distance", "inputs": {{"a": "kitten", "b": "sitting"}}}}
+{{"title": "...", "algorithm": "attention", "inputs": {{"tokens": ["I", "like", "cats"]}}}}
+  (attention: add "Q" and "K" as len(tokens) x d matrices only if the user gives them)
+
+Otherwise output explicit matrices and steps:
+{{
+  "title": "...",
+  "algorithm": "custom",
+  "matrices": [
+    {{"name": "A", "values": [[1, 2], [3, 4]]}},
+    {{"name": "T", "shape": [2, 2], "row_labels": ["..."], "col_labels": ["..."]}}
+  ],
+  "steps": [
+    {{"caption": "<short explanation>",
+      "ops": [
+        {{"op": "highlight", "matrix": "A", "range": [r0, c0, r1, c1]}},
+        {{"op": "write", "matrix": "T", "cell": [0, 0], "value": 0}},
+        {{"op": "compute", "matrix": "T", "cell": [1, 1], "fn": "max", "plus": 0,
+          "args": [{{"matrix": "T", "cell": [0, 1]}}, {{"matrix": "T", "cell": [1, 0]}}]}}
+      ]}}
+  ]
+}}
+
+Rules:
+- "values" gives a matrix with known numbers; "shape" gives an empty table that the steps fill.
+- Ranges are [r0, c0, r1, c1] with both ends included; indices start at 0.
+- compute fn for one "cell": "sum", "max", "min", "mean", "prod", "dot" (two equal-length args).
+  The result is fn(args) * scale + plus ("scale" defaults to 1, "plus" to 0).
+- compute fn for a "range": "copy", "relu", "softmax" (row-wise); args[0] must have the same shape.
+- A compute may only read cells that already have values.
+- At most 4 matrices, 144 cells per matrix and 240 steps. Use the user's numbers exactly.
+
+User text:
+{text}
+"""
+    },
+
+    # 캐시 교체 시뮬레이터(app.cache_sim)용: 정책 / 용량 / 접근 열만 추출
+    "cache_sim": {
+        "system": "You extract cache-eviction simulation parameters. Output ONLY JSON.",
+        "template": """
+From the USER REQUEST, extract the cache replacement scenario to simulate.
+
+Output exactly:
+{{
+  "title": "<short title>",
+  "policy": "fifo" | "lru" | "clock" | "s3fifo",
+  "capacity": <integer number of cache entries>,
+  "accesses": ["A", "B", "C", "A", ...],
+  "workload": null
+}}
+
+Rules:
+- "policy": S3-FIFO / S-FIFO / M-FIFO / ghost queue → "s3fifo"; second chance / clock → "clock";
+  least recently used → "lru"; first-in first-out → "fifo". If none is mentioned, use "lru".
+- "accesses": the access / request sequence exactly as the user wrote it (keep the user's key names).
+- If the user asks for a long or random workload instead of a concrete sequence, set "accesses" to []
+  and "workload" to {{"kind": "zipf" | "uniform" | "loop", "keys": <int>, "length": <int>, "alpha": 1.0, "seed": 1}}.
+  Keep "keys" and "length" at most 200000.
+- If there is no sequence and no workload, set "accesses" to [] and "workload" to null.
+- If no capacity is given, use 3 (use at least 2 for "s3fifo").
+
+USER REQUEST:
+{text}
+"""
+    },
+
+    # 토이 transformer(app.toy_transformer)용: 문장만 추출하고 수치는 로컬에서 계산
+    "seq_attention_sentence": {
+        "system": "You extract the example input sentence for a transformer next-token demo. Output ONLY JSON.",
+        "template": """
+From the USER REQUEST, extract the short input sequence that should be fed into a transformer.
+
+- Prefer the English part that looks like an example sentence, e.g. "I want to play".
+- If the user writes something like `I want to play라는 문장의 next token prediction이...`,
+  the input sequence MUST be exactly "I want to play".
+- Do NOT include the surrounding Korean question or explanation.
+- If you truly cannot find any clear example, use the entire request text.
+- "num_heads": the number of attention heads the user asks for ("4-head", "멀티헤드 4개" → 4).
+  If the user does not mention heads, use 1.
+
+Output exactly:
+{{"raw_text": "<the extracted input sequence>", "num_heads": <integer>}}
+
 USER REQUEST:
 {text}
 """
@@ -1,57 +1,52 @@
 import os
 import json
-import tempfile
 import subprocess
 from pathlib import Path
 
-# --- 출력 경로 기본 설정 ---
-MEDIA_DIR = Path("media/videos/IRScene")
-MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+from app.compact_trace import CompactTrace
+from app.media_store import job_scope
+from app.sections import render_scene_file
 
 
 # --- 1️⃣ trace 자동 확장 함수 ---
 def expand_bubble_trace(ir: dict) -> dict:
-    """LLM이 불완전한 trace를 생성하더라도 버블 정렬 전체 과정을 자동 생성"""
+    """
+    LLM이 불완전한 trace를 생성하더라도 버블 정렬 전체 과정을 자동 생성.
+    이벤트 dict 목록 대신 압축 trace(app.compact_trace)로 ir["trace"]에 넣는다.
+    step = 비교 1회 (+ swap), step 번호 = 패스 번호.
+    """
     components = ir.get("components", [])
     arr = [int(c["label"]) for c in components]
-    events = []
-    step = 1
+    trace = CompactTrace("bubble_sort", arr)
 
     for i in range(len(arr)):
         for j in range(len(arr) - i - 1):
-            events.append({
-                "op": "compare",
-                "from": f"arr{j}",
-                "to": f"arr{j+1}",
-                "step": step
-            })
+            trace.compare(j, j + 1)
+            trace.number_step(i + 1)
             if arr[j] > arr[j+1]:
                 arr[j], arr[j+1] = arr[j+1], arr[j]
-                events.append({
-                    "op": "swap",
-                    "from": f"arr{j}",
-                    "to": f"arr{j+1}",
-                    "step": step
-                })
-        step += 1
-
-    ir["events"] = events
+                trace.swap(j, j + 1)
+
+    ir["trace"] = trace.to_json()
+    # 확장된 trace가 LLM의 (불완전한) events를 대신한다
+    ir.pop("events", None)
     return ir
 
 
 # --- 2️⃣ render 함수 ---
-def render_manim_scene(ir: dict, out_basename: str = "result", fmt: str = "gif") -> str:
+def render_manim_scene(ir: dict, out_basename: str = "result", fmt: str = "gif", token=None, job=None) -> str:
     """
     IR(JSON)을 기반으로 버블 정렬 과정을 시각화하는 Manim Scene 생성 및 렌더링
     """
     # LLM이 준 trace를 보완
     ir = expand_bubble_trace(ir)
-    ir_json_str = json.dumps(ir, ensure_ascii=False, indent=2)
+    ir_json_str = json.dumps(ir, ensure_ascii=False, separators=(",", ":"))
 
     # --- Manim Scene 코드 ---
     scene_code = f"""
 from manim import *
 import json
+from app.compact_trace import CompactTrace
 
 class IRScene(Scene):
     def construct(self):
@@ -71,27 +66,29 @@ class IRScene(Scene):
 
         self.wait(0.8)
 
-        # --- Step 2: 이벤트 재생 (compare + swap) ---
-        current_step = 1
-        for e in IR.get("events", []):
-            op = e.get("op")
-            i = int(e["from"].replace("arr", ""))
-            j = int(e["to"].replace("arr", ""))
-
-            if op == "compare":
-                # 비교 시 살짝 들썩
-                self.play(
-                    circles[i].animate.shift(UP*0.25),
-                    circles[j].animate.shift(UP*0.25),
-                    run_time=0.2
-                )
-                self.play(
-                    circles[i].animate.shift(DOWN*0.25),
-                    circles[j].animate.shift(DOWN*0.25),
-                    run_time=0.2
-                )
-
-            elif op == "swap":
+        # --- Step 2: trace 재생 (compare + swap) ---
+        trace = CompactTrace.from_json(IR["trace"])
+        current_pass = 1
+        for s in trace.steps:
+            # 패스 간 잠시 멈춤
+            if s["step"] > current_pass:
+                self.wait(0.3)
+                current_pass = s["step"]
+
+            i, j = s["compare"]
+            # 비교 시 살짝 들썩
+            self.play(
+                circles[i].animate.shift(UP*0.25),
+                circles[j].animate.shift(UP*0.25),
+                run_time=0.2
+            )
+            self.play(
+                circles[i].animate.shift(DOWN*0.25),
+                circles[j].animate.shift(DOWN*0.25),
+                run_time=0.2
+            )
+
+            if s["swap"]:
                 # swap 시 실제 위치 교환 + 색 변화
                 pos_i = circles[i].get_center()
                 pos_j = circles[j].get_center()
@@ -112,42 +109,22 @@ class IRScene(Scene):
                     run_time=0.2
                 )
 
-            # 패스 간 잠시 멈춤
-            step_num = e.get("step", 0)
-            if step_num > current_step:
-                self.wait(0.3)
-                current_step = step_num
-
         # --- Step 3: 정렬 완료 표시 ---
         self.wait(0.5)
         self.play(*[c[0].animate.set_color(GREEN) for c in circles], run_time=1.0)
         self.wait(1.0)
 """
 
-    # --- 임시 Scene 파일 작성 ---
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp_file:
-        tmp_file.write(scene_code)
-        tmp_path = tmp_file.name
-
-    print(f"📝 Temporary scene written to: {tmp_path}")
-
-    # --- Manim 렌더 실행 ---
-    cmd = [
-        "manim",
-        "-ql",
-        tmp_path,
-        "IRScene",
-        "--format", fmt,
-        "-o", f"{out_basename}.{fmt}",
-    ]
-
-    try:
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as e:
-        print("🔥 Manim render failed:", e)
-        raise RuntimeError(f"Manim rendering failed: {e}")
-
-    output_path = MEDIA_DIR / f"{out_basename}.{fmt}"
+    # --- Manim 렌더 실행 (job scratch 디렉토리에서, 끝나면 정리) ---
+    with job_scope(job, "ir") as job:
+        output_path = job.output_path(out_basename, fmt)
+        try:
+            produced = render_scene_file(scene_code, "IRScene", output_path, job.temp_dir(), fmt=fmt, token=token)
+        except subprocess.CalledProcessError as e:
+            print("🔥 Manim render failed:", e)
+            raise RuntimeError(f"Manim rendering failed: {e}")
+        if not produced:
+            raise RuntimeError("Manim rendering produced no output")
+
     print(f"✅ Render complete: {output_path.resolve()}")
     return str(output_path)
-
@@ -0,0 +1,274 @@
+# app/render_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+from app.media_store import job_scope
+from app.sections import render_sectioned
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 섹션 하나에 들어가는 접근(프레임) 수
+SECTION_FRAMES = 10
+
+
+def cache_sections(cache_trace: Dict[str, Any]) -> list:
+    """
+    cache trace → [(섹션 이름, sub-IR)] (app.sections.render_sectioned 입력).
+    intro(큐 배치) / frames_0 / frames_1 / ... / summary. frames_k에는 지금까지의 프레임 누적 해시.
+    """
+    base = {k: cache_trace[k] for k in ("title", "policy", "capacity", "queues", "labels")}
+    sections = [("intro", base)]
+    digest = hashlib.sha256()
+    frames = cache_trace["frames"]
+    for k, start in enumerate(range(0, len(frames), SECTION_FRAMES)):
+        digest.update(json.dumps(frames[start:start + SECTION_FRAMES], sort_keys=True).encode("utf-8"))
+        sections.append((f"frames_{k}", {**base, "prefix": digest.hexdigest()}))
+    sections.append((
+        "summary",
+        {
+            **base,
+            "prefix": digest.hexdigest(),
+            **{k: cache_trace[k] for k in ("summary", "ratio_series", "compare")},
+        },
+    ))
+    return sections
+
+
+def render_cache(cache_trace: dict, out_basename: str = "cache_demo", fmt: str = "mp4", token=None,
+                 job=None, quality: str = "l") -> str:
+    """
+    cache_trace: app.cache_sim.build_cache_trace 결과. 씬은 시뮬레이션을 하지 않는다.
+    큐는 위에서 아래로 (S-FIFO, M-FIFO, G) 한 줄씩, 칸은 머리(최근) → 꼬리 순서.
+    접근마다 (1) 요청 key + hit / miss 표시와 이벤트 강조, (2) 큐 재배치(들어옴 / 이동 / 나감)를 한 번씩 재생한다.
+    CLOCK은 칸 아래에 참조 비트(초록 = 1)와 hand 화살표를 그린다.
+    마지막에 전체 접근 열의 hit ratio, 구간별 추이, 정책별 비교를 보여준다.
+    큐가 너무 커서 칸으로 못 그리면(frames가 비어 있음) 요약만 그린다.
+
+    job: app.media_store.MediaJob. 없으면 새 job 디렉토리를 만들어서 그 안에 출력한다.
+    quality: manim 품질 플래그 (l / m / h / p / k)
+    """
+    scene_template = r"""
+from manim import *
+import json, sys
+
+PROJECT_ROOT = r"__PROJECT_ROOT__"
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.tex_cache import use_shared_tex_cache
+from app.layout_utils import (
+    SectionMixin,
+    LayoutMixin,
+    cached_text,
+    autorescale_group,
+    mobject_cache_stats,
+)
+
+use_shared_tex_cache()
+
+SECTION_FRAMES = __SECTION_FRAMES__
+SLOT = 0.6
+EVENT_COLORS = {"evict": RED, "promote": YELLOW, "reinsert": BLUE, "ghost_hit": PURPLE}
+POLICY_TITLES = {"fifo": "FIFO", "lru": "LRU", "clock": "CLOCK", "s3fifo": "S3-FIFO"}
+
+
+class CacheScene(SectionMixin, Scene, LayoutMixin):
+    render_sections = __SECTIONS__
+
+    def construct(self):
+        # 이벤트 / 큐 상태는 app.cache_sim에서 미리 계산된 trace를 그대로 사용
+        data = json.loads(r'''__CACHE_JSON__''')
+
+        # === 1. 제목 + 큐 ===
+        self.begin_section("intro")
+        title = Text(data["title"], font_size=32, color=YELLOW_B)
+        title.to_edge(UP, buff=0.4)
+        self.play(Write(title))
+        if data["frames"]:
+            self.construct_frames(data, title)
+
+        # === 3. 요약: 전체 hit ratio + 구간별 추이 + 정책 비교 ===
+        self.begin_section("summary")
+        self.clear()
+        self.add(title)
+        self.construct_summary(data, title)
+        self.wait(1.2)
+        print(f"mobject cache: {mobject_cache_stats()}")
+
+    def construct_frames(self, data, title):
+        labels = data["labels"]
+        queues = data["queues"]
+        rows, slots = [], []
+        for q in queues:
+            cells = VGroup(*[
+                Square(SLOT, color=GREY if q["ghost"] else BLUE, fill_opacity=0.05 if q["ghost"] else 0.12)
+                for _ in range(q["capacity"])
+            ]).arrange(RIGHT, buff=0.08)
+            name = Text(q["name"], color=GRAY_B if q["ghost"] else BLUE_B, font_size=28)
+            name.next_to(cells, LEFT, buff=0.3)
+            rows.append(VGroup(name, cells))
+            slots.append(cells)
+        board = VGroup(*rows).arrange(DOWN, buff=0.5, aligned_edge=LEFT)
+        # 위 / 아래에 요청 표시와 CLOCK hand 자리를 남긴다
+        autorescale_group(board, max_height=4.2)
+        board.shift(DOWN * 0.3)
+        head = cached_text("head (newest) →  tail", font_size=18, color=GRAY)
+        head.next_to(slots[0], UP, buff=0.15).align_to(slots[0], LEFT)
+        bits = VGroup()
+        if data["policy"] == "clock":
+            bits = VGroup(*[Dot(c.get_bottom() + DOWN * 0.18, radius=0.06, color=GREY) for c in slots[0]])
+        self.play(FadeIn(board), FadeIn(head), FadeIn(bits), run_time=0.8)
+
+        items = {}          # key id → (큐 번호, mobject)
+        hand = None
+        request = None
+
+        def make_item(key, q):
+            box = Square(SLOT * 0.86, stroke_width=2,
+                         color=GREY if queues[q]["ghost"] else WHITE,
+                         fill_color=GREY_D if queues[q]["ghost"] else BLUE_E, fill_opacity=0.8)
+            text = cached_text(labels[key], font_size=22, color=GRAY_B if queues[q]["ghost"] else WHITE)
+            text.move_to(box)
+            return VGroup(box, text).scale(slots[q][0].width / SLOT)
+
+        # === 2. 접근 재생 ===
+        for idx, frame in enumerate(data["frames"]):
+            if idx % SECTION_FRAMES == 0:
+                self.begin_section(f"frames_{idx // SECTION_FRAMES}")
+
+            # (1) 요청 + 이벤트 강조 (적중 / 내보낼 칸 / 승격 / ghost 적중)
+            tag = "HIT" if frame["hit"] else "MISS"
+            new_request = VGroup(
+                cached_text(f"#{idx + 1}  get({labels[frame['key']]})", font_size=26, color=WHITE),
+                cached_text(tag, font_size=26, color=GREEN if frame["hit"] else RED),
+            ).arrange(RIGHT, buff=0.3).next_to(title, DOWN, buff=0.3)
+            marks = [FadeIn(new_request) if request is None else FadeTransform(request, new_request)]
+            request = new_request
+            marked = set()
+            for name, key, q in frame["events"]:
+                # 한 key에는 강조 하나만 (LRU의 hit + promote 등)
+                if key not in items or key in marked or (name != "hit" and name not in EVENT_COLORS):
+                    continue
+                marked.add(key)
+                if name == "hit":
+                    marks.append(Indicate(items[key][1], color=GREEN))
+                else:
+                    marks.append(items[key][1][0].animate.set_stroke(EVENT_COLORS[name], width=5))
+            self.play(*marks, run_time=0.5)
+
+            # (2) 스냅샷으로 재배치: 새 key는 요청 위치에서 내려오고, 사라진 key는 아래로 빠진다
+            moves, target = [], {}
+            for q, keys in enumerate(frame["queues"]):
+                for pos, key in enumerate(keys):
+                    target[key] = (q, pos)
+            for key in list(items):
+                if key not in target:
+                    moves.append(FadeOut(items.pop(key)[1], shift=DOWN * 0.4))
+            for key, (q, pos) in target.items():
+                spot = slots[q][pos].get_center()
+                if key not in items:
+                    mob = make_item(key, q).move_to(request.get_center())
+                    items[key] = (q, mob)
+                    moves.append(mob.animate.move_to(spot))
+                    self.add(mob)
+                    continue
+                old_q, mob = items[key]
+                if old_q != q:
+                    fresh = make_item(key, q).move_to(spot)
+                    moves.append(Transform(mob, fresh))
+                    items[key] = (q, mob)
+                elif not np.allclose(mob.get_center(), spot):
+                    moves.append(mob.animate.move_to(spot))
+            if "hand" in frame:
+                cells = slots[0]
+                spot = cells[min(frame["hand"], len(cells) - 1)]
+                new_hand = Arrow(spot.get_bottom() + DOWN * 0.9, spot.get_bottom() + DOWN * 0.3,
+                                 buff=0, color=YELLOW)
+                moves.append(Create(new_hand) if hand is None else Transform(hand, new_hand))
+                hand = hand or new_hand
+                for pos, bit in enumerate(frame["bits"]):
+                    moves.append(bits[pos].animate.set_color(GREEN if bit else GREY))
+            if moves:
+                self.play(*moves, run_time=0.6)
+            # 이벤트 강조 테두리 원복
+            for q, mob in items.values():
+                mob[0].set_stroke(GREY if queues[q]["ghost"] else WHITE, width=2)
+
+    def construct_summary(self, data, title):
+        s = data["summary"]
+        headline = cached_text(
+            f"{s['accesses']} accesses · hit ratio {s['hit_ratio'] * 100:.1f}%", font_size=28, color=YELLOW_B,
+        ).next_to(title, DOWN, buff=0.3)
+        counts = cached_text(
+            f"hits {s['hits']} · misses {s['misses']} · evictions {s['evicts']}"
+            f" · promotions {s['promotes']} · ghost hits {s['ghost_hits']}",
+            font_size=20, color=GRAY_B,
+        ).next_to(headline, DOWN, buff=0.2)
+
+        series = data["ratio_series"] or [0.0]
+        if len(series) == 1:
+            series = series * 2
+        axes = Axes(
+            x_range=[0, max(1, len(series) - 1), max(1, (len(series) - 1) // 5 or 1)],
+            y_range=[0, 1, 0.25],
+            x_length=5.0,
+            y_length=2.6,
+            tips=False,
+        )
+        line = axes.plot_line_graph(list(range(len(series))), series, add_vertex_dots=False, line_color=GREEN)
+        chart_label = cached_text("hit ratio over the stream", font_size=20, color=GRAY_B)
+        chart = VGroup(axes, line)
+        chart_label.next_to(axes, DOWN, buff=0.2)
+
+        compare = data["compare"]
+        bars = VGroup()
+        for p, ratio in compare.items():
+            bar = Rectangle(width=0.6, height=max(0.02, 2.6 * ratio), stroke_width=1,
+                            color=YELLOW if p == data["policy"] else BLUE, fill_opacity=0.7)
+            name = cached_text(POLICY_TITLES.get(p, p), font_size=18, color=GRAY_B)
+            value = cached_text(f"{ratio * 100:.0f}%", font_size=18, color=WHITE)
+            bars.add(VGroup(bar, name, value))
+        bars.arrange(RIGHT, buff=0.35, aligned_edge=DOWN)
+        for bar, name, value in bars:
+            name.next_to(bar, DOWN, buff=0.15)
+            value.next_to(bar, UP, buff=0.1)
+        bars_label = cached_text("same stream, other policies", font_size=20, color=GRAY_B)
+
+        panel = VGroup(VGroup(chart, chart_label), VGroup(bars, bars_label)).arrange(RIGHT, buff=1.0)
+        bars_label.next_to(bars, DOWN, buff=0.5)
+        autorescale_group(panel, max_height=3.8)
+        panel.next_to(counts, DOWN, buff=0.4)
+        self.play(FadeIn(headline), FadeIn(counts), run_time=0.6)
+        self.play(Create(axes), Create(line), FadeIn(chart_label), run_time=1.2)
+        self.play(LaggedStart(*[GrowFromEdge(b[0], DOWN) for b in bars], lag_ratio=0.15),
+                  *[FadeIn(VGroup(b[1], b[2])) for b in bars], FadeIn(bars_label), run_time=1.0)
+"""
+
+    def build(sections):
+        return (
+            scene_template
+            # key 이름의 작은따옴표가 r'''...''' 를 닫지 않도록 이스케이프
+            .replace("__CACHE_JSON__", json.dumps(cache_trace, ensure_ascii=False).replace("'", "\\u0027"))
+            .replace("__PROJECT_ROOT__", str(PROJECT_ROOT))
+            .replace("__SECTION_FRAMES__", str(SECTION_FRAMES))
+            .replace("__SECTIONS__", repr(sections))
+        )
+
+    with job_scope(job, "cache") as job:
+        result = render_sectioned(
+            "cache",
+            scene_template,
+            build,
+            "CacheScene",
+            cache_sections(cache_trace),
+            job,
+            out_basename,
+            quality=quality,
+            fmt=fmt,
+            token=token,
+        )
+    return result["path"]
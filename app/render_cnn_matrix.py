@@ -1,14 +1,50 @@
 # app/render_cnn_matrix.py
 from __future__ import annotations
 import json
-import tempfile
-import subprocess
 from pathlib import Path
 
-MEDIA_DIR = Path("media/videos/CNNScene")
-MEDIA_DIR.mkdir(parents=True, exist_ok=True)
-
-def render_cnn_matrix(cfg: dict, out_basename="cnn_param_demo", fmt="mp4") -> str:
+from app.cnn_trace import build_cnn_trace
+from app.media_store import job_scope
+from app.sections import render_sectioned
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 패딩 포함 입력 셀 수가 이 값을 넘으면 히트맵 모드로 그린다 (예: 28x28 MNIST, 32x32 CIFAR)
+HEATMAP_CELL_THRESHOLD = 400
+# feature map 한 변이 이 값 이상이면 셀 단위 play 대신 행/단계 단위로 묶어서 재생
+BATCH_OUT_SIZE = 6
+
+# 섹션별로 새로 그리는 필드 (trace 키 또는 trace["params"] 키). 섹션의 sub-IR은 자기 필드 + 앞 섹션 필드 전부
+# (앞 섹션이 남긴 화면 상태도 시작 프레임에 영향을 주므로). params 전체는 넣지 않는다
+# → 셀 모드에서 kernel_size / stride가 바뀌어도 패딩 입력과 feature map 크기가 같으면
+#   input 섹션은 캐시에서 재사용되고 conv 이후만 다시 렌더된다.
+CNN_SECTION_DEPS = (
+    ("input", ("padding", "padded", "out_size")),
+    ("conv", ("kernel_size", "stride", "kernel", "feature_map")),
+    ("relu", ("relu_mask", "relu")),
+    ("pool", ("pool_size", "pooled")),
+    ("flatten", ("flatten",)),
+    ("dense", ("dense_w", "softmax")),
+    ("softmax", ()),
+)
+# 히트맵 모드는 input 섹션 제목에 conv 설정을 같이 쓴다
+HEATMAP_INPUT_DEPS = ("input_size", "kernel_size", "stride")
+
+
+def cnn_sections(trace: dict, heatmap: bool = False) -> list:
+    """trace → [(섹션 이름, sub-IR)] (app.sections.render_sectioned 입력)."""
+    params = trace["params"]
+    sections, seen = [], {}
+    for name, keys in CNN_SECTION_DEPS:
+        if name == "input" and heatmap:
+            keys = keys + HEATMAP_INPUT_DEPS
+        seen.update({k: params[k] if k in params else trace.get(k) for k in keys})
+        sections.append((name, dict(seen)))
+    return sections
+
+
+def render_cnn_matrix(cfg: dict, out_basename="cnn_param_demo", fmt="mp4", token=None, trace=None,
+                      mode: str = "auto", batched=None, job=None, quality: str = "l") -> str:
     """
     cfg 예시:
     {
@@ -18,34 +54,89 @@ def render_cnn_matrix(cfg: dict, out_basename="cnn_param_demo", fmt="mp4") -> st
       "padding": 1,
       "seed": 7
     }
+
+    trace: app.cnn_trace.build_cnn_trace(cfg) 결과. 없으면 여기서 계산한다.
+    씬은 trace의 값만 그리고, 수치 계산은 하지 않는다.
+
+    mode: "cells" | "heatmap" | "auto"
+      auto 이면 패딩 포함 입력 셀 수가 HEATMAP_CELL_THRESHOLD를 넘을 때 히트맵 모드.
+    batched: True 이면 슬라이딩/ReLU/풀링을 행·단계 단위 Succession/LaggedStart로 묶는다.
+      None 이면 out_size >= BATCH_OUT_SIZE 일 때 자동으로 켠다.
+    job: app.media_store.MediaJob. 없으면 새 job 디렉토리를 만들어서 그 안에 출력한다.
+    quality: manim 품질 플래그 (l / m / h / p / k)
     """
+    if trace is None:
+        trace = build_cnn_trace(cfg)
+
+    if mode == "auto":
+        use_heatmap = len(trace["padded"]) ** 2 > HEATMAP_CELL_THRESHOLD
+    else:
+        use_heatmap = mode == "heatmap"
+
+    if batched is None:
+        batched = trace["out_size"] >= BATCH_OUT_SIZE
 
 
     scene_template = r"""
 from manim import *
-import random, json
+import json, sys
 import numpy as np
 
-class CNNParamScene(Scene):
+PROJECT_ROOT = r"__PROJECT_ROOT__"
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.tex_cache import use_shared_tex_cache
+from app.layout_utils import (
+    SectionMixin,
+    EdgeBundle,
+    GrowEdges,
+    create_number,
+    create_heatmap,
+    heatmap_cell_center,
+    heatmap_region,
+    DIVERGING_COLORS,
+)
+
+use_shared_tex_cache()
+
+USE_HEATMAP = __HEATMAP_MODE__
+BATCHED = __BATCHED__
+
+
+# dense 간선 (출력 j, flatten i) 순서의 굵기 / 투명도. trace에 dense_w가 없으면 공통 값.
+def dense_edge_style(trace, n_out, n_flat):
+    if "dense_w" not in trace or not n_flat:
+        return 2.0, 0.4
+    w = np.abs(np.array(trace["dense_w"], dtype=float)).reshape(n_out, n_flat).reshape(-1)
+    return 0.5 + 2.5 * w, 0.1 + 0.5 * w
+
+
+class CNNParamScene(SectionMixin, Scene):
+    render_sections = __SECTIONS__
+
     def construct(self):
-        cfg = json.loads(r'''__CFG_JSON__''')
-        random.seed(cfg.get("seed", 7))
+        # 수치는 app.cnn_trace에서 미리 계산된 trace IR을 그대로 사용
+        trace = json.loads(r'''__TRACE_JSON__''')
+        params = trace["params"]
+
+        # 큰 입력은 셀마다 Square/Text를 만들지 않고 히트맵으로
+        if USE_HEATMAP:
+            self.construct_heatmap(trace)
+            return
 
-        input_size  = int(cfg.get("input_size", 4))
-        kernel_size = int(cfg.get("kernel_size", 3))
-        stride      = int(cfg.get("stride", 1))
-        padding     = int(cfg.get("padding", 1))
+        input_size  = params["input_size"]
+        kernel_size = params["kernel_size"]
+        stride      = params["stride"]
+        padding     = params["padding"]
 
         total = input_size + 2 * padding
-        out_size = (total - kernel_size)//stride + 1
+        out_size = trace["out_size"]
 
         cell, gap = 0.42, 0.02
 
         # (1) 입력 행렬 + 패딩
-        padded_vals = [[0]*total for _ in range(total)]
-        for r in range(input_size):
-            for c in range(input_size):
-                padded_vals[r+padding][c+padding] = random.randint(0,9)
+        padded_vals = trace["padded"]
 
         pad_grid = VGroup(*[
             Square(cell, color=GREY, fill_opacity=0.05)
@@ -66,17 +157,6 @@ class CNNParamScene(Scene):
         self.add(*[t for row in pad_texts for t in row])
 
         # (2) 출력 feature map
-        fmap_cells = []
-        fmap_texts = [[None for _ in range(out_size)] for _ in range(out_size)]
-
-        for i in range(out_size):
-            for j in range(out_size):
-                sq = Square(cell, color=BLUE, fill_opacity=0.15)
-                txt = MathTex("0").scale(0.45).set_color(WHITE)
-                txt.move_to(sq.get_center())
-                fmap_texts[i][j] = txt
-                fmap_cells.append(VGroup(sq, txt))
-
         fmap = VGroup(*[
             Square(cell, color=BLUE, fill_opacity=0.15)
             for _ in range(out_size*out_size)
@@ -89,24 +169,20 @@ class CNNParamScene(Scene):
         fmap_label = Text("Feature Map", color=BLUE_B, font_size=28)
         input_label.next_to(pad_grid, DOWN, buff=0.3)
         fmap_label.next_to(fmap, DOWN, buff=0.3)
+        self.begin_section("input")
         self.play(Write(input_label), Write(fmap_label))
 
 
-        # (3) 커널 및 계산 함수
-        kernel_vals = [[random.choice([-1,0,1]) for _ in range(kernel_size)] for _ in range(kernel_size)]
+        # (3) 커널 + 미리 계산된 feature map
+        kernel_vals = trace["kernel"]
+        fmap_vals = trace["feature_map"]
 
-        def patch_sum(i,j):
-            acc=0
-            terms=[]
-            for r in range(kernel_size):
-                for c in range(kernel_size):
-                    x = padded_vals[i*stride + r][j*stride + c]
-                    w = kernel_vals[r][c]
-                    acc += x*w
-                    terms.append((x,w))
-            return acc, terms
+        def patch_terms(i, j):
+            return [(padded_vals[i*stride + r][j*stride + c], kernel_vals[r][c])
+                    for r in range(kernel_size) for c in range(kernel_size)]
 
         # (4) 첫 번째 패치 시각화 (0,0)
+        self.begin_section("conv")
         patch_cells=[pad_grid[(0+r)*total+(0+c)] for r in range(kernel_size) for c in range(kernel_size)]
         patch_box=SurroundingRectangle(VGroup(*patch_cells), color=YELLOW)
         self.play(Create(patch_box))
@@ -133,7 +209,7 @@ class CNNParamScene(Scene):
                 k_texts.append(kt)
         self.add(*k_texts)
 
-        acc00, terms00 = patch_sum(0,0)
+        acc00, terms00 = fmap_vals[0][0], patch_terms(0, 0)
         term_exprs = [f"{x} \\times {w}" for (x, w) in terms00]
         eq_expr = " + ".join(term_exprs) + f" = {acc00}"
         eq_line = MathTex(eq_expr).scale(0.55)
@@ -145,96 +221,107 @@ class CNNParamScene(Scene):
         self.play(Write(eq_line), run_time=0.7)
 
         # (0,0) 결과 표시
-        t00 = MathTex(str(acc00)).scale(0.5).set_color(WHITE)
+        t00 = create_number(acc00, scale=0.5)
         t00.move_to(fmap[0].get_center())
-        fmap_texts[0][0] = t00
         self.play(FadeIn(t00))
         self.wait(0.4)
 
+        # fmap 숫자 mobject 인덱스 (씬 전체를 훑어서 찾지 않도록)
+        fmap_text_objects = {(0, 0): t00}
+
         # 커널 숫자, 글씨, 수식 제거
         self.play(FadeOut(VGroup(*k_texts)), FadeOut(eq_line), FadeOut(patch_box))
         self.play(FadeOut(kernel_label))
 
-        # === fmap의 수치 값 저장용 리스트 ===
-        fmap_vals = [[0 for _ in range(out_size)] for _ in range(out_size)]
+        def make_patch_box(i, j):
+            patch_cells = [pad_grid[(i*stride+r)*total + (j*stride+c)]
+                        for r in range(kernel_size) for c in range(kernel_size)]
+            patch_group = VGroup(*patch_cells)
+            return Rectangle(
+                width=patch_group.width + gap,
+                height=patch_group.height + gap,
+                stroke_color=YELLOW,
+                fill_color=YELLOW,
+                fill_opacity=0.18,
+                stroke_width=2
+            ).move_to(patch_group)
+
+        def make_fmap_text(i, j):
+            txt = create_number(fmap_vals[i][j], scale=0.45)
+            txt.move_to(fmap[i*out_size + j].get_center())
+            fmap_text_objects[(i, j)] = txt
+            return txt
 
         # (5) 이후 슬라이딩은 반투명 커널만 이동
-        for i in range(out_size):
-            for j in range(out_size):
-                if i == 0 and j == 0:
-                    continue
-
-                # 새 패치 위치 계산
-                patch_cells = [pad_grid[(i*stride+r)*total + (j*stride+c)]
-                            for r in range(kernel_size) for c in range(kernel_size)]
-                patch_group = VGroup(*patch_cells)
-                patch_box = Rectangle(
-                    width=patch_group.width + gap,
-                    height=patch_group.height + gap,
-                    stroke_color=YELLOW,
-                    fill_color=YELLOW,
-                    fill_opacity=0.18,
-                    stroke_width=2
-                ).move_to(patch_group)
-
-                # 커널 이동
-                self.play(ReplacementTransform(kernel_grid, patch_box), run_time=0.15)
-                kernel_grid = patch_box
-
-                # 결과 계산 및 저장
-                acc, _ = patch_sum(i, j)
-                fmap_vals[i][j] = acc
-
-                txt = MathTex(str(acc)).scale(0.45).set_color(WHITE)
-                txt.move_to(fmap[i*out_size + j].get_center())
-                self.play(FadeIn(txt), run_time=0.05)
+        if BATCHED:
+            # 행 하나를 Succession 한 번으로: 커널 이동 + 값 표시
+            patch_box = make_patch_box(0, 0)
+            self.play(ReplacementTransform(kernel_grid, patch_box), run_time=0.3)
+            for i in range(out_size):
+                steps = []
+                for j in range(out_size):
+                    if i == 0 and j == 0:
+                        continue
+                    target = make_patch_box(i, j)
+                    steps.append(AnimationGroup(
+                        patch_box.animate.move_to(target),
+                        FadeIn(make_fmap_text(i, j)),
+                    ))
+                if steps:
+                    self.play(Succession(*steps), run_time=0.15 * len(steps))
+        else:
+            for i in range(out_size):
+                for j in range(out_size):
+                    if i == 0 and j == 0:
+                        continue
+
+                    # 새 패치 위치 계산
+                    patch_box = make_patch_box(i, j)
+
+                    # 커널 이동
+                    self.play(ReplacementTransform(kernel_grid, patch_box), run_time=0.15)
+                    kernel_grid = patch_box
+
+                    self.play(FadeIn(make_fmap_text(i, j)), run_time=0.05)
 
         self.play(FadeOut(patch_box), run_time=0.3)
         self.wait(0.3)
 
 
         # === (6) ReLU Activation 단계 ===
+        self.begin_section("relu")
         relu_label = Text("ReLU Activation", color=YELLOW_B, font_size=32)
         relu_label.next_to(fmap, UP, buff=0.5)
         self.play(Write(relu_label))
 
-        relu_vals = [[0 for _ in range(out_size)] for _ in range(out_size)]
-
-        # 🔹 먼저 fmap 내 숫자 객체들을 따로 기록 (겹침 제거용)
-        fmap_text_objects = {}
-        for i in range(out_size):
-            for j in range(out_size):
-                # fmap 중심과 거의 일치하는 MathTex 찾기
-                for mob in self.mobjects:
-                    if isinstance(mob, MathTex):
-                        if np.allclose(mob.get_center(), fmap[i*out_size + j].get_center(), atol=0.02):
-                            fmap_text_objects[(i, j)] = mob
-                            break
+        relu_vals = trace["relu"]
+        relu_mask = trace["relu_mask"]
 
         # 🔹 음수인 값만 순서대로 처리
-        neg_indices = [(i, j) for i in range(out_size) for j in range(out_size) if fmap_vals[i][j] < 0]
+        neg_indices = [(i, j) for i in range(out_size) for j in range(out_size) if not relu_mask[i][j]]
 
+        neg_pairs = []
         for (i, j) in neg_indices:
             val = fmap_vals[i][j]
-            neg_txt = MathTex(str(val)).scale(0.5).set_color(RED)
-            zero_txt = MathTex("0").scale(0.5).set_color(GRAY)
+            neg_txt = create_number(val, scale=0.5, color=RED)
+            zero_txt = create_number(0, scale=0.5, color=GRAY)
             neg_txt.move_to(fmap[i*out_size + j].get_center())
             zero_txt.move_to(fmap[i*out_size + j].get_center())
 
-            # 기존 텍스트 제거 후 애니메이션
+            # 기존 텍스트 제거 (인덱스에서 바로 찾음)
             if (i, j) in fmap_text_objects:
                 self.remove(fmap_text_objects[(i, j)])
-
-            self.play(FadeIn(neg_txt), run_time=0.2)
-            self.play(Transform(neg_txt, zero_txt), run_time=0.3)
-            relu_vals[i][j] = 0
-
-        # 🔹 나머지 양수는 그대로 표시 유지
-        for i in range(out_size):
-            for j in range(out_size):
-                val = fmap_vals[i][j]
-                if val >= 0:
-                    relu_vals[i][j] = val
+            fmap_text_objects[(i, j)] = neg_txt
+            neg_pairs.append((neg_txt, zero_txt))
+
+        if BATCHED and neg_pairs:
+            # 음수 칸 전체를 LaggedStart 두 번으로
+            self.play(LaggedStart(*[FadeIn(n) for n, _ in neg_pairs], lag_ratio=0.1), run_time=0.6)
+            self.play(LaggedStart(*[Transform(n, z) for n, z in neg_pairs], lag_ratio=0.1), run_time=0.8)
+        else:
+            for neg_txt, zero_txt in neg_pairs:
+                self.play(FadeIn(neg_txt), run_time=0.2)
+                self.play(Transform(neg_txt, zero_txt), run_time=0.3)
 
         self.wait(0.5)
         self.play(FadeOut(relu_label))
@@ -243,36 +330,42 @@ class CNNParamScene(Scene):
 
 
         # === (7) Max Pooling 단계 ===
-        pool_size = 2
-        pooled_out = out_size // pool_size
+        self.begin_section("pool")
+        pool_size = trace["pool_size"]
+        pooled_vals = trace["pooled"]
+        pooled_out = len(pooled_vals)
         pool_label = Text("Max Pooling", color=YELLOW_B, font_size=32)
         pool_label.next_to(fmap, UP, buff=0.5)
         self.play(Write(pool_label))
 
         pooled_cells = []   # 2D 구조로 셀 저장
-        pooled_vals = [[0 for _ in range(pooled_out)] for _ in range(pooled_out)]
 
         for i in range(pooled_out):
             row_group = []
+            row_steps = []
             for j in range(pooled_out):
                 r0, c0 = i * pool_size, j * pool_size
-                vals = [relu_vals[r0+r][c0+c] for r in range(pool_size) for c in range(pool_size)]
-                max_val = max(vals)
-                pooled_vals[i][j] = max_val
+                max_val = pooled_vals[i][j]
 
                 patch_cells = [fmap[(r0+r)*out_size + (c0+c)] for r in range(pool_size) for c in range(pool_size)]
                 pool_box = SurroundingRectangle(VGroup(*patch_cells), color=YELLOW)
-                self.play(Create(pool_box), run_time=0.3)
 
                 sq = Square(cell, color=GREEN, fill_opacity=0.15)
-                txt = MathTex(str(max_val)).scale(0.5).set_color(WHITE)
+                txt = create_number(max_val, scale=0.5)
                 grp = VGroup(sq, txt)  # ✅ 사각형 + 숫자 묶기
                 grp.move_to(fmap.get_right() + RIGHT * (2.2 + j * (cell + gap)) + DOWN * (i * (cell + gap)))
 
-                self.play(FadeIn(grp), run_time=0.25)
-                self.play(FadeOut(pool_box), run_time=0.2)
+                if BATCHED:
+                    row_steps += [Create(pool_box), FadeIn(grp), FadeOut(pool_box)]
+                else:
+                    self.play(Create(pool_box), run_time=0.3)
+                    self.play(FadeIn(grp), run_time=0.25)
+                    self.play(FadeOut(pool_box), run_time=0.2)
 
                 row_group.append(grp)  # ✅ 각 행에 추가
+            if row_steps:
+                # 풀링 창 한 행을 Succession 한 번으로
+                self.play(Succession(*row_steps), run_time=0.25 * len(row_steps))
             pooled_cells.append(row_group)  # ✅ 행 단위로 저장
 
         # VGroup으로 전체 풀링 맵 생성
@@ -287,13 +380,14 @@ class CNNParamScene(Scene):
 
 
         # === (8) Flatten 단계 ===
+        self.begin_section("flatten")
 
         # 1) Conv~Pool 블록 전체를 왼쪽으로 크게 이동해서 flatten 공간 확보
         conv_group = VGroup(
             pad_grid,
             *[t for row in pad_texts for t in row],  # 입력 숫자
             fmap,
-            *[m for m in self.mobjects if isinstance(m, MathTex)],  # ✅ ReLU 이후 숫자들도 함께 이동
+            *fmap_text_objects.values(),  # ✅ ReLU 이후 숫자들도 함께 이동
             pooled_map,
             input_label,
             fmap_label,
@@ -307,17 +401,13 @@ class CNNParamScene(Scene):
 
         # 3) Flatten 칸 + 숫자 쌍으로 생성
         flat_pairs = []
-        flat_values = []
-
-        for i in range(len(pooled_vals)):
-            for j in range(len(pooled_vals[0])):
-                v = pooled_vals[i][j]
-                flat_values.append(v)
-                sq = Square(cell * 0.8, color=PURPLE, fill_opacity=0.15)
-                t = MathTex(str(v)).scale(0.45).set_color(WHITE)
-                t.move_to(sq.get_center())  # ✅ 숫자를 각 사각형 중심으로 이동
-                pair = VGroup(sq, t)
-                flat_pairs.append(pair)
+
+        for v in trace["flatten"]:
+            sq = Square(cell * 0.8, color=PURPLE, fill_opacity=0.15)
+            t = create_number(v, scale=0.45)
+            t.move_to(sq.get_center())  # ✅ 숫자를 각 사각형 중심으로 이동
+            pair = VGroup(sq, t)
+            flat_pairs.append(pair)
 
         # 일렬로 나열
         flattened_group = VGroup(*flat_pairs).arrange(RIGHT, buff=0.1)
@@ -332,38 +422,37 @@ class CNNParamScene(Scene):
 
 
         # === (9) Fully Connected Layer (Dense) ===
+        self.begin_section("dense")
         dense_label = Text("Fully Connected Layer", color=PURPLE_B, font_size=30)
         dense_label.next_to(flattened_group, UP, buff=0.4)
         self.play(Write(dense_label))
 
         output_nodes = VGroup(*[
             Circle(radius=cell * 0.3, color=PURPLE_B, fill_opacity=0.2)
-            for _ in range(3)
+            for _ in trace["softmax"]
         ]).arrange(DOWN, buff=0.3)
         output_nodes.next_to(flattened_group, RIGHT, buff=1.5)
         self.play(FadeIn(output_nodes))
 
-        # Flatten → Dense 연결선 (단순히 몇 개만)
-        connections = VGroup()
-        for i in range(0, len(flattened_group), max(1, len(flattened_group)//5)):
-            for node in output_nodes:
-                line = Line(flattened_group[i].get_right(), node.get_left(), stroke_color=GRAY, stroke_opacity=0.4)
-                connections.add(line)
-        self.play(Create(connections), run_time=1.2)
+        # Flatten → Dense 완전 연결 (간선 묶음 하나, |가중치|에 비례한 굵기 / 투명도)
+        widths, opacities = dense_edge_style(trace, len(output_nodes), len(flattened_group))
+        connections = EdgeBundle(
+            [cell.get_top() for node in output_nodes for cell in flattened_group],
+            [node.get_left() for node in output_nodes for _ in flattened_group],
+            widths=widths, opacities=opacities, color=GRAY, buff=0.05,
+        )
+        self.play(GrowEdges(connections), run_time=1.2)
         self.wait(0.5)
         self.play(FadeOut(dense_label))
 
         # === (10) Softmax 단계 ===
+        self.begin_section("softmax")
         softmax_label = Text("Softmax", color=BLUE_B, font_size=30)
         softmax_label.next_to(output_nodes, UP, buff=0.4)
         self.play(Write(softmax_label))
 
-        # 각 노드의 raw 출력값 (Dense 결과)
-        import math
-        fc_outputs = [random.uniform(-2, 2) for _ in range(3)]
-        exp_vals = [math.exp(v) for v in fc_outputs]
-        sum_exp = sum(exp_vals)
-        softmax_vals = [e / sum_exp for e in exp_vals]
+        # Dense 출력에 대한 softmax (trace에서 계산됨)
+        softmax_vals = trace["softmax"]
 
         # Softmax 막대 시각화
         softmax_bars = VGroup()
@@ -407,18 +496,225 @@ class CNNParamScene(Scene):
         self.play(Indicate(highlight_bar, color=YELLOW), run_time=1.0)
         self.wait(1.2)
 
+    # === 대형 입력용 히트맵 모드 ===
+    def construct_heatmap(self, trace):
+        params = trace["params"]
+        padding = params["padding"]
+        k = params["kernel_size"]
+        stride = params["stride"]
+
+        padded = np.array(trace["padded"])
+        kernel = np.array(trace["kernel"])
+        fmap_vals = np.array(trace["feature_map"])
+        relu_vals = np.array(trace["relu"])
+        pooled_vals = np.array(trace["pooled"])
+        total = padded.shape[0]
+        out_size = trace["out_size"]
+        pool_size = trace["pool_size"]
+        pooled_out = pooled_vals.shape[0] if pooled_vals.size else 0
+
+        side = 3.4  # 각 히트맵의 한 변 길이
+        fmax = max(int(np.abs(fmap_vals).max()), 1)
+
+        title = Text(
+            f"Conv {params['input_size']}x{params['input_size']} * {k}x{k} "
+            f"(stride={stride}, padding={padding})",
+            font_size=28, color=YELLOW_B,
+        ).to_edge(UP, buff=0.3)
+
+        # (1) 입력(패딩 포함) / feature map 히트맵
+        input_map = create_heatmap(padded, cell_size=side / total, vmin=0, vmax=9)
+        input_map.move_to(LEFT * 4.3 + DOWN * 0.3)
+        core = heatmap_region(
+            input_map, total, total, padding, padding,
+            params["input_size"], params["input_size"],
+            stroke_color=GREY, stroke_width=1,
+        )
+        fmap_frame = Square(side, color=BLUE, stroke_width=1).move_to(DOWN * 0.3)
+        input_label = Text("Input", color=GRAY_B, font_size=26).next_to(input_map, DOWN, buff=0.25)
+        fmap_label = Text("Feature Map", color=BLUE_B, font_size=26).next_to(fmap_frame, DOWN, buff=0.25)
+        self.begin_section("input")
+        self.play(Write(title), FadeIn(input_map), Create(core), Create(fmap_frame),
+                  Write(input_label), Write(fmap_label))
+
+        # (2) 첫 패치: 현재 커널 위치에만 숫자 오버레이
+        self.begin_section("conv")
+        box = heatmap_region(input_map, total, total, 0, 0, k, k,
+                             stroke_color=YELLOW, stroke_width=3)
+        overlay = VGroup()
+        if k <= 7:
+            for r in range(k):
+                for c in range(k):
+                    t = Text(str(padded[r, c]), font_size=14, color=YELLOW)
+                    t.move_to(heatmap_cell_center(input_map, total, total, r, c))
+                    overlay.add(t)
+        eq = MathTex(r"\sum x \cdot w = " + str(fmap_vals[0, 0])).scale(0.6)
+        eq.next_to(input_map, UP, buff=0.3)
+        kernel_text = MathTex(
+            r"\begin{bmatrix}" + r"\\".join(" & ".join(str(v) for v in row) for row in kernel)
+            + r"\end{bmatrix}"
+        ).scale(0.5) if k <= 5 else Text(f"kernel {k}x{k}", font_size=22)
+        kernel_text.set_color(YELLOW).next_to(eq, RIGHT, buff=0.5)
+        self.play(Create(box), FadeIn(overlay), Write(kernel_text), Write(eq), run_time=0.8)
+        self.wait(0.4)
+        self.play(FadeOut(overlay), FadeOut(eq), run_time=0.3)
+
+        # (3) 행 단위 sweep: 커널 박스가 한 행을 훑는 동안 해당 행 결과가 나타남
+        fmap_cell = side / out_size
+        row_strips = Group()
+        sweep_time = min(0.6, max(0.1, 20.0 / out_size))
+        for i in range(out_size):
+            start = heatmap_region(input_map, total, total, i * stride, 0, k, k)
+            end = heatmap_region(input_map, total, total, i * stride, (out_size - 1) * stride, k, k)
+            strip = create_heatmap(
+                fmap_vals[i:i + 1], cell_size=fmap_cell,
+                colors=DIVERGING_COLORS, vmin=-fmax, vmax=fmax,
+            )
+            strip.move_to(fmap_frame.get_top() + DOWN * (i + 0.5) * fmap_cell)
+            row_strips.add(strip)
+            box.move_to(start)
+            self.play(
+                box.animate(rate_func=linear).move_to(end),
+                FadeIn(strip),
+                run_time=sweep_time,
+            )
+        self.play(FadeOut(box), FadeOut(kernel_text), run_time=0.3)
+
+        fmap_img = create_heatmap(
+            fmap_vals, cell_size=fmap_cell,
+            colors=DIVERGING_COLORS, vmin=-fmax, vmax=fmax,
+        ).move_to(fmap_frame)
+        self.add(fmap_img)
+        self.remove(*row_strips)
+
+        # (4) ReLU: 음수(빨강) 칸을 한 번에 0(검정)으로
+        self.begin_section("relu")
+        relu_label = Text("ReLU Activation", color=YELLOW_B, font_size=28)
+        relu_label.next_to(fmap_frame, UP, buff=0.3)
+        relu_img = create_heatmap(
+            relu_vals, cell_size=fmap_cell,
+            colors=DIVERGING_COLORS, vmin=-fmax, vmax=fmax,
+        ).move_to(fmap_frame)
+        self.play(Write(relu_label))
+        self.play(FadeTransform(fmap_img, relu_img), run_time=0.8)
+        self.wait(0.3)
+        self.play(FadeOut(relu_label))
 
+        # (5) Max Pooling
+        self.begin_section("pool")
+        pool_label = Text(f"Max Pooling {pool_size}x{pool_size}", color=YELLOW_B, font_size=28)
+        pool_label.next_to(fmap_frame, UP, buff=0.3)
+        self.play(Write(pool_label))
+        pooled_img = None
+        if pooled_out:
+            pmax = max(int(pooled_vals.max()), 1)
+            pooled_img = create_heatmap(
+                pooled_vals, cell_size=min(side / pooled_out, 0.42),
+                colors=(BLACK, GREEN), vmin=0, vmax=pmax,
+            )
+            pooled_img.move_to(RIGHT * 4.3 + DOWN * 0.3)
+            window = heatmap_region(relu_img, out_size, out_size, 0, 0, pool_size, pool_size,
+                                    stroke_color=YELLOW, stroke_width=2)
+            last = heatmap_region(relu_img, out_size, out_size,
+                                  (pooled_out - 1) * pool_size, (pooled_out - 1) * pool_size,
+                                  pool_size, pool_size)
+            self.play(Create(window), run_time=0.3)
+            self.play(
+                window.animate.move_to(last),
+                # ImageMobject끼리는 픽셀 shape가 같아야 보간되므로 (out → pooled) 페이드로 넘긴다
+                FadeTransform(relu_img.copy(), pooled_img),
+                run_time=1.2,
+            )
+            self.play(FadeOut(window), run_time=0.2)
+        self.wait(0.3)
+        self.play(FadeOut(pool_label))
 
-"""
+        # (6) Flatten → Dense → Softmax
+        self.begin_section("flatten")
+        self.play(
+            FadeOut(input_map), FadeOut(core), FadeOut(input_label),
+            FadeOut(relu_img), FadeOut(fmap_frame), FadeOut(fmap_label),
+            *([pooled_img.animate.move_to(LEFT * 4.5 + UP * 0.5)] if pooled_img else []),
+            run_time=0.8,
+        )
+        flat = np.array(trace["flatten"])
+        flatten_label = Text(f"Flatten ({flat.size})", color=PURPLE_B, font_size=26)
+        flat_img = None
+        if flat.size:
+            flat_img = create_heatmap(
+                flat, cell_size=min(6.0 / flat.size, 0.3),
+                colors=(BLACK, PURPLE_B), vmin=0, vmax=max(int(flat.max()), 1),
+            )
+            flat_img.stretch_to_fit_height(0.4).move_to(LEFT * 1.0 + DOWN * 1.8)
+            flatten_label.next_to(flat_img, UP, buff=0.2)
+            self.play(FadeTransform(pooled_img.copy(), flat_img), Write(flatten_label), run_time=1.0)
+
+        self.begin_section("dense")
+        softmax_vals = trace["softmax"]
+        output_nodes = VGroup(*[
+            Circle(radius=0.18, color=PURPLE_B, fill_opacity=0.2) for _ in softmax_vals
+        ]).arrange(DOWN, buff=0.3).move_to(RIGHT * 3.0 + DOWN * 0.3)
+        dense_label = Text("Fully Connected Layer", color=PURPLE_B, font_size=26)
+        dense_label.next_to(output_nodes, UP, buff=0.4)
+        # flatten 칸마다 모든 출력으로 (간선 수천 개여도 묶음 하나)
+        anims = [FadeIn(output_nodes), Write(dense_label)]
+        if flat_img is not None:
+            n_flat = flat.size
+            xs = flat_img.get_left()[0] + (np.arange(n_flat) + 0.5) * flat_img.width / n_flat
+            tops = np.stack([xs, np.full(n_flat, flat_img.get_top()[1]), np.zeros(n_flat)], axis=1)
+            widths, opacities = dense_edge_style(trace, len(output_nodes), n_flat)
+            lines = EdgeBundle(
+                np.tile(tops, (len(output_nodes), 1)),
+                np.repeat([node.get_left() for node in output_nodes], n_flat, axis=0),
+                widths=widths * 0.5, opacities=opacities, color=GRAY,
+            )
+            anims.append(GrowEdges(lines))
+        self.play(*anims, run_time=1.0)
+        self.play(FadeOut(dense_label))
+
+        self.begin_section("softmax")
+        bars = VGroup()
+        for node, val in zip(output_nodes, softmax_vals):
+            bar = Rectangle(height=0.8 * val + 0.2, width=0.35,
+                            fill_color=BLUE, fill_opacity=0.6, stroke_color=WHITE)
+            bar.next_to(node, RIGHT, buff=0.4)
+            bars.add(bar)
+        softmax_label = Text("Softmax", color=BLUE_B, font_size=26).next_to(bars, UP, buff=0.4)
+        self.play(Write(softmax_label), TransformFromCopy(output_nodes, bars), run_time=1.0)
+
+        max_idx = int(np.argmax(softmax_vals))
+        self.play(bars[max_idx].animate.set_fill(color=YELLOW, opacity=0.9), run_time=0.5)
+        pred_label = Text(f"Predicted Class: {max_idx + 1}", font_size=26, color=YELLOW_B)
+        pred_label.next_to(bars, RIGHT, buff=0.4)
+        self.play(Write(pred_label))
+        self.wait(1.2)
 
-    scene_code = scene_template.replace("__CFG_JSON__", json.dumps(cfg))
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp:
-        tmp.write(scene_code)
-        tmp_path = tmp.name
 
-    cmd = ["manim", "-ql", tmp_path, "CNNParamScene", "--format", fmt, "-o", f"{out_basename}.{fmt}"]
-    subprocess.run(cmd, check=True)
+"""
 
-    video_path = MEDIA_DIR / f"{out_basename}.{fmt}"
-    return str(video_path)
+    def build(sections):
+        return (
+            scene_template
+            .replace("__TRACE_JSON__", json.dumps(trace))
+            .replace("__PROJECT_ROOT__", str(PROJECT_ROOT))
+            .replace("__HEATMAP_MODE__", repr(use_heatmap))
+            .replace("__BATCHED__", repr(bool(batched)))
+            .replace("__SECTIONS__", repr(sections))
+        )
+
+    with job_scope(job, "cnn") as job:
+        result = render_sectioned(
+            "cnn",
+            scene_template,
+            build,
+            "CNNParamScene",
+            cnn_sections(trace, use_heatmap),
+            job,
+            out_basename,
+            variant={"heatmap": use_heatmap, "batched": bool(batched)},
+            quality=quality,
+            fmt=fmt,
+            token=token,
+        )
+    return result["path"]
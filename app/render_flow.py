@@ -0,0 +1,336 @@
+# app/render_flow.py
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.graph_layout import graph_layout
+from app.media_store import job_scope
+from app.sections import render_sectioned
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 한 화면에 그릴 수 있는 엔티티 / 연산 수 상한 (넘으면 IR을 만들지 않음 → 에러)
+MAX_FLOW_ENTITIES = 16
+MAX_FLOW_OPS = 120
+# row / column 배치에 넣을 최대 노드 수 (넘으면 간선이 있으면 graph, 없으면 격자)
+ROW_MAX = 5
+COLUMN_MAX = 4
+# graph 배치의 노드 높이 (create_box_node 기본값)
+NODE_HEIGHT = 0.6
+# 섹션 하나에 들어가는 연산 수
+SECTION_OPS = 12
+LABEL_MAX = 18
+CAPTION_MAX = 70
+
+# 도메인별 선호 배치 (없으면 row)
+DOMAIN_LAYOUT = {
+    "math": "column",
+    "pipeline": "row",
+    "cache": "row",
+}
+
+# action 동사 → 애니메이션 종류. 첫 단어(snake_case / 공백 기준)로 판단한다.
+CREATE_ACTIONS = frozenset({
+    "create", "initialize", "init", "add", "insert", "spawn", "allocate", "push", "new", "define", "start",
+})
+FADE_ACTIONS = frozenset({
+    "remove", "delete", "evict", "fade", "pop", "drop", "discard", "free", "destroy", "clear", "invalidate",
+})
+
+
+def _verb(action: str) -> str:
+    words = [w for w in re.split(r"[^a-z]+", (action or "").lower()) if w]
+    return words[0] if words else ""
+
+
+def _label(entity: Dict[str, Any]) -> str:
+    attrs = entity.get("attributes") or {}
+    text = str(attrs.get("label") or entity["id"]).replace("_", " ")
+    return text if len(text) <= LABEL_MAX else text[: LABEL_MAX - 1] + "…"
+
+
+def _caption(op: Dict[str, Any]) -> str:
+    text = op.get("description") or " ".join(
+        str(p) for p in (op.get("subject"), op.get("action"), op.get("target")) if p
+    )
+    text = str(text).replace("_", " ")
+    return text if len(text) <= CAPTION_MAX else text[: CAPTION_MAX - 1] + "…"
+
+
+def build_flow_ir(pseudo_ir: Dict[str, Any], layout: str = "auto") -> Dict[str, Any]:
+    """
+    pseudocode IR(entities / operations) → FLOW 씬 입력.
+
+    {
+      "title": "LRU Cache",
+      "layout": "row" | "column" | "grid" | "graph", "rows": 1, "cols": 3,
+      "positions": [[x, y], ...],                   # graph 배치일 때만 (app.graph_layout)
+      "entities": [{"id": "cache", "label": "cache", "type": "store", "width": 1.4, "deferred": false}, ...],
+      "edges": [[0, 1], ...],                       # subject → target 쌍 (처음 나온 순서)
+      "ops": [{"kind": "flow", "subject": 0, "target": 1, "caption": "..."}, ...]
+    }
+
+    kind: create (노드 등장) / flow (subject → target 화살표 + 점 이동) / highlight / fade (흐리게)
+    연산에만 나오는 id도 엔티티로 추가한다. 처음 등장이 create면 deferred (그때 화면에 나타남).
+    엔티티 / 연산이 없거나 너무 많으면 ValueError.
+    """
+    entities: List[Dict[str, Any]] = []
+    index: Dict[str, int] = {}
+
+    def entity(eid: Any, source: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        if eid is None or eid == "":
+            return None
+        eid = str(eid)
+        if eid not in index:
+            src = {"id": eid, **(source or {})}
+            index[eid] = len(entities)
+            label = _label(src)
+            entities.append({
+                "id": eid,
+                "label": label,
+                "type": str(src.get("type", "")),
+                "width": round(max(1.2, 0.16 * len(label) + 0.4), 2),
+                "deferred": False,
+            })
+        return index[eid]
+
+    for e in pseudo_ir.get("entities", []) or []:
+        if isinstance(e, dict) and e.get("id"):
+            entity(e["id"], e)
+
+    ops: List[Dict[str, Any]] = []
+    edges: List[List[int]] = []
+    first_use: Dict[int, str] = {}
+    raw_ops = [o for o in pseudo_ir.get("operations", []) or [] if isinstance(o, dict) and o.get("subject")]
+    raw_ops.sort(key=lambda o: o.get("step", 0) if isinstance(o.get("step"), (int, float)) else 0)
+    for o in raw_ops:
+        s = entity(o["subject"])
+        t = entity(o.get("target"))
+        verb = _verb(o.get("action", ""))
+        if verb in FADE_ACTIONS:
+            kind = "fade"
+        elif t is not None and t != s:
+            kind = "flow"
+            if [s, t] not in edges:
+                edges.append([s, t])
+        elif verb in CREATE_ACTIONS:
+            kind = "create"
+        else:
+            kind = "highlight"
+        for k in (s, t):
+            if k is not None:
+                first_use.setdefault(k, kind if k == s else "target")
+        ops.append({"kind": kind, "subject": s, "target": t if t != s else None, "caption": _caption(o)})
+
+    if not entities:
+        raise ValueError("flow IR needs at least one entity")
+    if len(entities) > MAX_FLOW_ENTITIES:
+        raise ValueError(f"too many entities for a flow diagram ({len(entities)} > {MAX_FLOW_ENTITIES})")
+    if len(ops) > MAX_FLOW_OPS:
+        raise ValueError(f"too many operations for a flow diagram ({len(ops)} > {MAX_FLOW_OPS})")
+    for k, use in first_use.items():
+        entities[k]["deferred"] = use == "create"
+
+    n = len(entities)
+    domain = (pseudo_ir.get("metadata") or {}).get("domain")
+    if layout == "auto":
+        layout = DOMAIN_LAYOUT.get(domain, "row")
+        if (layout == "row" and n > ROW_MAX) or (layout == "column" and n > COLUMN_MAX):
+            # 간선이 있으면 격자 대신 간선 방향을 따르는 계층 / 힘 기반 배치
+            layout = "graph" if edges else "grid"
+    cols = {"row": n, "column": 1}.get(layout, math.ceil(math.sqrt(n)))
+    rows = math.ceil(n / cols)
+
+    title = (pseudo_ir.get("metadata") or {}).get("title") or "Flow"
+    flow_ir = {
+        "title": str(title),
+        "layout": layout,
+        "rows": rows,
+        "cols": cols,
+        "entities": entities,
+        "edges": edges,
+        "ops": ops,
+    }
+    if layout == "graph":
+        # 좌표는 호스트에서 계산 (캡션 / 제목 자리를 빼고 프레임 안에)
+        sizes = [(e["width"], NODE_HEIGHT) for e in entities]
+        pos = graph_layout(n, edges, sizes, direction="TB" if domain == "math" else "LR", height=5.0)
+        flow_ir["positions"] = [[round(float(x), 3), round(float(y), 3)] for x, y, _ in pos]
+    return flow_ir
+
+
+def flow_sections(flow_ir: Dict[str, Any]) -> list:
+    """
+    flow IR → [(섹션 이름, sub-IR)] (app.sections.render_sectioned 입력).
+    intro(배치) / ops_0 / ops_1 / ... / done. ops_k에는 지금까지의 연산 누적 해시.
+    """
+    base = {k: flow_ir[k] for k in ("title", "layout", "rows", "cols", "entities", "edges")}
+    if "positions" in flow_ir:
+        base["positions"] = flow_ir["positions"]
+    sections = [("intro", base)]
+    digest = hashlib.sha256()
+    ops = flow_ir["ops"]
+    for k, start in enumerate(range(0, len(ops), SECTION_OPS)):
+        digest.update(json.dumps(ops[start:start + SECTION_OPS], sort_keys=True).encode("utf-8"))
+        sections.append((f"ops_{k}", {**base, "prefix": digest.hexdigest()}))
+    sections.append(("done", {**base, "prefix": digest.hexdigest()}))
+    return sections
+
+
+def render_flow(flow_ir: dict, out_basename: str = "flow_demo", fmt: str = "mp4", token=None,
+                job=None, quality: str = "l") -> str:
+    """
+    flow_ir: build_flow_ir(pseudocode IR) 결과.
+    엔티티는 create_box_node, 배치는 layout_row / layout_column / layout_grid (graph면 미리 계산된 positions),
+    간선은 connect_nodes. 연산을 하나씩 재생하면서 아래에 설명(caption)을 띄운다.
+
+    job: app.media_store.MediaJob. 없으면 새 job 디렉토리를 만들어서 그 안에 출력한다.
+    quality: manim 품질 플래그 (l / m / h / p / k)
+    """
+    scene_template = r"""
+from manim import *
+import json, sys
+
+PROJECT_ROOT = r"__PROJECT_ROOT__"
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.tex_cache import use_shared_tex_cache
+from app.layout_utils import (
+    SectionMixin,
+    LayoutMixin,
+    cached_text,
+    create_box_node,
+    connect_nodes,
+    layout_row,
+    layout_column,
+    layout_grid,
+    autorescale_group,
+    mobject_cache_stats,
+)
+
+use_shared_tex_cache()
+
+SECTION_OPS = __SECTION_OPS__
+DIM_OPACITY = 0.25
+
+
+class FlowScene(SectionMixin, Scene, LayoutMixin):
+    render_sections = __SECTIONS__
+
+    def construct(self):
+        data = json.loads(r'''__FLOW_JSON__''')
+        ents = data["entities"]
+
+        # === 1. 제목 + 엔티티 배치 ===
+        self.begin_section("intro")
+        title = Text(data["title"], font_size=32, color=YELLOW_B)
+        title.to_edge(UP, buff=0.4)
+        self.play(Write(title))
+
+        nodes = [create_box_node(e["label"], width=e["width"]) for e in ents]
+        if data["layout"] == "row":
+            group = layout_row(nodes)
+        elif data["layout"] == "column":
+            group = layout_column(nodes)
+        elif data["layout"] == "graph":
+            for node, (x, y) in zip(nodes, data["positions"]):
+                node.move_to([x, y, 0])
+            group = VGroup(*nodes)
+        else:
+            group = layout_grid(nodes, rows=data["rows"], cols=data["cols"])
+        autorescale_group(group, max_height=5.0)
+        group.shift(DOWN * 0.2)
+
+        # 간선은 처음 흐를 때 그린다
+        arrows = {(a, b): connect_nodes(nodes[a], nodes[b]) for a, b in data["edges"]}
+        drawn = set()
+        shown = {k for k, e in enumerate(ents) if not e["deferred"]}
+        self.play(FadeIn(VGroup(*[nodes[k] for k in sorted(shown)]), lag_ratio=0.1), run_time=0.8)
+
+        caption = None
+
+        # === 2. 연산 재생 ===
+        for step_idx, op in enumerate(data["ops"]):
+            if step_idx % SECTION_OPS == 0:
+                self.begin_section(f"ops_{step_idx // SECTION_OPS}")
+            s, t = op["subject"], op["target"]
+
+            # (a) 준비: 설명 교체 + 아직 안 보이는 노드 / 간선 등장
+            setup = []
+            new_caption = cached_text(op["caption"], font_size=22, color=GRAY_B)
+            if new_caption.width > config.frame_width - 1.0:
+                new_caption.scale_to_fit_width(config.frame_width - 1.0)
+            new_caption.to_edge(DOWN, buff=0.4)
+            setup.append(FadeIn(new_caption) if caption is None else FadeTransform(caption, new_caption))
+            caption = new_caption
+            for k in (s, t):
+                if k is not None and k not in shown and not (k == s and op["kind"] == "create"):
+                    setup.append(FadeIn(nodes[k], shift=UP * 0.2))
+                    shown.add(k)
+            if op["kind"] == "flow" and (s, t) not in drawn:
+                setup.append(Create(arrows[(s, t)]))
+                drawn.add((s, t))
+            self.play(*setup, run_time=0.4)
+
+            # (b) 동작
+            if op["kind"] == "create":
+                if s in shown:
+                    self.play(Indicate(nodes[s], color=YELLOW), run_time=0.6)
+                else:
+                    self.play(FadeIn(nodes[s], scale=0.8), run_time=0.6)
+                    shown.add(s)
+            elif op["kind"] == "flow":
+                arrow = arrows[(s, t)]
+                dot = Dot(arrow.get_start(), color=YELLOW, radius=0.08)
+                self.play(
+                    Succession(
+                        MoveAlongPath(dot, Line(arrow.get_start(), arrow.get_end())),
+                        Indicate(nodes[t], color=YELLOW),
+                    ),
+                    run_time=1.0,
+                )
+                self.remove(dot)
+            elif op["kind"] == "fade":
+                k = t if t is not None else s
+                self.play(nodes[k].animate.set_opacity(DIM_OPACITY), run_time=0.5)
+            else:
+                self.play(Indicate(nodes[s], color=YELLOW), run_time=0.6)
+
+        # === 3. 마무리 ===
+        self.begin_section("done")
+        if caption is not None:
+            self.play(FadeOut(caption), run_time=0.3)
+        self.wait(1.2)
+        print(f"mobject cache: {mobject_cache_stats()}")
+"""
+
+    def build(sections):
+        return (
+            scene_template
+            # 설명 문장의 작은따옴표가 r'''...''' 를 닫지 않도록 이스케이프
+            .replace("__FLOW_JSON__", json.dumps(flow_ir, ensure_ascii=False).replace("'", "\\u0027"))
+            .replace("__PROJECT_ROOT__", str(PROJECT_ROOT))
+            .replace("__SECTION_OPS__", str(SECTION_OPS))
+            .replace("__SECTIONS__", repr(sections))
+        )
+
+    with job_scope(job, "flow") as job:
+        result = render_sectioned(
+            "flow",
+            scene_template,
+            build,
+            "FlowScene",
+            flow_sections(flow_ir),
+            job,
+            out_basename,
+            quality=quality,
+            fmt=fmt,
+            token=token,
+        )
+    return result["path"]
@@ -0,0 +1,237 @@
+# app/render_grid.py
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.media_store import job_scope
+from app.sections import render_sectioned
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 섹션 하나에 들어가는 step 수
+SECTION_STEPS = 10
+# step 수가 이 값 이상이면 같은 행을 채우는 step들을 Succession 한 번으로 묶어서 재생
+BATCH_STEPS = 30
+
+
+def step_groups(grid_trace: Dict[str, Any], batched: bool) -> List[List[int]]:
+    """
+    재생 단위(play)로 묶을 step 인덱스 목록.
+    batched면 같은 행렬의 같은 행에 쓰는 연속 step을 한 묶음으로 (섹션 경계는 넘지 않음).
+    """
+    steps = grid_trace["steps"]
+    if not batched:
+        return [[k] for k in range(len(steps))]
+    groups: List[List[int]] = []
+    prev = None
+    for k, step in enumerate(steps):
+        key = tuple(step["writes"][0][:2]) if step["writes"] else ("step", k)
+        if groups and key == prev and k % SECTION_STEPS != 0:
+            groups[-1].append(k)
+        else:
+            groups.append([k])
+        prev = key
+    return groups
+
+
+def grid_sections(grid_trace: Dict[str, Any]) -> list:
+    """
+    grid trace → [(섹션 이름, sub-IR)] (app.sections.render_sectioned 입력).
+    intro(행렬 + 초기값) / steps_0 / steps_1 / ... / done. steps_k에는 지금까지의 step 누적 해시.
+    """
+    base = {k: grid_trace[k] for k in ("title", "decimals", "matrices")}
+    sections = [("intro", base)]
+    digest = hashlib.sha256()
+    steps = grid_trace["steps"]
+    for k, start in enumerate(range(0, len(steps), SECTION_STEPS)):
+        digest.update(json.dumps(steps[start:start + SECTION_STEPS], sort_keys=True).encode("utf-8"))
+        sections.append((f"steps_{k}", {**base, "prefix": digest.hexdigest()}))
+    sections.append(("done", {**base, "prefix": digest.hexdigest()}))
+    return sections
+
+
+def render_grid(grid_trace: dict, out_basename: str = "grid_demo", fmt: str = "mp4", token=None,
+                batched=None, job=None, quality: str = "l") -> str:
+    """
+    grid_trace: app.grid_ir.build_grid_trace(grid IR) 결과. 씬은 값을 계산하지 않는다.
+    셀 / 라벨은 CNNParamScene과 같은 규칙 (Square 0.42 + arrange_in_grid, create_number, 아래쪽 라벨).
+    step마다 인자 범위를 하이라이트하고, 그 step에서 쓰는 칸 전체를 한 번에 채운다.
+
+    batched: True 이면 같은 행을 채우는 step들을 Succession 한 번으로 묶는다.
+      None 이면 step 수가 BATCH_STEPS 이상일 때 자동으로 켠다.
+    job: app.media_store.MediaJob. 없으면 새 job 디렉토리를 만들어서 그 안에 출력한다.
+    quality: manim 품질 플래그 (l / m / h / p / k)
+    """
+    if batched is None:
+        batched = len(grid_trace["steps"]) >= BATCH_STEPS
+    groups = step_groups(grid_trace, bool(batched))
+
+    scene_template = r"""
+from manim import *
+import json, sys
+
+PROJECT_ROOT = r"__PROJECT_ROOT__"
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.tex_cache import use_shared_tex_cache
+from app.layout_utils import (
+    SectionMixin,
+    LayoutMixin,
+    cached_text,
+    create_number,
+    autorescale_group,
+    mobject_cache_stats,
+)
+
+use_shared_tex_cache()
+
+SECTION_STEPS = __SECTION_STEPS__
+GROUPS = __GROUPS__
+CELL_COLORS = [GREY, YELLOW, BLUE, GREEN]
+LABEL_COLORS = [GRAY_B, YELLOW_B, BLUE_B, GREEN_B]
+
+
+class GridScene(SectionMixin, Scene, LayoutMixin):
+    render_sections = __SECTIONS__
+
+    def construct(self):
+        # 수치는 app.grid_ir에서 미리 계산된 grid trace를 그대로 사용
+        data = json.loads(r'''__GRID_JSON__''')
+        decimals = data["decimals"]
+        num_scale = 0.45 if decimals == 0 else 0.3
+        cell, gap = 0.42, 0.02
+
+        # === 1. 제목 + 행렬 ===
+        self.begin_section("intro")
+        title = Text(data["title"], font_size=32, color=YELLOW_B)
+        title.to_edge(UP, buff=0.4)
+
+        grids, texts, blocks = [], [], []
+        for k, mat in enumerate(data["matrices"]):
+            rows, cols = mat["rows"], mat["cols"]
+            grid = VGroup(*[
+                Square(cell, color=CELL_COLORS[k % len(CELL_COLORS)], fill_opacity=0.15)
+                for _ in range(rows * cols)
+            ]).arrange_in_grid(rows=rows, cols=cols, buff=gap)
+            vals = {}
+            for r in range(rows):
+                for c in range(cols):
+                    v = mat["values"][r][c]
+                    if v is not None:
+                        vals[(r, c)] = create_number(v, decimals, scale=num_scale).move_to(grid[r * cols + c])
+            label = Text(mat["name"], color=LABEL_COLORS[k % len(LABEL_COLORS)], font_size=28)
+            label.next_to(grid, DOWN, buff=0.3)
+            heads = [
+                cached_text(t, font_size=20, color=GRAY_B).next_to(grid[r * cols], LEFT, buff=0.15)
+                for r, t in enumerate(mat["row_labels"])
+            ] + [
+                cached_text(t, font_size=20, color=GRAY_B).next_to(grid[c], UP, buff=0.15)
+                for c, t in enumerate(mat["col_labels"])
+            ]
+            grids.append(grid)
+            texts.append(vals)
+            blocks.append(VGroup(grid, label, *heads, *vals.values()))
+
+        board = VGroup(*blocks).arrange(RIGHT, buff=0.9)
+        width = board.width
+        autorescale_group(board, max_height=5.0)
+        board.shift(DOWN * 0.2)
+        # 나중에 쓰는 숫자도 같은 비율로
+        num_scale *= board.width / width
+
+        self.play(Write(title))
+        self.play(LaggedStart(*[FadeIn(b) for b in blocks], lag_ratio=0.2), run_time=0.8)
+
+        caption = None
+
+        def region_box(h):
+            m, r0, c0, r1, c1 = h
+            cols = data["matrices"][m]["cols"]
+            cells = [grids[m][r * cols + c] for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+            return SurroundingRectangle(VGroup(*cells), color=YELLOW, buff=0.03)
+
+        def write_anims(step):
+            anims = []
+            for m, r, c, v in step["writes"]:
+                sq = grids[m][r * data["matrices"][m]["cols"] + c]
+                new = create_number(v, decimals, scale=num_scale).move_to(sq)
+                old = texts[m].get((r, c))
+                anims.append(Transform(old, new) if old is not None else FadeIn(new, scale=0.8))
+                if old is None:
+                    texts[m][(r, c)] = new
+                anims.append(sq.animate.set_fill(opacity=0.35))
+            return anims
+
+        # === 2. step 재생 (step 하나 / 묶음 하나 = 같은 칸 갱신을 한 번에) ===
+        for group in GROUPS:
+            first = group[0]
+            if first % SECTION_STEPS == 0:
+                self.begin_section(f"steps_{first // SECTION_STEPS}")
+
+            new_caption = cached_text(data["steps"][first]["caption"], font_size=22, color=GRAY_B)
+            if new_caption.width > config.frame_width - 1.0:
+                new_caption.scale_to_fit_width(config.frame_width - 1.0)
+            new_caption.to_edge(DOWN, buff=0.3)
+            swap = FadeIn(new_caption) if caption is None else FadeTransform(caption, new_caption)
+            caption = new_caption
+
+            if len(group) == 1:
+                step = data["steps"][first]
+                boxes = [region_box(h) for h in step["highlights"]]
+                self.play(swap, *[Create(b) for b in boxes], run_time=0.4)
+                writes = write_anims(step)
+                if writes:
+                    self.play(LaggedStart(*writes, lag_ratio=0.05), run_time=0.6)
+                if boxes:
+                    self.play(*[FadeOut(b) for b in boxes], run_time=0.2)
+                continue
+
+            # 묶음: step마다 (하이라이트 + 칸 채우기) → 하이라이트 제거를 Succession 한 번으로
+            self.play(swap, run_time=0.2)
+            parts = []
+            for k in group:
+                step = data["steps"][k]
+                boxes = [region_box(h) for h in step["highlights"]]
+                parts.append(AnimationGroup(*[Create(b) for b in boxes], *write_anims(step)))
+                if boxes:
+                    parts.append(AnimationGroup(*[FadeOut(b) for b in boxes]))
+            self.play(Succession(*parts), run_time=0.25 * len(parts))
+
+        # === 3. 마무리 ===
+        self.begin_section("done")
+        if caption is not None:
+            self.play(FadeOut(caption), run_time=0.3)
+        self.wait(1.2)
+        print(f"mobject cache: {mobject_cache_stats()}")
+"""
+
+    def build(sections):
+        return (
+            scene_template
+            # 라벨 / 설명의 작은따옴표가 r'''...''' 를 닫지 않도록 이스케이프
+            .replace("__GRID_JSON__", json.dumps(grid_trace, ensure_ascii=False).replace("'", "\\u0027"))
+            .replace("__PROJECT_ROOT__", str(PROJECT_ROOT))
+            .replace("__SECTION_STEPS__", str(SECTION_STEPS))
+            .replace("__GROUPS__", repr(groups))
+            .replace("__SECTIONS__", repr(sections))
+        )
+
+    with job_scope(job, "grid") as job:
+        result = render_sectioned(
+            "grid",
+            scene_template,
+            build,
+            "GridScene",
+            grid_sections(grid_trace),
+            job,
+            out_basename,
+            variant={"batched": bool(batched)},
+            quality=quality,
+            fmt=fmt,
+            token=token,
+        )
+    return result["path"]
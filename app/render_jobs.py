@@ -0,0 +1,70 @@
+# app/render_jobs.py
+"""
+렌더 작업 실행기.
+
+렌더 작업 하나 = (renderer kind, IR, quality, 렌더러 인자). API 프로세스가 직접 렌더할 때와
+렌더 팜 워커(app.render_worker)가 큐에서 꺼낸 작업을 렌더할 때 같은 함수를 쓴다.
+인자는 모두 JSON으로 직렬화 가능해야 한다 (큐에 그대로 저장됨).
+
+kind → 렌더러는 app.renderers 레지스트리에서 찾는다 (렌더러별 동시 실행 상한도 거기서).
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.cancel import CancelToken
+from app.cost import CostEstimate, observe
+from app.media_store import MediaJob
+from app.renderers import get_renderer, renderer_slot
+
+
+def _render_in_slot(
+    kind: str,
+    ir: Dict[str, Any],
+    job: MediaJob,
+    token: Optional[CancelToken],
+    quality: str,
+    **kwargs: Any,
+) -> Tuple[Optional[str], float]:
+    """렌더러 슬롯을 잡은 뒤 렌더. (결과 경로, 슬롯을 잡은 뒤부터 걸린 초 — 슬롯 대기 시간 제외)."""
+    spec = get_renderer(kind)
+    with renderer_slot(kind, token):
+        started = time.monotonic()
+        video_path = spec.render(ir, job, token, quality, **kwargs)
+        return video_path, time.monotonic() - started
+
+
+def run_render(
+    kind: str,
+    ir: Dict[str, Any],
+    job: MediaJob,
+    token: Optional[CancelToken] = None,
+    quality: str = "l",
+    **kwargs: Any,
+) -> Optional[str]:
+    """kind에 맞는 렌더러로 job 디렉토리에 렌더. 결과 경로 (영상이 안 나오면 None)."""
+    return _render_in_slot(kind, ir, job, token, quality, **kwargs)[0]
+
+
+def render_and_observe(
+    kind: str,
+    ir: Dict[str, Any],
+    job: MediaJob,
+    estimate: CostEstimate,
+    token: Optional[CancelToken] = None,
+    **kwargs: Any,
+) -> Optional[str]:
+    """
+    admission이 정한 품질/모드로 렌더하고, 걸린 시간으로 비용 모델을 보정한다.
+    슬롯 대기 시간은 렌더 시간에 넣지 않고, 영상이 안 나온 렌더는 보정에 쓰지 않는다.
+    """
+    video_path, elapsed = _render_in_slot(
+        kind, ir, job, token, estimate.quality, **{**kwargs, **estimate.options}
+    )
+    if video_path is None:
+        return None
+    stats = job.render_stats
+    fraction = stats["rendered"] / stats["sections"] if stats.get("sections") else 1.0
+    observe(estimate, elapsed, fraction)
+    return video_path
@@ -1,16 +1,44 @@
 # app/render_seq_attention.py
 from __future__ import annotations
 import json
-import tempfile
-import subprocess
 from pathlib import Path
 
-MEDIA_DIR = Path("media/videos/SeqAttentionScene")
-MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+from app.media_store import job_scope
+from app.sections import render_sectioned
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent  
 
-def render_seq_attention(attn_ir: dict, out_basename: str = "attn_demo", fmt: str = "mp4") -> str:
+# 토큰 수가 이 값을 넘거나 multi-head(heads)가 있으면 attention 행렬 히트맵 모드
+HEATMAP_TOKEN_THRESHOLD = 15
+
+# 섹션별로 새로 그리는 IR 키. 섹션의 sub-IR은 자기 키 + 앞 섹션 키 전부.
+# 예: next_token 후보만 바뀌면 tokens~context 섹션은 캐시에서 재사용된다.
+NODE_SECTION_DEPS = (
+    ("tokens", ("raw_text", "tokens")),
+    ("query", ("query_index",)),
+    ("weights", ("weights",)),
+    ("context", ()),
+    ("next_token", ("next_token",)),
+    ("predict", ()),
+)
+HEATMAP_SECTION_DEPS = (
+    ("matrix", ("raw_text", "tokens", "weights", "heads", "query_index")),
+    ("sweep", ()),
+    ("next_token", ("next_token",)),
+)
+
+
+def attention_sections(attn_ir: dict, use_heatmap: bool) -> list:
+    """attn_ir → [(섹션 이름, sub-IR)] (app.sections.render_sectioned 입력)."""
+    deps = HEATMAP_SECTION_DEPS if use_heatmap else NODE_SECTION_DEPS
+    sections, seen = [], {}
+    for name, keys in deps:
+        seen.update({k: attn_ir.get(k) for k in keys})
+        sections.append((name, dict(seen)))
+    return sections
+
+def render_seq_attention(attn_ir: dict, out_basename: str = "attn_demo", fmt: str = "mp4", token=None,
+                         mode: str = "auto", job=None, quality: str = "l") -> str:
     """
     attn_ir 예시:
     {
@@ -24,30 +52,68 @@ def render_seq_attention(attn_ir: dict, out_basename: str = "attn_demo", fmt: st
       "next_token": {                           
       "candidates": ["pizza", "something", "now", "more"],
       "probs": [0.55, 0.20, 0.15, 0.10]
-      }
+      },
+
+      "heads": [                                # (선택) head별 N x N 행렬
+        {"name": "head 0", "weights": [[...], ...]},
+        ...
+      ]
     }
+
+    mode: "nodes" | "heatmap" | "auto"
+      auto 이면 토큰이 HEATMAP_TOKEN_THRESHOLD개를 넘거나 heads가 있을 때 히트맵 모드.
+    job: app.media_store.MediaJob. 없으면 새 job 디렉토리를 만들어서 그 안에 출력한다.
+    quality: manim 품질 플래그 (l / m / h / p / k)
     """
+    if mode == "auto":
+        use_heatmap = len(attn_ir["tokens"]) > HEATMAP_TOKEN_THRESHOLD or bool(attn_ir.get("heads"))
+    else:
+        use_heatmap = mode == "heatmap"
 
     scene_template = r"""
 from manim import *
 import json, sys
+import numpy as np
 
 # === sys.path에 프로젝트 루트 추가해서 'app' 패키지가 보이게 만들기 ===
 PROJECT_ROOT = r"__PROJECT_ROOT__"
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
+from app.tex_cache import use_shared_tex_cache
 from app.layout_utils import (
+    SectionMixin,
+    create_number,
     create_circle_node,
+    mobject_cache_stats,
     layout_row,
     autorescale_group,
     LayoutMixin,
+    create_heatmap,
+    heatmap_region,
+    EdgeBundle,
+    GrowEdges,
 )
 
-class SeqAttentionScene(Scene, LayoutMixin):
+use_shared_tex_cache()
+
+USE_HEATMAP = __HEATMAP_MODE__
+# 축 라벨은 최대 이 개수까지만 (나머지는 간격을 두고 인덱스로)
+MAX_AXIS_LABELS = 24
+SWEEP_SECONDS = 2.0
+
+
+class SeqAttentionScene(SectionMixin, Scene, LayoutMixin):
+    render_sections = __SECTIONS__
+
     def construct(self):
         data = json.loads(r'''__ATTN_JSON__''')
 
+        # 긴 시퀀스 / multi-head 는 N x N 행렬 히트맵으로
+        if USE_HEATMAP:
+            self.construct_heatmap(data)
+            return
+
         tokens = data["tokens"]
         weights = data["weights"]
         q_idx = int(data.get("query_index", 0))
@@ -69,12 +135,14 @@ class SeqAttentionScene(Scene, LayoutMixin):
         title = Text("Transformer Self-Attention (Single Head)", font_size=30, color=YELLOW_B)
         title.to_edge(UP, buff=0.1)
 
+        self.begin_section("tokens")
         self.play(Write(title))
         self.play(FadeIn(sentence, shift=DOWN * 0.2))
         self.play(FadeIn(nodes_group, lag_ratio=0.1))
         self.wait(0.3)
 
         # === 2. query 토큰 강조 ===
+        self.begin_section("query")
         query_node = token_nodes[q_idx]
         q_circle, q_label = query_node
 
@@ -91,6 +159,7 @@ class SeqAttentionScene(Scene, LayoutMixin):
         self.wait(0.3)
 
         # === 3. attention weight (query -> others) 선으로 표현 ===
+        self.begin_section("weights")
         if isinstance(weights[0], list):
             row = weights[q_idx]
         else:
@@ -100,21 +169,17 @@ class SeqAttentionScene(Scene, LayoutMixin):
         if max_w <= 0:
             max_w = 1.0
 
-        edges = []
-        for tgt_node, w in zip(token_nodes, row):
-            t_circle, _ = tgt_node
-            line = Line(
-                query_node.get_bottom(),
-                tgt_node.get_top(),
-                stroke_color=BLUE_B,
-                stroke_width=2 + 6 * (w / max_w),
-                stroke_opacity=0.25 + 0.75 * (w / max_w),
-                buff=0.1,
-            )
-            edges.append(line)
-
-        edge_group = VGroup(*edges)
-        self.play(Create(edge_group), run_time=0.8)
+        # query → 토큰 간선을 묶음 하나로 (토큰이 많아도 stroke 호출 수는 일정)
+        strength = np.array(row[:len(token_nodes)], dtype=float) / max_w
+        edge_group = EdgeBundle(
+            [query_node.get_bottom()] * len(strength),
+            [tgt_node.get_top() for tgt_node in token_nodes[:len(strength)]],
+            widths=2 + 6 * strength,
+            opacities=0.25 + 0.75 * strength,
+            color=BLUE_B,
+            buff=0.1,
+        )
+        self.play(GrowEdges(edge_group), run_time=0.8)
         self.wait(0.4)
 
         # === 4. 각 토큰 아래에 attention bar 시각화 ===
@@ -133,7 +198,7 @@ class SeqAttentionScene(Scene, LayoutMixin):
             bar.next_to(tgt_node, DOWN, buff=0.4)
             bars.append(bar)
 
-            txt = MathTex(f"{w:.2f}").scale(0.45).set_color(WHITE)
+            txt = create_number(w, decimals=2, scale=0.45)
             txt.next_to(bar, DOWN, buff=0.1)
             bar_labels.append(txt)
 
@@ -149,6 +214,7 @@ class SeqAttentionScene(Scene, LayoutMixin):
         self.wait(0.6)
 
         # === 5. context 벡터 노드 (attention 결과 요약) ===
+        self.begin_section("context")
         context_node = create_circle_node("context", radius=0.5)
         context_group = VGroup(context_node)
         context_group.next_to(query_node, RIGHT, buff=2.0)
@@ -169,6 +235,7 @@ class SeqAttentionScene(Scene, LayoutMixin):
         self.wait(0.4)
 
         # === 6. Next-token 분포 (softmax over vocabulary) ===
+        self.begin_section("next_token")
 
         # 설명용 확률 분포 (실제 값이 아니라 직관용)
         nt = data.get("next_token", {}) 
@@ -221,7 +288,7 @@ class SeqAttentionScene(Scene, LayoutMixin):
             bar.next_to(node, RIGHT, buff=0.3)
             prob_bars.append(bar)
 
-            txt = MathTex(f"{p:.2f}").scale(0.4).set_color(WHITE)
+            txt = create_number(p, decimals=2, scale=0.4)
             txt.next_to(bar, RIGHT, buff=0.1)
             prob_labels.append(txt)
 
@@ -236,6 +303,7 @@ class SeqAttentionScene(Scene, LayoutMixin):
         self.wait(0.6)
 
         # === 7. 최고 확률 토큰 강조 + "Predicted next token" ===
+        self.begin_section("predict")
         max_idx = max(range(len(probs)), key=lambda i: probs[i])
         best_node = vocab_nodes[max_idx]
         best_bar = prob_bars[max_idx]
@@ -270,30 +338,136 @@ class SeqAttentionScene(Scene, LayoutMixin):
 
         self.play(Write(full_sentence), run_time=0.8)
         self.wait(1.2)
+        print(f"mobject cache: {mobject_cache_stats()}")
+
+    # === 긴 시퀀스 / multi-head 용 attention 행렬 히트맵 모드 ===
+    def construct_heatmap(self, data):
+        tokens = data["tokens"]
+        n = len(tokens)
+        q_idx = int(data.get("query_index", n - 1))
+
+        # head별 N x N 행렬. 1D weights면 query 행만 채운 행렬로 취급
+        if data.get("heads"):
+            heads = [(h.get("name", f"head {k}"), np.array(h["weights"], dtype=float))
+                     for k, h in enumerate(data["heads"])]
+        elif isinstance(data["weights"][0], list):
+            heads = [("head 0", np.array(data["weights"], dtype=float))]
+        else:
+            m = np.zeros((n, n))
+            m[q_idx] = data["weights"]
+            heads = [("head 0", m)]
+
+        title = Text(
+            f"Self-Attention ({n} tokens, {len(heads)} head{'s' if len(heads) > 1 else ''})",
+            font_size=30, color=YELLOW_B,
+        ).to_edge(UP, buff=0.3)
+        self.begin_section("matrix")
+        self.play(Write(title))
+
+        # head 배치: 가로로 나란히, 한 변 길이는 head 수에 맞춰 축소
+        h_count = len(heads)
+        side = min(5.0, (11.5 - 0.4 * (h_count - 1)) / h_count)
+        maps = Group()
+        for name, mat in heads:
+            img = create_heatmap(mat, cell_size=side / n, colors=(BLACK, BLUE_D, YELLOW),
+                                 vmin=0, vmax=max(float(mat.max()), 1e-6))
+            maps.add(img)
+        maps.arrange(RIGHT, buff=0.4).move_to(DOWN * 0.2 + RIGHT * 0.4)
+
+        head_labels = VGroup(*[
+            Text(name, font_size=20, color=GRAY_B).next_to(img, UP, buff=0.15)
+            for (name, _), img in zip(heads, maps)
+        ])
+
+        # 축 라벨: 첫 head의 왼쪽(query)과 위쪽(key)에만
+        step = max(1, -(-n // MAX_AXIS_LABELS))
+        first = maps[0]
+        cell = side / n
+        font = 14 if n <= MAX_AXIS_LABELS else 12
+
+        def short(t):
+            return t if len(t) <= 6 else t[:5] + "…"
+
+        axis = VGroup()
+        for k in range(0, n, step):
+            lbl = short(tokens[k]) if step == 1 else str(k)
+            row_lbl = Text(lbl, font_size=font, color=GRAY_B)
+            row_lbl.next_to(first.get_corner(UL) + DOWN * (k + 0.5) * cell, LEFT, buff=0.1)
+            col_lbl = Text(lbl, font_size=font, color=GRAY_B).rotate(PI / 2)
+            col_lbl.next_to(first.get_corner(DL) + RIGHT * (k + 0.5) * cell, DOWN, buff=0.1)
+            axis.add(row_lbl, col_lbl)
+        q_axis = Text("query", font_size=18, color=GRAY_B).rotate(PI / 2).next_to(axis, LEFT, buff=0.1)
+        k_axis = Text("key", font_size=18, color=GRAY_B).next_to(axis, DOWN, buff=0.1)
+
+        self.play(FadeIn(maps), FadeIn(head_labels), FadeIn(axis), FadeIn(q_axis), FadeIn(k_axis),
+                  run_time=1.0)
+        self.wait(0.3)
+
+        self.begin_section("sweep")
+        # 행 커서: 모든 head를 가로지르는 띠를 위→아래로 sweep 후 query 행에서 멈춤
+        def row_cursor(r):
+            return VGroup(*[
+                heatmap_region(img, n, n, r, 0, 1, n, stroke_color=YELLOW, stroke_width=2)
+                for img in maps
+            ])
+
+        cursor = row_cursor(0)
+        self.play(Create(cursor), run_time=0.3)
+        self.play(cursor.animate(rate_func=linear).become(row_cursor(n - 1)), run_time=SWEEP_SECONDS)
+        self.play(Transform(cursor, row_cursor(q_idx)), run_time=0.5)
+
+        # query 행에서 가장 많이 본 key 토큰 (head 0 기준) top-k
+        row = heads[0][1][q_idx]
+        top = np.argsort(row)[::-1][:5]
+        info = VGroup(
+            Text(f"query: '{short(tokens[q_idx])}'", font_size=22, color=YELLOW_B),
+            *[Text(f"{short(tokens[t])}  {row[t]:.2f}", font_size=20, color=WHITE) for t in top],
+        ).arrange(DOWN, aligned_edge=LEFT, buff=0.12)
+        info.to_corner(DR, buff=0.3)
+        self.play(FadeIn(info), run_time=0.6)
+        self.wait(0.6)
+
+        self.begin_section("next_token")
+        # next token 분포 (있으면)
+        nt = data.get("next_token")
+        if nt:
+            cands, probs = nt["candidates"], nt["probs"]
+            m = min(len(cands), len(probs))
+            bars = VGroup()
+            for c, p in zip(cands[:m], probs[:m]):
+                bar = Rectangle(width=0.15 + 2.0 * p, height=0.22, fill_color=BLUE,
+                                fill_opacity=0.7, stroke_width=0)
+                lbl = Text(f"{short(c)} {p:.2f}", font_size=18)
+                bars.add(VGroup(bar, lbl.next_to(bar, RIGHT, buff=0.1)))
+            bars.arrange(DOWN, aligned_edge=LEFT, buff=0.1).to_corner(UR, buff=0.3).shift(DOWN * 0.6)
+            best = int(np.argmax(probs[:m]))
+            self.play(FadeOut(info), FadeIn(bars), run_time=0.6)
+            self.play(bars[best][0].animate.set_fill(color=YELLOW, opacity=0.9), run_time=0.5)
+        self.wait(1.2)
 """
 
 
-    scene_code = (
-        scene_template
-        .replace("__ATTN_JSON__", json.dumps(attn_ir))
-        .replace("__PROJECT_ROOT__", str(PROJECT_ROOT))
-    )
-
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp:
-        tmp.write(scene_code)
-        tmp_path = tmp.name
-
-    cmd = [
-        "manim",
-        "-ql",
-        tmp_path,
-        "SeqAttentionScene",
-        "--format",
-        fmt,
-        "-o",
-        f"{out_basename}.{fmt}",
-    ]
-    subprocess.run(cmd, check=True)
-
-    video_path = MEDIA_DIR / f"{out_basename}.{fmt}"
-    return str(video_path)
+    def build(sections):
+        return (
+            scene_template
+            .replace("__ATTN_JSON__", json.dumps(attn_ir))
+            .replace("__PROJECT_ROOT__", str(PROJECT_ROOT))
+            .replace("__HEATMAP_MODE__", repr(use_heatmap))
+            .replace("__SECTIONS__", repr(sections))
+        )
+
+    with job_scope(job, "seq_attention") as job:
+        result = render_sectioned(
+            "seq_attention",
+            scene_template,
+            build,
+            "SeqAttentionScene",
+            attention_sections(attn_ir, use_heatmap),
+            job,
+            out_basename,
+            variant={"heatmap": use_heatmap},
+            quality=quality,
+            fmt=fmt,
+            token=token,
+        )
+    return result["path"]
@@ -1,18 +1,63 @@
 # app/render_sorting.py
-import json, os
-import subprocess
-import tempfile
+import hashlib
+import os
 from pathlib import Path
 from textwrap import dedent
 
+from app.compact_trace import CompactTrace, load_trace
+from app.media_store import job_scope
+from app.sections import render_sectioned
+
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 
+# 원소 수가 이 값을 넘으면 원형 노드 대신 막대 그래프로 그린다.
+BAR_MODE_THRESHOLD = 12
+# 막대 그래프 모드에서 self.play 호출 수 상한 (넘으면 step을 묶어서 재생)
+MAX_BAR_PLAYS = 400
+# 섹션 크기: 노드 모드는 step 수, 막대 모드는 play(묶음) 수 기준
+SECTION_STEPS = 24
+BAR_SECTION_PLAYS = 50
+
+
+def sorting_sections(trace: CompactTrace, use_bars: bool) -> list:
+    """
+    정리된 trace(CompactTrace) → [(섹션 이름, sub-IR)] (app.sections.render_sectioned 입력).
+
+    intro / steps_0 / steps_1 / ... / done. steps_k의 시작 화면은 그 앞 step 전부에
+    의해 정해지므로 sub-IR에는 지금까지의 연산 열의 누적 해시를 넣는다.
+    → trace 뒷부분만 바뀌면 앞쪽 섹션은 캐시에서 재사용된다.
+    """
+    num_steps = len(trace)
+    base = {"algorithm": trace.algorithm, "array": trace.initial}
+    if use_bars:
+        # 막대 모드는 묶음 크기 / run_time이 전체 step 수에 의존 (노드 모드는 step을 뒤에 붙여도 앞 섹션 그대로)
+        base["num_steps"] = num_steps
+        per_play = max(1, -(-num_steps // MAX_BAR_PLAYS))
+        chunk = per_play * BAR_SECTION_PLAYS
+    else:
+        chunk = SECTION_STEPS
+
+    sections = [("intro", base)]
+    digest = hashlib.sha256()
+    for k, start in enumerate(range(0, num_steps, chunk)):
+        digest.update(trace.chunk_bytes(start, start + chunk))
+        sections.append((f"steps_{k}", {**base, "prefix": digest.hexdigest()}))
+    sections.append(("done", {**base, "prefix": digest.hexdigest()}))
+    return sections
+
 
 def render_sorting(trace_ir: dict,
                    out_basename: str = "sorting_demo",
-                   fmt: str = "mp4") -> str:
+                   fmt: str = "mp4",
+                   token=None,
+                   mode: str = "auto",
+                   job=None,
+                   quality: str = "l") -> str:
     """
-    trace_ir 예시 형식:
+    trace_ir: 압축 형식(app.compact_trace, format="compact-v1") 또는 아래 기존 형식.
+    씬 파일에는 항상 압축 형식으로 들어간다.
+
+    기존 형식 예시:
 
     {
       "algorithm": "bubble_sort",
@@ -25,33 +70,76 @@ def render_sorting(trace_ir: dict,
       ],
       "metadata": { "domain": "sorting" }
     }
+
+    mode: "nodes" | "bars" | "auto"
+      auto 이면 배열 길이가 BAR_MODE_THRESHOLD를 넘을 때 막대 그래프 모드.
+    job: app.media_store.MediaJob. 없으면 새 job 디렉토리를 만들어서 그 안에 출력한다.
+    quality: manim 품질 플래그 (l / m / h / p / k)
     """
-    trace_json = json.dumps(trace_ir, ensure_ascii=False)
+    cleaned = load_trace(trace_ir).cleaned()
+    trace_json = cleaned.dumps()
+
+    if mode == "auto":
+        use_bars = len(cleaned.initial) > BAR_MODE_THRESHOLD
+    else:
+        use_bars = mode == "bars"
 
     # CNN처럼 placeholder 치환 방식 사용
     scene_template = r"""
 from manim import *
 import json
+from app.tex_cache import use_shared_tex_cache
+from app.compact_trace import CompactTrace
 from app.layout_utils import (
     create_circle_node,
+    cached_text,
+    mobject_cache_stats,
+    MarkerPool,
+    SectionMixin,
     layout_row,
     autorescale_group,
     LayoutMixin,
 )
 
-class SortingScene(Scene, LayoutMixin):
+use_shared_tex_cache()
+
+USE_BARS = __BAR_MODE__
+MAX_BAR_PLAYS = __MAX_BAR_PLAYS__
+SECTION_STEPS = __SECTION_STEPS__
+BAR_SECTION_PLAYS = __BAR_SECTION_PLAYS__
+BAR_TOTAL_SECONDS = 40.0
+
+BAR_COLOR = BLUE_D
+BAR_COMPARE_COLOR = YELLOW
+BAR_SWAP_COLOR = RED
+BAR_MIN_COLOR = BLUE_B
+
+
+class SortingScene(SectionMixin, Scene, LayoutMixin):
+    render_sections = __SECTIONS__
+
     def construct(self):
-        trace = json.loads(r'''__TRACE_JSON__''')
+        trace = CompactTrace.from_json(json.loads(r'''__TRACE_JSON__'''))
 
-        algo_name = trace.get("algorithm", "Sorting")
-        arr = trace["input"]["array"]
-        steps = trace.get("trace", [])
+        algo_name = trace.algorithm
+        arr = trace.initial
+        # step dict는 인덱싱할 때만 만들어진다 (배열 스냅샷 없음)
+        steps = trace.steps
 
         # === 1. 제목 ===
         title = Text(f"Algorithm: {algo_name}", font_size=32, color=YELLOW_B)
         title.to_edge(UP, buff=0.4)
+        self.begin_section("intro")
         self.play(Write(title))
 
+        # step 정리(CompactTrace.cleaned)는 렌더러에서 이미 끝난 상태
+        cleaned_steps = steps
+
+        # 원소가 많으면 노드 대신 막대 그래프 모드로
+        if USE_BARS:
+            self.construct_bars(algo_name, arr, cleaned_steps)
+            return
+
         # === 2. 초기 배열 노드 생성 ===
         nodes = [create_circle_node(str(v), radius=0.5) for v in arr]
 
@@ -64,7 +152,7 @@ class SortingScene(Scene, LayoutMixin):
         # 인덱스 라벨 (0,1,2,...) 아래에 깔기
         index_labels = []
         for idx, node in enumerate(nodes):
-            idx_text = Text(str(idx), font_size=20, color=GRAY_B)
+            idx_text = cached_text(str(idx), font_size=20, color=GRAY_B)
             idx_text.next_to(node, DOWN, buff=0.15)
             index_labels.append(idx_text)
         idx_group = VGroup(*index_labels)
@@ -75,22 +163,13 @@ class SortingScene(Scene, LayoutMixin):
         # selection sort용 “현재 최소값 후보” 마커
         min_marker = None
 
-        # === 3. step trace에 따라 비교/스왑 애니메이션 ===
-        cleaned_steps = []
-        prev = None
-        for s in steps:
-            if "compare" not in s:
-                continue
-            i, j = s["compare"]
-            swap_flag = bool(s.get("swap", False))
-            key = (i, j, swap_flag)
-            if key == prev:
-                # 같은 쌍에 같은 swap 여부가 연달아 나오면 스킵
-                continue
-            cleaned_steps.append(s)
-            prev = key
+        # 비교 하이라이트 원은 풀에서 재사용
+        markers = MarkerPool()
 
-        for s in cleaned_steps:
+        # === 3. step trace에 따라 비교/스왑 애니메이션 ===
+        for step_idx, s in enumerate(cleaned_steps):
+            if step_idx % SECTION_STEPS == 0:
+                self.begin_section(f"steps_{step_idx // SECTION_STEPS}")
             i, j = s["compare"]
             swap = s.get("swap", False)
 
@@ -124,17 +203,11 @@ class SortingScene(Scene, LayoutMixin):
             circ_j = nj[0]  
 
             # 비교 하이라이트
-            hi_i = Circle(
-                radius=circ_i.radius * 1.15,
-                color=YELLOW,
-                stroke_width=3,
-            ).move_to(ni.get_center())
-
-            hi_j = Circle(
-                radius=circ_j.radius * 1.15,
-                color=YELLOW,
-                stroke_width=3,
-            ).move_to(nj.get_center())
+            hi_i = markers.acquire_circle(circ_i.radius * 1.15, color=YELLOW, stroke_width=3)
+            hi_i.move_to(ni.get_center())
+
+            hi_j = markers.acquire_circle(circ_j.radius * 1.15, color=YELLOW, stroke_width=3)
+            hi_j.move_to(nj.get_center())
 
             self.play(Create(hi_i), Create(hi_j), run_time=0.3)
 
@@ -184,10 +257,12 @@ class SortingScene(Scene, LayoutMixin):
                 current_nodes[i], current_nodes[j] = current_nodes[j], current_nodes[i]
 
 
-            # 하이라이트 제거
+            # 하이라이트 제거 후 풀에 반납
             self.play(FadeOut(hi_i), FadeOut(hi_j), run_time=0.2)
+            markers.release(hi_i, hi_j)
 
         # 마지막에 min 마커 제거
+        self.begin_section("done")
         if min_marker is not None:
             self.play(FadeOut(min_marker), run_time=0.3)
 
@@ -202,33 +277,107 @@ class SortingScene(Scene, LayoutMixin):
         done_label.next_to(nodes_group, DOWN, buff=0.8)
         self.play(Write(done_label))
         self.wait(1.5)
-"""
+        print(f"mobject cache: {mobject_cache_stats()}, markers created={markers.created} reused={markers.reused}")
+
+    # === 대형 배열용 막대 그래프 모드 ===
+    def construct_bars(self, algo_name, arr, steps):
+        # 원소별 텍스트 없이 높이 = 값. 인접한 step 여러 개를 play 한 번으로 묶어서
+        # play 호출 수가 원소 수와 무관하게 MAX_BAR_PLAYS 이하로 유지되게 한다.
+        n = len(arr)
+        lo = min(min(arr), 0)
+        hi = max(max(arr), 0)
+        span = (hi - lo) or 1
+
+        area_w, area_h = 12.0, 5.0
+        base_y = -2.8
+        slot_w = area_w / n
+        xs = [-area_w / 2 + slot_w * (k + 0.5) for k in range(n)]
+
+        bars = []
+        for k, v in enumerate(arr):
+            h = max(area_h * (v - lo) / span, 0.02)
+            bar = Rectangle(
+                width=slot_w * 0.85,
+                height=h,
+                fill_color=BAR_COLOR,
+                fill_opacity=0.85,
+                stroke_width=0 if n > 64 else 1,
+                stroke_color=WHITE,
+            )
+            bar.move_to([xs[k], base_y + h / 2, 0])
+            bars.append(bar)
+        bar_group = VGroup(*bars)
+
+        size_label = Text(f"n = {n}", font_size=22, color=GRAY_B)
+        size_label.to_corner(UR, buff=0.4)
+        self.play(FadeIn(bar_group), FadeIn(size_label), run_time=0.8)
+
+        order = list(bars)  # slot index -> bar
+        per_play = max(1, -(-len(steps) // MAX_BAR_PLAYS))
+        chunks = [steps[k:k + per_play] for k in range(0, len(steps), per_play)]
+        run_time = min(0.4, max(1 / config.frame_rate, BAR_TOTAL_SECONDS / max(len(chunks), 1)))
+
+        lit = set()  # 직전 play에서 색이 바뀐 막대
+        for chunk_idx, chunk in enumerate(chunks):
+            if chunk_idx % BAR_SECTION_PLAYS == 0:
+                self.begin_section(f"steps_{chunk_idx // BAR_SECTION_PLAYS}")
+            colors = {}  # slot -> color
+            for s in chunk:
+                i, j = s["compare"]
+                if not (0 <= i < n and 0 <= j < n):
+                    continue
+                if s.get("swap", False):
+                    order[i], order[j] = order[j], order[i]
+                    colors[i] = colors[j] = BAR_SWAP_COLOR
+                else:
+                    colors.setdefault(i, BAR_COMPARE_COLOR)
+                    colors.setdefault(j, BAR_COMPARE_COLOR)
+                min_idx = s.get("min_index")
+                if algo_name == "selection_sort" and min_idx is not None and 0 <= min_idx < n:
+                    colors.setdefault(min_idx, BAR_MIN_COLOR)
+
+            if not colors:
+                continue
+
+            touched = {order[k] for k in colors}
+            anims = [bar.animate.set_fill(BAR_COLOR) for bar in lit - touched]
+            for k, color in colors.items():
+                anims.append(order[k].animate.set_x(xs[k]).set_fill(color))
+            self.play(*anims, run_time=run_time)
+            lit = touched
 
-    scene_code = scene_template.replace("__TRACE_JSON__", trace_json)
-
-    # 임시 파이썬 파일로 저장
-    tmpdir = tempfile.mkdtemp()
-    py_path = Path(tmpdir) / "sorting_scene.py"
-    py_path.write_text(scene_code, encoding="utf-8")
-
-    # 출력 디렉토리
-    out_dir = Path("media") / "sorting"
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    # manim 실행 =
-    cmd = [
-        "manim",
-        str(py_path),
-        "SortingScene",
-        "-ql",  
-        "-o",
-        f"{out_basename}.mp4",
-    ]
-
-    env = os.environ.copy()
-    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
-    subprocess.run(cmd, check=True, env=env)
-    
-    video_dir = os.path.join(PROJECT_ROOT, "media", "videos")
-    return os.path.join(video_dir, "sorting_scene", "480p15", f"{out_basename}.mp4")
+        self.begin_section("done")
+        self.play(*[bar.animate.set_fill(GREEN_C) for bar in order], run_time=0.8)
+
+        done_label = Text("Sorted!", font_size=28, color=GREEN_B)
+        done_label.next_to(size_label, DOWN, buff=0.3)
+        self.play(Write(done_label))
+        self.wait(1.5)
+"""
 
+    def build(sections):
+        return (
+            scene_template
+            .replace("__TRACE_JSON__", trace_json)
+            .replace("__BAR_MODE__", repr(use_bars))
+            .replace("__MAX_BAR_PLAYS__", str(MAX_BAR_PLAYS))
+            .replace("__SECTION_STEPS__", str(SECTION_STEPS))
+            .replace("__BAR_SECTION_PLAYS__", str(BAR_SECTION_PLAYS))
+            .replace("__SECTIONS__", repr(sections))
+        )
+
+    with job_scope(job, "sorting") as job:
+        result = render_sectioned(
+            "sorting",
+            scene_template,
+            build,
+            "SortingScene",
+            sorting_sections(cleaned, use_bars),
+            job,
+            out_basename,
+            variant={"bars": use_bars},
+            quality=quality,
+            fmt=fmt,
+            token=token,
+        )
+    return result["path"]
@@ -0,0 +1,139 @@
+# app/render_worker.py
+"""
+렌더 팜 워커 데몬.
+
+공유 작업 큐(app.job_queue)에서 작업을 lease와 함께 꺼내 렌더하고, 결과를 공유 media store
+(MEDIA_STORE_DIR — 모든 호스트가 같은 경로로 마운트)에 올린다.
+호스트를 늘리려면 같은 RENDER_QUEUE_URL / MEDIA_STORE_DIR로 워커를 더 띄우기만 하면 된다.
+
+    python -m app.render_worker --concurrency 2
+    python -m app.render_worker --kinds cnn,sorting
+
+- 렌더 중에는 LEASE_S / 3 마다 heartbeat로 lease를 연장한다.
+  워커가 죽으면 lease가 만료되고 다른 워커가 재시도한다 (최대 RENDER_MAX_ATTEMPTS회).
+- heartbeat가 실패하면(작업 취소 / lease를 잃음) manim 프로세스 그룹을 종료한다.
+- 시작할 때 받을 렌더러들의 warm-up을 먼저 돌린다 (RENDERER_WARMUP=0 이면 생략).
+- SIGTERM / SIGINT: 새 작업은 받지 않고 진행 중인 작업만 끝낸 뒤 종료.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from typing import List, Optional, Sequence
+
+from app.cancel import CancelToken, RequestCancelled
+from app.cost import CostEstimate
+from app.job_queue import LEASE_S, QueuedJob, SQLiteJobStore, open_job_store
+from app.media_store import STORE
+from app.render_jobs import render_and_observe
+from app.renderers import WARMUP_ON_STARTUP, run_warmups
+
+IDLE_POLL_S = 1.0
+HOSTNAME = socket.gethostname()
+
+
+def _heartbeat(store: SQLiteJobStore, qjob: QueuedJob, worker_id: str, token: CancelToken, stop: threading.Event) -> None:
+    while not stop.wait(LEASE_S / 3):
+        try:
+            alive = store.heartbeat(qjob.id, worker_id)
+        except Exception as e:  # 큐 스토리지 일시 장애: lease 만료 전까지는 계속 시도
+            print(f"⚠️ heartbeat failed for {qjob.id}: {e}")
+            continue
+        if not alive:
+            token.cancel("render job cancelled or lease lost")
+            return
+
+
+def work_one(store: SQLiteJobStore, worker_id: str, kinds: Optional[Sequence[str]] = None) -> bool:
+    """작업 하나를 처리. 가져올 작업이 없으면 False."""
+    qjob = store.claim(worker_id, kinds)
+    if qjob is None:
+        return False
+
+    payload = qjob.payload
+    deadline_at = payload.get("deadline_at")
+    remaining = deadline_at - time.time() if deadline_at else None
+    if remaining is not None and remaining <= 0:
+        store.fail(qjob.id, worker_id, "deadline exceeded before render started", retry=False)
+        return True
+
+    token = CancelToken(deadline_s=remaining, tenant=qjob.tenant)
+    token.stage(f"render:{qjob.kind}")
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(store, qjob, worker_id, token, stop), daemon=True)
+    beat.start()
+
+    media = STORE.new_job(qjob.kind)
+    print(f"🎬 [{worker_id}] {qjob.kind} job {qjob.id} (tenant={qjob.tenant}, attempt {qjob.attempts})")
+    try:
+        video_path = render_and_observe(
+            qjob.kind,
+            payload["ir"],
+            media,
+            CostEstimate(**payload["estimate"]),
+            token,
+            **payload.get("kwargs", {}),
+        )
+    except RequestCancelled as e:
+        STORE.finish(media, ok=False)
+        store.fail(qjob.id, worker_id, str(e), retry=False)
+    except Exception as e:
+        traceback.print_exc()
+        STORE.finish(media, ok=False)
+        store.fail(qjob.id, worker_id, f"{type(e).__name__}: {e}")
+    else:
+        STORE.finish(media, ok=video_path is not None)
+        store.complete(
+            qjob.id,
+            worker_id,
+            {"video_path": video_path, "media_job": media.id if video_path else None, "host": HOSTNAME},
+        )
+    finally:
+        stop.set()
+        beat.join()
+    return True
+
+
+def run(concurrency: int = 1, kinds: Optional[Sequence[str]] = None) -> None:
+    store = open_job_store()
+    if WARMUP_ON_STARTUP:
+        run_warmups(list(kinds) if kinds else None)
+    stopping = threading.Event()
+
+    def _stop(signum, frame):
+        print("🛑 draining: finishing running jobs, not claiming new ones")
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    def loop(n: int) -> None:
+        worker_id = f"{HOSTNAME}-{os.getpid()}-{n}"
+        while not stopping.is_set():
+            try:
+                if not work_one(store, worker_id, kinds):
+                    stopping.wait(IDLE_POLL_S)
+            except Exception:
+                traceback.print_exc()
+                stopping.wait(IDLE_POLL_S)
+
+    threads: List[threading.Thread] = [threading.Thread(target=loop, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    # 메인 스레드는 시그널을 받을 수 있게 짧게 나눠서 기다린다
+    while any(t.is_alive() for t in threads):
+        for t in threads:
+            t.join(timeout=0.5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render farm worker: claims jobs from the shared render queue.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("RENDER_SLOTS", "1")))
+    parser.add_argument("--kinds", type=str, default=None, help="comma-separated renderer kinds to accept")
+    args = parser.parse_args()
+    run(args.concurrency, args.kinds.split(",") if args.kinds else None)
@@ -0,0 +1,425 @@
+# app/renderers.py
+"""
+렌더러 레지스트리.
+
+(domain, pattern) → 렌더러 하나. 렌더러마다
+  prepare        : (사용자 문장, pseudocode IR) → IR (LLM 호출 + 로컬 계산). 없으면 main의 generic 경로가 IR을 만든다
+  validate       : IR 검증 → 에러 메시지 목록
+  features       : 비용 모델 입력 (play 수, 영상 길이) — app.cost.estimate_cost가 kind로 찾아 쓴다
+  cheaper        : 예산 초과 시 차례로 시도할 더 싼 렌더러 옵션
+  render         : IR → 영상 (job 디렉토리에 출력)
+  max_concurrency: 이 렌더러가 한 프로세스에서 동시에 돌 수 있는 수
+  warmup         : 서버 / 워커 시작 시 한 번 돌리는 예열 (작은 씬을 렌더해서 폰트 / Tex 캐시를 채움)
+  storyboard     : IR → 정지 키프레임 SVG 몇 장 (app.storyboard, manim 없이 바로). 없으면 storyboard 미지원
+를 선언한다. main / render_jobs / render_worker는 이 표만 보고 분기한다.
+
+새 렌더러는 register(Renderer(...))로 추가. 동시 실행 수는 RENDERER_CONCURRENCY(JSON)로 덮어쓸 수 있다:
+  RENDERER_CONCURRENCY='{"cnn": 1, "seq_attention": 4}'
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app import cost
+from app.cancel import POLL_INTERVAL_S, CancelToken, RequestCancelled
+from app.cache_sim import build_cache_trace
+from app.cnn_trace import build_cnn_trace
+from app.compact_trace import CompactTrace
+from app.grid_ir import build_grid_trace
+from app.media_store import STORE
+from app.patterns import PatternType
+from app.render_cache import render_cache
+from app.render_cnn_matrix import render_cnn_matrix
+from app.render_flow import build_flow_ir, render_flow
+from app.render_grid import render_grid
+from app.render_seq_attention import render_seq_attention
+from app.render_sorting import render_sorting
+from app.schema import (
+    validate_attention_ir,
+    validate_cache_trace,
+    validate_cnn_trace,
+    validate_flow_ir,
+    validate_grid_trace,
+    validate_sorting_trace,
+)
+from app.sections import render_scene_file
+from app.storyboard import (
+    attention_storyboard,
+    cache_storyboard,
+    cnn_storyboard,
+    flow_storyboard,
+    grid_storyboard,
+    sorting_storyboard,
+)
+from app.toy_transformer import build_attention_ir
+
+WARMUP_ON_STARTUP = os.getenv("RENDERER_WARMUP", "1") == "1"
+WARMUP_QUALITY = "l"
+
+
+@dataclass
+class Prepared:
+    """prepare() 결과: 렌더할 IR + 응답에 같이 실을 필드 + 렌더러 인자."""
+    ir: Dict[str, Any]
+    context: Dict[str, Any] = field(default_factory=dict)
+    render_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+class PrepareError(ValueError):
+    """prepare 중 IR을 만들 수 없음. context는 응답에 그대로 싣는다."""
+
+    def __init__(self, message: str, context: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.context = context or {}
+
+
+@dataclass
+class Renderer:
+    kind: str
+    pattern: PatternType
+    render: Callable[..., Optional[str]]                 # (ir, job, token, quality, **kwargs)
+    validate: Callable[[Dict[str, Any]], List[str]]
+    features: Callable[[Dict[str, Any], Dict[str, Any]], Tuple[int, float]]
+    domains: Tuple[str, ...] = ()
+    prepare: Optional[Callable[[str, Optional[CancelToken], Dict[str, Any]], Prepared]] = None
+    ir_key: str = "ir"                                   # 응답에서 IR을 담는 필드 이름
+    cheaper: List[Dict[str, Any]] = field(default_factory=list)
+    max_concurrency: int = 2
+    warmup: Optional[Callable[[], None]] = None
+    storyboard: Optional[Callable[[Dict[str, Any]], List[Dict[str, str]]]] = None
+
+
+REGISTRY: Dict[str, Renderer] = {}
+_BY_DOMAIN: Dict[Tuple[str, PatternType], Renderer] = {}
+_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_CONCURRENCY_OVERRIDES: Dict[str, int] = json.loads(os.getenv("RENDERER_CONCURRENCY", "{}") or "{}")
+
+
+def register(spec: Renderer) -> Renderer:
+    spec.max_concurrency = int(_CONCURRENCY_OVERRIDES.get(spec.kind, spec.max_concurrency))
+    REGISTRY[spec.kind] = spec
+    for domain in spec.domains:
+        _BY_DOMAIN[(domain, spec.pattern)] = spec
+    _SLOTS[spec.kind] = threading.BoundedSemaphore(max(1, spec.max_concurrency))
+    # 비용 모델은 kind로 찾는다
+    cost.FEATURES[spec.kind] = spec.features
+    cost.CHEAPER_OPTIONS[spec.kind] = list(spec.cheaper)
+    return spec
+
+
+def get_renderer(kind: str) -> Renderer:
+    spec = REGISTRY.get(kind)
+    if spec is None:
+        raise ValueError(f"unknown renderer kind: {kind}")
+    return spec
+
+
+def lookup(domain: str, pattern: PatternType) -> Optional[Renderer]:
+    """도메인 + 최종 패턴에 맞는 전용 렌더러. 없으면 None (generic 경로)."""
+    return _BY_DOMAIN.get((domain, pattern))
+
+
+@contextmanager
+def renderer_slot(kind: str, token: Optional[CancelToken] = None) -> Iterator[None]:
+    """렌더러별 동시 실행 상한. 기다리는 중에 취소되면 RequestCancelled."""
+    sem = _SLOTS[kind]
+    while not sem.acquire(timeout=POLL_INTERVAL_S):
+        if token is not None and token.cancelled:
+            raise RequestCancelled(token.reason or "cancelled", token.current_stage)
+    try:
+        yield
+    finally:
+        sem.release()
+
+
+# === 1. 예열 ===
+
+def _render_sample(kind: str, sample: Callable[[], Dict[str, Any]], **kwargs: Any) -> Callable[[], None]:
+    """작은 IR을 버리는 job에 렌더하는 warm-up 루틴."""
+
+    def warmup() -> None:
+        job = STORE.new_job("warmup")
+        try:
+            get_renderer(kind).render(sample(), job, None, WARMUP_QUALITY, **kwargs)
+        finally:
+            STORE.finish(job, ok=False)
+
+    return warmup
+
+
+def run_warmups(kinds: Optional[List[str]] = None) -> Dict[str, Any]:
+    """등록된 렌더러(또는 kinds)의 warm-up을 차례로 실행. 실패해도 서버는 뜬다. kind → 걸린 초 / 에러."""
+    results: Dict[str, Any] = {}
+    for kind, spec in REGISTRY.items():
+        if spec.warmup is None or (kinds and kind not in kinds):
+            continue
+        started = time.monotonic()
+        try:
+            spec.warmup()
+            results[kind] = round(time.monotonic() - started, 2)
+            print(f"🔥 warm-up {kind}: {results[kind]}s")
+        except Exception as e:
+            results[kind] = f"{type(e).__name__}: {e}"
+            print(f"⚠️ warm-up {kind} failed: {results[kind]}")
+    return results
+
+
+# === 2. 렌더러 정의 ===
+
+# --- CNN ---
+def _prepare_cnn(user_text: str, token: Optional[CancelToken], pseudo_ir: Dict[str, Any]) -> Prepared:
+    from app.llm import call_llm_domain_ir
+
+    cnn_ir = call_llm_domain_ir("cnn_param", user_text, token=token)
+    cfg = cnn_ir.get("ir", {}).get("params", {})
+    context = {"cnn_ir": cnn_ir}
+    # 수치 계산은 NumPy로 씬 밖에서 (trace IR). 잘못된 파라미터면 ValueError
+    try:
+        trace = build_cnn_trace(cfg)
+    except ValueError as e:
+        raise PrepareError(str(e), context)
+    return Prepared(
+        trace,
+        context,
+        {"out_basename": cnn_ir.get("basename", "cnn_param_demo"), "fmt": cnn_ir.get("out_format", "mp4")},
+    )
+
+
+def _render_cnn(ir, job, token=None, quality="l", **kwargs):
+    return render_cnn_matrix(ir["params"], trace=ir, token=token, job=job, quality=quality, **kwargs)
+
+
+# --- SORTING ---
+def _prepare_sorting(user_text: str, token: Optional[CancelToken], pseudo_ir: Dict[str, Any]) -> Prepared:
+    from app.llm_domain import build_sorting_trace_ir
+
+    raw = build_sorting_trace_ir(user_text, token=token)
+    errors = validate_sorting_trace(raw)
+    if errors:
+        raise PrepareError("; ".join(errors), {"sorting_trace": raw})
+    # 응답 / 큐 / 씬 파일에는 압축 형식(초기 배열 + 연산 열)만 싣는다
+    return Prepared(CompactTrace.from_trace_ir(raw).to_json())
+
+
+def _render_sorting(ir, job, token=None, quality="l", **kwargs):
+    return render_sorting(ir, token=token, job=job, quality=quality, **kwargs)
+
+
+_SORTING_SAMPLE = {
+    "algorithm": "bubble_sort",
+    "input": {"array": [2, 1, 3]},
+    "trace": [
+        {"step": 1, "compare": [0, 1], "swap": True, "array": [1, 2, 3]},
+        {"step": 2, "compare": [1, 2], "swap": False, "array": [1, 2, 3]},
+    ],
+    "metadata": {"domain": "sorting"},
+}
+
+
+# --- TRANSFORMER ---
+def _prepare_attention(user_text: str, token: Optional[CancelToken], pseudo_ir: Dict[str, Any]) -> Prepared:
+    from app.llm import call_llm_attention_ir
+
+    # head 수는 LLM이 요청에서 추출 (D_MODEL을 나누지 않거나 MAX_HEADS를 넘으면 ValueError)
+    try:
+        attn_ir = call_llm_attention_ir(user_text, token=token)
+    except ValueError as e:
+        raise PrepareError(str(e))
+    return Prepared(attn_ir, render_kwargs={"out_basename": "attn_demo"})
+
+
+def _render_attention(ir, job, token=None, quality="l", **kwargs):
+    return render_seq_attention(ir, token=token, job=job, quality=quality, **kwargs)
+
+
+# --- CACHE (교체 정책 시뮬레이터: 정책 / 용량 / 접근 열만 LLM이 추출) ---
+def _prepare_cache(user_text: str, token: Optional[CancelToken], pseudo_ir: Dict[str, Any]) -> Prepared:
+    from app.llm import call_llm_domain_ir
+
+    spec = call_llm_domain_ir("cache_sim", user_text, token=token)
+    context = {"cache_spec": spec}
+    try:
+        trace = build_cache_trace(spec)
+    except (TypeError, ValueError) as e:
+        raise PrepareError(str(e), context)
+    return Prepared(trace, context)
+
+
+def _render_cache(ir, job, token=None, quality="l", **kwargs):
+    return render_cache(ir, token=token, job=job, quality=quality, **kwargs)
+
+
+_CACHE_SAMPLE = {"policy": "s3fifo", "capacity": 3, "accesses": ["A", "B", "A", "C", "B"], "title": "Warm-up"}
+
+
+# --- FLOW (pipeline / math: pseudocode IR을 그대로 그림) ---
+def _prepare_flow(user_text: str, token: Optional[CancelToken], pseudo_ir: Dict[str, Any]) -> Prepared:
+    # 추가 LLM 호출 없음 (anim IR / codegen 생략)
+    try:
+        flow_ir = build_flow_ir(pseudo_ir)
+    except ValueError as e:
+        raise PrepareError(str(e), {"pseudocode_ir": pseudo_ir})
+    return Prepared(flow_ir, {"pseudocode_ir": pseudo_ir})
+
+
+def _render_flow(ir, job, token=None, quality="l", **kwargs):
+    return render_flow(ir, token=token, job=job, quality=quality, **kwargs)
+
+
+_FLOW_SAMPLE = {
+    "metadata": {"title": "Warm-up"},
+    "entities": [{"id": "client"}, {"id": "cache"}, {"id": "database"}],
+    "operations": [
+        {"step": 1, "subject": "client", "action": "request", "target": "cache"},
+        {"step": 2, "subject": "cache", "action": "fetch", "target": "database"},
+        {"step": 3, "subject": "cache", "action": "highlight"},
+    ],
+}
+
+
+# --- GRID (행렬 곱 / DP 표 / 격자로 본 attention: grid IR을 NumPy로 실행) ---
+def _prepare_grid(user_text: str, token: Optional[CancelToken], pseudo_ir: Dict[str, Any]) -> Prepared:
+    from app.llm import call_llm_domain_ir
+
+    grid_ir = call_llm_domain_ir("grid", user_text, token=token)
+    context = {"grid_ir": grid_ir}
+    try:
+        trace = build_grid_trace(grid_ir)
+    except (TypeError, AttributeError, ValueError) as e:
+        raise PrepareError(str(e), context)
+    return Prepared(trace, context)
+
+
+def _render_grid(ir, job, token=None, quality="l", **kwargs):
+    return render_grid(ir, token=token, job=job, quality=quality, **kwargs)
+
+
+_GRID_SAMPLE = {"algorithm": "matmul", "inputs": {"A": [[1, 2]], "B": [[3], [4]]}, "title": "Warm-up"}
+
+
+# --- GENERIC (LLM이 만든 씬 코드) ---
+def _render_generic(ir, job, token=None, quality="l", **kwargs):
+    out_path = job.output_path(kwargs.get("out_basename", "generic"), "mp4")
+    ok = render_scene_file(ir["code"], "AlgorithmScene", out_path, job.temp_dir(), quality=quality, token=token)
+    return str(out_path) if ok else None
+
+
+def _validate_generic(ir: Dict[str, Any]) -> List[str]:
+    return [] if isinstance(ir.get("code"), str) and ir["code"].strip() else ["generic IR needs scene code"]
+
+
+_GENERIC_SAMPLE_CODE = """
+from manim import *
+
+class AlgorithmScene(Scene):
+    def construct(self):
+        label = VGroup(Text("warm-up"), MathTex(r"x_0 + 1")).arrange(DOWN)
+        self.play(FadeIn(label), run_time=0.2)
+"""
+
+
+register(Renderer(
+    kind="cnn",
+    pattern=PatternType.GRID,
+    domains=("cnn_param",),
+    prepare=_prepare_cnn,
+    validate=validate_cnn_trace,
+    features=cost._cnn_features,
+    cheaper=cost.CHEAPER_OPTIONS["cnn"],
+    render=_render_cnn,
+    ir_key="cnn_trace",
+    max_concurrency=2,
+    warmup=_render_sample("cnn", lambda: build_cnn_trace({"input_size": 3, "kernel_size": 2, "padding": 0})),
+    storyboard=cnn_storyboard,
+))
+
+register(Renderer(
+    kind="sorting",
+    pattern=PatternType.SEQUENCE,
+    domains=("sorting",),
+    prepare=_prepare_sorting,
+    validate=validate_sorting_trace,
+    features=cost._sorting_features,
+    cheaper=cost.CHEAPER_OPTIONS["sorting"],
+    render=_render_sorting,
+    ir_key="sorting_trace",
+    max_concurrency=2,
+    warmup=_render_sample("sorting", lambda: dict(_SORTING_SAMPLE)),
+    storyboard=sorting_storyboard,
+))
+
+register(Renderer(
+    kind="seq_attention",
+    pattern=PatternType.SEQ_ATTENTION,
+    domains=("transformer",),
+    prepare=_prepare_attention,
+    validate=validate_attention_ir,
+    features=cost._attention_features,
+    cheaper=cost.CHEAPER_OPTIONS["seq_attention"],
+    render=_render_attention,
+    ir_key="attention_ir",
+    max_concurrency=2,
+    warmup=_render_sample("seq_attention", lambda: build_attention_ir("warm up the attention cache")),
+    storyboard=attention_storyboard,
+))
+
+register(Renderer(
+    kind="cache",
+    pattern=PatternType.FLOW,
+    domains=("cache",),
+    prepare=_prepare_cache,
+    validate=validate_cache_trace,
+    features=cost._cache_features,
+    cheaper=cost.CHEAPER_OPTIONS["cache"],
+    render=_render_cache,
+    ir_key="cache_trace",
+    max_concurrency=2,
+    warmup=_render_sample("cache", lambda: build_cache_trace(_CACHE_SAMPLE)),
+    storyboard=cache_storyboard,
+))
+
+register(Renderer(
+    kind="flow",
+    pattern=PatternType.FLOW,
+    domains=("math", "pipeline"),
+    prepare=_prepare_flow,
+    validate=validate_flow_ir,
+    features=cost._flow_features,
+    cheaper=cost.CHEAPER_OPTIONS["flow"],
+    render=_render_flow,
+    ir_key="flow_ir",
+    max_concurrency=2,
+    warmup=_render_sample("flow", lambda: build_flow_ir(_FLOW_SAMPLE)),
+    storyboard=flow_storyboard,
+))
+
+register(Renderer(
+    kind="grid",
+    pattern=PatternType.GRID,
+    domains=("table", "math", "transformer", "generic"),
+    prepare=_prepare_grid,
+    validate=validate_grid_trace,
+    features=cost._grid_features,
+    cheaper=cost.CHEAPER_OPTIONS["grid"],
+    render=_render_grid,
+    ir_key="grid_trace",
+    max_concurrency=2,
+    warmup=_render_sample("grid", lambda: build_grid_trace(_GRID_SAMPLE)),
+    storyboard=grid_storyboard,
+))
+
+register(Renderer(
+    kind="generic",
+    pattern=PatternType.GENERIC,
+    validate=_validate_generic,
+    features=cost._generic_features,
+    render=_render_generic,
+    max_concurrency=2,
+    warmup=_render_sample("generic", lambda: {"code": _GENERIC_SAMPLE_CODE}),
+))
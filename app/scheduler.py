@@ -0,0 +1,167 @@
+# app/scheduler.py
+"""
+테넌트 공정 분배 + shortest-job-first 슬롯 스케줄러.
+
+manim 렌더 슬롯(RENDER_SCHEDULER)과 LLM 호출 동시성(LLM_SCHEDULER)에 같은 방식을 쓴다.
+슬롯이 비면 기다리는 요청 중 다음 순서로 가장 앞선 것을 들여보낸다.
+
+  1) 클래스: interactive 테넌트가 batch보다 먼저
+  2) 테넌트 가상 시간: 지금까지 받은 서비스량(예상 비용) / weight 가 작은 테넌트 먼저 (WFQ)
+  3) 테넌트 안에서는 예상 렌더 시간 − AGING_RATE × 대기 시간 이 작은 요청 먼저 (SJF + aging)
+
+또 테넌트별 동시 실행 상한(policy.max_renders / max_llm)을 넘지 않고,
+batch 테넌트는 INTERACTIVE_RESERVED_SLOTS만큼은 비워 둔다
+→ 한 강의가 수백 개를 몰아 넣어도 다른 사용자는 빈 슬롯을 바로 얻는다.
+
+렌더는 워커 스레드(asyncio.to_thread)에서 돌기 때문에 threading.Condition 기반.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.cancel import CancelToken, POLL_INTERVAL_S, RequestCancelled
+from app.tenants import BATCH, DEFAULT_TENANT, policy_for
+
+RENDER_SLOTS = int(os.getenv("RENDER_SLOTS", "2"))
+LLM_SLOTS = int(os.getenv("LLM_SLOTS", "8"))
+# batch 테넌트가 건드릴 수 없는 슬롯 수 (interactive 전용)
+INTERACTIVE_RESERVED_SLOTS = int(os.getenv("INTERACTIVE_RESERVED_SLOTS", "1"))
+# 1초 기다릴 때마다 예상 렌더 시간에서 빼 주는 초
+AGING_RATE = float(os.getenv("RENDER_AGING_RATE", "1.0"))
+# LLM 호출 하나의 비용 단위 (공정 분배용)
+LLM_CALL_COST = 1.0
+
+
+class _Waiter:
+    __slots__ = ("seq", "cost_s", "enqueued", "label", "tenant", "batch")
+
+    def __init__(self, seq: int, cost_s: float, label: str, tenant: str):
+        self.seq = seq
+        self.cost_s = cost_s
+        self.enqueued = time.monotonic()
+        self.label = label
+        self.tenant = tenant
+        self.batch = policy_for(tenant).klass == BATCH
+
+    def sjf_priority(self, now: float) -> float:
+        return self.cost_s - AGING_RATE * (now - self.enqueued)
+
+
+class FairScheduler:
+    def __init__(self, slots: int, cap_field: str):
+        self.slots = slots
+        # TenantPolicy에서 테넌트별 동시 실행 상한을 읽을 필드 이름
+        self.cap_field = cap_field
+        self.running = 0
+        self.running_batch = 0
+        self._running_by_tenant: Dict[str, int] = defaultdict(int)
+        self._vtime: Dict[str, float] = defaultdict(float)
+        self._cond = threading.Condition()
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    # --- 선택 ---
+    def _eligible(self, w: _Waiter) -> bool:
+        if self.running >= self.slots:
+            return False
+        if self._running_by_tenant[w.tenant] >= getattr(policy_for(w.tenant), self.cap_field):
+            return False
+        if w.batch:
+            batch_slots = max(1, self.slots - INTERACTIVE_RESERVED_SLOTS)
+            if self.running_batch >= batch_slots:
+                return False
+        return True
+
+    def _next(self) -> Optional[_Waiter]:
+        now = time.monotonic()
+        eligible = [w for w in self._waiting if self._eligible(w)]
+        if not eligible:
+            return None
+        return min(
+            eligible,
+            key=lambda w: (w.batch, self._vtime[w.tenant], w.sjf_priority(now), w.seq),
+        )
+
+    def _activate(self, tenant: str) -> None:
+        """쉬던 테넌트가 돌아오면 가상 시간을 현재 활성 테넌트 최소값으로 맞춘다 (쌓아 둔 몫 방지)."""
+        busy = self._running_by_tenant[tenant] or any(w.tenant == tenant for w in self._waiting)
+        if busy:
+            return
+        active = {w.tenant for w in self._waiting} | {t for t, n in self._running_by_tenant.items() if n}
+        if active:
+            self._vtime[tenant] = max(self._vtime[tenant], min(self._vtime[t] for t in active))
+
+    # --- 획득 / 반납 ---
+    def acquire(self, cost_s: float, token: Optional[CancelToken] = None, label: str = "") -> float:
+        """슬롯을 얻을 때까지 대기. 기다린 시간(초)을 돌려준다. 취소되면 RequestCancelled."""
+        tenant = getattr(token, "tenant", None) or DEFAULT_TENANT
+        with self._cond:
+            self._activate(tenant)
+            waiter = _Waiter(next(self._seq), cost_s, label, tenant)
+            self._waiting.append(waiter)
+            try:
+                while self._next() is not waiter:
+                    if token is not None and token.cancelled:
+                        raise RequestCancelled(token.reason or "cancelled", token.current_stage)
+                    # aging 때문에 순서가 시간에 따라 바뀌므로 주기적으로 다시 확인
+                    self._cond.wait(POLL_INTERVAL_S)
+            finally:
+                self._waiting.remove(waiter)
+                # 내가 빠지면서 다음 후보가 바뀌었을 수 있다
+                self._cond.notify_all()
+            self.running += 1
+            self.running_batch += waiter.batch
+            self._running_by_tenant[tenant] += 1
+            self._vtime[tenant] += cost_s / max(policy_for(tenant).weight, 1e-6)
+            return time.monotonic() - waiter.enqueued
+
+    def release(self, token: Optional[CancelToken] = None) -> None:
+        tenant = getattr(token, "tenant", None) or DEFAULT_TENANT
+        with self._cond:
+            self.running -= 1
+            self.running_batch -= policy_for(tenant).klass == BATCH
+            self._running_by_tenant[tenant] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, cost_s: float, token: Optional[CancelToken] = None, label: str = "") -> Iterator[float]:
+        waited = self.acquire(cost_s, token, label)
+        try:
+            yield waited
+        finally:
+            self.release(token)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "slots": self.slots,
+                "running": self.running,
+                "running_by_tenant": {t: n for t, n in self._running_by_tenant.items() if n},
+                "waiting": [
+                    {
+                        "tenant": w.tenant,
+                        "label": w.label,
+                        "cost_s": round(w.cost_s, 2),
+                        "waited_s": round(now - w.enqueued, 2),
+                    }
+                    for w in self._waiting
+                ],
+            }
+
+
+RENDER_SCHEDULER = FairScheduler(RENDER_SLOTS, "max_renders")
+LLM_SCHEDULER = FairScheduler(LLM_SLOTS, "max_llm")
+
+
+@contextmanager
+def llm_slot(token: Optional[CancelToken] = None) -> Iterator[None]:
+    """LLM 호출 한 번을 테넌트 공정 분배 아래에서 실행."""
+    with LLM_SCHEDULER.slot(LLM_CALL_COST, token, label="llm"):
+        yield
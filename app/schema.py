@@ -111,6 +111,28 @@ ATTENTION_IR_SCHEMA: Dict[str, Any] = {
             "type": "integer",
             "minimum": 0,
         },
+        # multi-head: head마다 N x N attention 행렬 (선택)
+        "heads": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["weights"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "weights": {
+                        "type": "array",
+                        "minItems": 1,
+                        "items": {
+                            "type": "array",
+                            "minItems": 1,
+                            "items": {"type": "number"},
+                        },
+                    },
+                },
+                "additionalProperties": False,
+            },
+        },
         "next_token": {                 
             "type": "object",
             "required": ["candidates", "probs"],
@@ -169,7 +191,18 @@ def validate_attention_ir(doc: Dict[str, Any]) -> List[str]:
     if isinstance(qi, int) and not (0 <= qi < len(tokens)):
         errors.append("query_index out of range")
 
-    # 4) next_token (선택) 검증
+    # 4) heads (선택): 각 head는 N x N
+    heads = doc.get("heads")
+    if isinstance(heads, list):
+        n = len(tokens)
+        for h, head in enumerate(heads):
+            hw = head.get("weights") if isinstance(head, dict) else None
+            if not isinstance(hw, list):
+                continue
+            if len(hw) != n or any(not isinstance(row, list) or len(row) != n for row in hw):
+                errors.append(f"heads[{h}].weights must be a len(tokens) x len(tokens) matrix")
+
+    # 5) next_token (선택) 검증
     nt = doc.get("next_token")
     if nt is not None:
         cands = nt.get("candidates")
@@ -180,3 +213,364 @@ def validate_attention_ir(doc: Dict[str, Any]) -> List[str]:
             errors.append("next_token.candidates and probs must have the same length")
 
     return errors
+
+
+# === cnn_param (CNN forward trace) IR 스키마 ===
+
+_INT_MATRIX = {
+    "type": "array",
+    "items": {"type": "array", "items": {"type": "integer"}},
+}
+
+CNN_TRACE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": [
+        "params", "out_size", "pool_size", "padded", "kernel", "feature_map",
+        "relu_mask", "relu", "pooled", "flatten", "logits", "softmax",
+    ],
+    "properties": {
+        "params": {
+            "type": "object",
+            "required": ["input_size", "kernel_size", "stride", "padding"],
+            "properties": {
+                "input_size": {"type": "integer", "minimum": 1},
+                "kernel_size": {"type": "integer", "minimum": 1},
+                "stride": {"type": "integer", "minimum": 1},
+                "padding": {"type": "integer", "minimum": 0},
+                "seed": {"type": "integer"},
+            },
+        },
+        "out_size": {"type": "integer", "minimum": 1},
+        "pool_size": {"type": "integer", "minimum": 1},
+        "padded": _INT_MATRIX,
+        "kernel": _INT_MATRIX,
+        "feature_map": _INT_MATRIX,
+        "relu_mask": _INT_MATRIX,
+        "relu": _INT_MATRIX,
+        "pooled": _INT_MATRIX,
+        "flatten": {"type": "array", "items": {"type": "integer"}},
+        # 선택: 없으면 씬은 dense 간선을 같은 굵기로 그린다
+        "dense_w": {"type": "array", "items": {"type": "array", "items": {"type": "number"}}},
+        "logits": {"type": "array", "items": {"type": "number"}, "minItems": 1},
+        "softmax": {"type": "array", "items": {"type": "number"}, "minItems": 1},
+    },
+    "additionalProperties": True,
+}
+
+CNN_TRACE_VALIDATOR = Draft7Validator(CNN_TRACE_SCHEMA)
+
+
+def _shape(m: Any) -> tuple:
+    if not isinstance(m, list) or not m or not isinstance(m[0], list):
+        return (len(m) if isinstance(m, list) else -1,)
+    if any(not isinstance(row, list) or len(row) != len(m[0]) for row in m):
+        return (-1,)
+    return (len(m), len(m[0]))
+
+
+def validate_cnn_trace(doc: Dict[str, Any]) -> List[str]:
+    errors: List[str] = [err.message for err in CNN_TRACE_VALIDATOR.iter_errors(doc)]
+    if errors:
+        return errors
+
+    p = doc["params"]
+    total = p["input_size"] + 2 * p["padding"]
+    k = p["kernel_size"]
+    out = doc["out_size"]
+    pooled_out = out // doc["pool_size"]
+
+    # 1) 각 배열의 shape이 params와 맞는지
+    expected = {
+        "padded": (total, total),
+        "kernel": (k, k),
+        "feature_map": (out, out),
+        "relu_mask": (out, out),
+        "relu": (out, out),
+    }
+    if out != (total - k) // p["stride"] + 1:
+        errors.append("out_size does not match (input + 2*padding - kernel) // stride + 1")
+    for key, shape in expected.items():
+        if _shape(doc[key]) != shape:
+            errors.append(f"{key} must have shape {shape}")
+    if pooled_out and _shape(doc["pooled"]) != (pooled_out, pooled_out):
+        errors.append(f"pooled must have shape {(pooled_out, pooled_out)}")
+    if len(doc["flatten"]) != pooled_out * pooled_out:
+        errors.append("len(flatten) must equal pooled cell count")
+    if "dense_w" in doc and doc["flatten"] and _shape(doc["dense_w"]) != (len(doc["logits"]), len(doc["flatten"])):
+        errors.append("dense_w must have shape (len(logits), len(flatten))")
+
+    # 2) ReLU / softmax 불변성
+    if not errors:
+        for i in range(out):
+            for j in range(out):
+                v = doc["feature_map"][i][j]
+                if doc["relu"][i][j] != max(v, 0) or doc["relu_mask"][i][j] != int(v >= 0):
+                    errors.append(f"relu mismatch at {[i, j]}")
+                    break
+    if len(doc["logits"]) != len(doc["softmax"]):
+        errors.append("logits and softmax must have the same length")
+    if abs(sum(doc["softmax"]) - 1.0) > 1e-3:
+        errors.append("softmax must sum to 1")
+
+    return errors
+
+
+# === sorting trace IR 검증 ===
+
+def validate_sorting_trace(doc: Dict[str, Any]) -> List[str]:
+    """기존 스키마(step마다 array 스냅샷)와 압축 형식(app.compact_trace) 둘 다 받는다."""
+    from app.compact_trace import CompactTrace, is_compact
+
+    errors: List[str] = []
+    arr = (doc.get("input") or {}).get("array")
+    if not isinstance(arr, list) or not arr or not all(isinstance(v, (int, float)) for v in arr):
+        return ["input.array must be a non-empty list of numbers"]
+    if is_compact(doc):
+        try:
+            return CompactTrace.from_json(doc).validate()
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            return [f"invalid compact trace: {e}"]
+
+    trace = doc.get("trace", [])
+    if not isinstance(trace, list):
+        return ["trace must be a list"]
+
+    n = len(arr)
+    for i, step in enumerate(trace):
+        if not isinstance(step, dict):
+            errors.append(f"trace[{i}] must be an object")
+            continue
+        cmp_ = step.get("compare")
+        if cmp_ is not None and (
+            not isinstance(cmp_, list) or any(not isinstance(j, int) or not 0 <= j < n for j in cmp_)
+        ):
+            errors.append(f"trace[{i}].compare indices out of range")
+        state = step.get("array")
+        if state is not None and (not isinstance(state, list) or len(state) != n):
+            errors.append(f"trace[{i}].array must have len(input.array) elements")
+    return errors
+
+
+# === flow IR (app.render_flow.build_flow_ir 결과) 검증 ===
+
+FLOW_IR_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["title", "layout", "rows", "cols", "entities", "edges", "ops"],
+    "properties": {
+        "title": {"type": "string"},
+        "layout": {"enum": ["row", "column", "grid", "graph"]},
+        "rows": {"type": "integer", "minimum": 1},
+        "cols": {"type": "integer", "minimum": 1},
+        # layout == "graph"일 때 엔티티별 [x, y] (app.graph_layout, 프레임 좌표)
+        "positions": {
+            "type": "array",
+            "items": {"type": "array", "minItems": 2, "maxItems": 2, "items": {"type": "number"}},
+        },
+        "entities": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["id", "label", "width", "deferred"],
+                "properties": {
+                    "id": {"type": "string"},
+                    "label": {"type": "string"},
+                    "width": {"type": "number", "exclusiveMinimum": 0},
+                    "deferred": {"type": "boolean"},
+                },
+            },
+        },
+        "edges": {
+            "type": "array",
+            "items": {"type": "array", "minItems": 2, "maxItems": 2, "items": {"type": "integer"}},
+        },
+        "ops": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["kind", "subject", "target", "caption"],
+                "properties": {
+                    "kind": {"enum": ["create", "flow", "highlight", "fade"]},
+                    "subject": {"type": "integer"},
+                    "target": {"type": ["integer", "null"]},
+                    "caption": {"type": "string"},
+                },
+            },
+        },
+    },
+}
+
+FLOW_IR_VALIDATOR = Draft7Validator(FLOW_IR_SCHEMA)
+
+
+def validate_flow_ir(doc: Dict[str, Any]) -> List[str]:
+    errors: List[str] = [err.message for err in FLOW_IR_VALIDATOR.iter_errors(doc)]
+    if errors:
+        return errors
+
+    n = len(doc["entities"])
+    if doc["rows"] * doc["cols"] < n:
+        errors.append("rows * cols must fit every entity")
+    if doc["layout"] == "graph" and len(doc.get("positions", [])) != n:
+        errors.append("graph layout needs one position per entity")
+    for a, b in doc["edges"]:
+        if not (0 <= a < n and 0 <= b < n):
+            errors.append(f"edge {[a, b]} refers to a missing entity")
+    edges = {tuple(e) for e in doc["edges"]}
+    for k, op in enumerate(doc["ops"]):
+        s, t = op["subject"], op["target"]
+        if not 0 <= s < n or (t is not None and not 0 <= t < n):
+            errors.append(f"ops[{k}] refers to a missing entity")
+        elif op["kind"] == "flow" and (t is None or (s, t) not in edges):
+            errors.append(f"ops[{k}]: flow needs an edge subject -> target")
+    return errors
+
+
+# === grid trace (app.grid_ir.build_grid_trace 결과) 검증 ===
+
+GRID_TRACE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["title", "decimals", "matrices", "steps"],
+    "properties": {
+        "title": {"type": "string"},
+        "decimals": {"type": "integer", "minimum": 0},
+        "matrices": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["name", "rows", "cols", "values", "row_labels", "col_labels"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "rows": {"type": "integer", "minimum": 1},
+                    "cols": {"type": "integer", "minimum": 1},
+                    "values": {
+                        "type": "array",
+                        "items": {"type": "array", "items": {"type": ["number", "null"]}},
+                    },
+                    "row_labels": {"type": "array", "items": {"type": "string"}},
+                    "col_labels": {"type": "array", "items": {"type": "string"}},
+                },
+            },
+        },
+        "steps": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["caption", "highlights", "writes"],
+                "properties": {
+                    "caption": {"type": "string"},
+                    "highlights": {
+                        "type": "array",
+                        "items": {"type": "array", "minItems": 5, "maxItems": 5, "items": {"type": "integer"}},
+                    },
+                    "writes": {
+                        "type": "array",
+                        "items": {"type": "array", "minItems": 4, "maxItems": 4, "items": {"type": "number"}},
+                    },
+                },
+            },
+        },
+    },
+}
+
+GRID_TRACE_VALIDATOR = Draft7Validator(GRID_TRACE_SCHEMA)
+
+
+def validate_grid_trace(doc: Dict[str, Any]) -> List[str]:
+    errors: List[str] = [err.message for err in GRID_TRACE_VALIDATOR.iter_errors(doc)]
+    if errors:
+        return errors
+
+    shapes = []
+    for mat in doc["matrices"]:
+        shape = (mat["rows"], mat["cols"])
+        if _shape(mat["values"]) != shape:
+            errors.append(f"matrix {mat['name']}: values must be {shape[0]} x {shape[1]}")
+        shapes.append(shape)
+
+    def inside(m: int, r: int, c: int) -> bool:
+        return 0 <= m < len(shapes) and 0 <= r < shapes[m][0] and 0 <= c < shapes[m][1]
+
+    for k, step in enumerate(doc["steps"]):
+        for m, r0, c0, r1, c1 in step["highlights"]:
+            if r0 > r1 or c0 > c1 or not (inside(m, r0, c0) and inside(m, r1, c1)):
+                errors.append(f"steps[{k}]: highlight {[m, r0, c0, r1, c1]} is outside its matrix")
+        for m, r, c, _ in step["writes"]:
+            if not all(float(x).is_integer() for x in (m, r, c)) or not inside(int(m), int(r), int(c)):
+                errors.append(f"steps[{k}]: write to {[m, r, c]} is outside its matrix")
+    return errors
+
+
+# === cache trace (app.cache_sim.build_cache_trace 결과) 검증 ===
+
+CACHE_TRACE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["title", "policy", "capacity", "queues", "labels", "frames", "summary", "ratio_series", "compare"],
+    "properties": {
+        "title": {"type": "string"},
+        "policy": {"enum": ["fifo", "lru", "clock", "s3fifo"]},
+        "capacity": {"type": "integer", "minimum": 1},
+        "queues": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["name", "capacity", "ghost"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "capacity": {"type": "integer", "minimum": 1},
+                    "ghost": {"type": "boolean"},
+                },
+            },
+        },
+        "labels": {"type": "array", "items": {"type": "string"}},
+        "frames": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["key", "hit", "events", "queues"],
+                "properties": {
+                    "key": {"type": "integer", "minimum": 0},
+                    "hit": {"type": "boolean"},
+                    "events": {
+                        "type": "array",
+                        "items": {"type": "array", "minItems": 3, "maxItems": 3},
+                    },
+                    "queues": {"type": "array", "items": {"type": "array", "items": {"type": "integer"}}},
+                },
+            },
+        },
+        "summary": {
+            "type": "object",
+            "required": ["accesses", "hits", "misses", "hit_ratio"],
+            "properties": {"hit_ratio": {"type": "number", "minimum": 0, "maximum": 1}},
+        },
+        "ratio_series": {"type": "array", "items": {"type": "number", "minimum": 0, "maximum": 1}},
+        "compare": {"type": "object", "additionalProperties": {"type": "number"}},
+    },
+}
+
+CACHE_TRACE_VALIDATOR = Draft7Validator(CACHE_TRACE_SCHEMA)
+
+
+def validate_cache_trace(doc: Dict[str, Any]) -> List[str]:
+    errors: List[str] = [err.message for err in CACHE_TRACE_VALIDATOR.iter_errors(doc)]
+    if errors:
+        return errors
+
+    caps = [q["capacity"] for q in doc["queues"]]
+    n_labels = len(doc["labels"])
+    for k, frame in enumerate(doc["frames"]):
+        if len(frame["queues"]) != len(caps):
+            errors.append(f"frames[{k}] must list every queue")
+            continue
+        keys = [key for q in frame["queues"] for key in q]
+        if any(len(q) > cap for q, cap in zip(frame["queues"], caps)):
+            errors.append(f"frames[{k}]: a queue holds more keys than its capacity")
+        if len(set(keys)) != len(keys):
+            errors.append(f"frames[{k}]: a key appears in two slots")
+        if any(key >= n_labels for key in [frame["key"], *keys, *(e[1] for e in frame["events"])]):
+            errors.append(f"frames[{k}] refers to a missing label")
+    return errors
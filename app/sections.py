@@ -0,0 +1,325 @@
+# app/sections.py
+"""
+섹션 단위 증분 렌더링.
+
+렌더러는 씬을 이름 붙은 섹션(예: CNN = input/conv/relu/pool/flatten/dense/softmax)으로
+나누고, 섹션마다 "그 섹션 화면에 영향을 주는 sub-IR"을 넘긴다.
+
+  섹션 키 = sha256(렌더러, 템플릿 버전, 섹션 이름, 모드 플래그, sub-IR, 품질, 포맷)
+  템플릿 버전 = 템플릿 + 씬이 import하는 헬퍼 모듈(SCENE_HELPER_MODULES) 소스 + SECTION_CACHE_VERSION
+
+키에 해당하는 영상이 공유 섹션 캐시에 있으면 재사용하고, 없는 섹션만 manim으로 렌더한 뒤
+ffmpeg concat demuxer로 무손실(-c copy) 이어 붙인다.
+
+없는 섹션들은 섹션마다 별도 manim 프로세스로 동시에(최대 SECTION_WORKERS개) 렌더한다.
+각 프로세스는 앞 섹션을 프레임 없이 재생해서 시작 상태를 IR로부터 다시 만들기 때문에
+섹션끼리 공유하는 상태가 없고, 긴 씬의 렌더 시간이 코어 수에 맞춰 줄어든다.
+
+씬 쪽 약속:
+  - 템플릿에 __SECTIONS__ placeholder가 있고, 렌더할 섹션 이름 리스트(또는 None)로 치환된다.
+  - 씬은 layout_utils.SectionMixin을 상속하고 각 섹션 시작에서 self.begin_section(name) 호출
+    → 대상이 아닌 앞 섹션은 프레임 없이 실행만 되어 시작 상태가 IR로부터 재구성되고,
+      마지막 대상 섹션이 끝나면 바로 종료된다.
+
+씬 파일과 manim media_dir(partial movie 등)은 job의 scratch 디렉토리에 만들고
+렌더가 끝나면 지운다. 요청 간 재사용은 섹션 캐시가 담당하고,
+섹션 캐시 크기는 SECTION_CACHE_QUOTA_MB를 넘으면 LRU로 정리된다.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.cancel import CancelToken, run_manim
+from app.media_store import MediaJob, prune_files
+from app.tex_cache import SHARED_CACHE_ROOT
+
+SECTION_CACHE_DIR = Path(os.getenv("MANIM_SECTION_CACHE", str(SHARED_CACHE_ROOT / "sections")))
+SECTION_CACHE_QUOTA_BYTES = int(float(os.getenv("SECTION_CACHE_QUOTA_MB", "4096")) * 1024 * 1024)
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+# 동시에 띄울 섹션 렌더 프로세스 수 (0이면 CPU 코어 수)
+SECTION_WORKERS = int(os.getenv("SECTION_WORKERS", "0")) or os.cpu_count() or 1
+
+# manim -q<flag> → 출력 하위 디렉토리 이름
+QUALITY_DIRS = {"l": "480p15", "m": "720p30", "h": "1080p60", "p": "1440p60", "k": "2160p60"}
+# -c copy로 이어 붙일 수 있는 컨테이너. 그 외(gif 등)는 섹션 없이 통째로 렌더
+CONCAT_FORMATS = {"mp4", "mov", "webm"}
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 씬 템플릿이 import하는 app 모듈. 이 파일들이 바뀌어도 섹션 캐시가 무효화된다
+SCENE_HELPER_MODULES = ("layout_utils.py", "graph_layout.py", "tex_cache.py", "compact_trace.py")
+# 위 목록 밖의 변화(manim 업그레이드 등)로 캐시를 버려야 할 때 올린다
+SECTION_CACHE_VERSION = 1
+
+# (섹션 이름, 그 섹션이 의존하는 sub-IR)
+Section = Tuple[str, Any]
+
+
+@lru_cache(maxsize=1)
+def _helpers_digest() -> str:
+    h = hashlib.sha256(str(SECTION_CACHE_VERSION).encode())
+    for name in SCENE_HELPER_MODULES:
+        h.update(name.encode("utf-8"))
+        h.update((PROJECT_ROOT / "app" / name).read_bytes())
+    return h.hexdigest()
+
+
+def template_version(template: str) -> str:
+    """씬 템플릿 + 헬퍼 모듈 내용 해시. 둘 중 하나라도 바뀌면 모든 섹션 캐시가 무효화된다."""
+    return hashlib.sha256((_helpers_digest() + template).encode("utf-8")).hexdigest()[:16]
+
+
+def section_key(
+    namespace: str,
+    version: str,
+    name: str,
+    sub_ir: Any,
+    variant: Optional[Dict[str, Any]] = None,
+    quality: str = "l",
+    fmt: str = "mp4",
+) -> str:
+    payload = json.dumps(
+        {
+            "ns": namespace,
+            "version": version,
+            "section": name,
+            "variant": variant or {},
+            "ir": sub_ir,
+            "quality": quality,
+            "fmt": fmt,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(namespace: str, key: str, fmt: str) -> Path:
+    return SECTION_CACHE_DIR / namespace / key[:2] / f"{key}.{fmt}"
+
+
+def _empty_marker(path: Path) -> Path:
+    return path.with_suffix(".empty")
+
+
+def render_scene_file(
+    scene_code: str,
+    scene_name: str,
+    dest: Path,
+    work_dir: Path,
+    quality: str = "l",
+    fmt: str = "mp4",
+    token: Optional[CancelToken] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> bool:
+    """
+    scene_code를 work_dir 아래 scratch에서 manim으로 렌더하고 결과를 dest로 옮긴다.
+    재생된 애니메이션이 하나도 없어서 영상이 안 나오면 False. scratch는 항상 지운다.
+    """
+    scratch = Path(tempfile.mkdtemp(prefix="manim-", dir=work_dir))
+    try:
+        py_path = scratch / "scene.py"
+        py_path.write_text(scene_code, encoding="utf-8")
+
+        env = dict(env or os.environ)
+        env["PYTHONPATH"] = str(PROJECT_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+
+        out_name = f"{dest.stem}.{fmt}"
+        cmd = [
+            "manim",
+            f"-q{quality}",
+            str(py_path),
+            scene_name,
+            "--format", fmt,
+            "--media_dir", str(scratch / "media"),
+            "-o", out_name,
+        ]
+        run_manim(cmd, token=token, env=env)
+
+        produced = scratch / "media" / "videos" / py_path.stem / QUALITY_DIRS[quality] / out_name
+        if not produced.exists():
+            return False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # 캐시 디렉토리가 다른 파일시스템일 수 있어서 os.replace 대신 move
+        shutil.move(str(produced), str(dest))
+        return True
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def concat_videos(parts: Sequence[Path], out_path: Path, token: Optional[CancelToken] = None) -> None:
+    """같은 코덱/해상도의 영상들을 ffmpeg concat demuxer로 재인코딩 없이 이어 붙인다."""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if len(parts) == 1:
+        shutil.copyfile(parts[0], out_path)
+        return
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, dir=out_path.parent) as lst:
+        for p in parts:
+            escaped = str(Path(p).resolve()).replace("'", r"'\''")
+            lst.write(f"file '{escaped}'\n")
+        list_path = lst.name
+    try:
+        cmd = [
+            FFMPEG_BIN, "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy", str(out_path),
+        ]
+        run_manim(cmd, token=token)
+    finally:
+        os.unlink(list_path)
+
+
+def render_sectioned(
+    namespace: str,
+    template: str,
+    build_scene_code: Callable[[Optional[List[str]]], str],
+    scene_name: str,
+    sections: Sequence[Section],
+    job: MediaJob,
+    basename: str,
+    variant: Optional[Dict[str, Any]] = None,
+    quality: str = "l",
+    fmt: str = "mp4",
+    token: Optional[CancelToken] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    섹션 캐시를 거쳐 job 디렉토리에 최종 영상(basename.fmt)을 만든다.
+
+    - build_scene_code(names): names 섹션만 렌더하는 씬 코드 (None이면 전체)
+    - 반환: {"path", "sections": [{"name", "key", "cached"}], "rendered": n}
+    """
+    version = template_version(template)
+    out_path = job.output_path(basename, fmt)
+    work_dir = job.temp_dir("sections-")
+
+    if fmt not in CONCAT_FORMATS:
+        # 이어 붙일 수 없는 포맷은 전체 IR을 하나의 섹션처럼 캐시
+        key = section_key(namespace, version, "__all__", [s for _, s in sections], variant, quality, fmt)
+        plan = [_plan_entry("__all__", key, namespace, fmt)]
+    else:
+        plan = [
+            _plan_entry(name, section_key(namespace, version, name, sub_ir, variant, quality, fmt), namespace, fmt)
+            for name, sub_ir in sections
+        ]
+
+    def render(entries: List[Dict[str, Any]]) -> None:
+        if fmt not in CONCAT_FORMATS:
+            for entry in entries:
+                _render_one(entry, build_scene_code(None), scene_name, work_dir, quality, fmt, token, env)
+        else:
+            _render_parallel(entries, build_scene_code, scene_name, work_dir, quality, fmt, token, env)
+
+    render([e for e in plan if not e["cached"]])
+    # 계획할 때 캐시에 있던 섹션이 concat 전에 (다른 요청의 prune_files 등으로) 지워졌으면 한 번 다시 렌더
+    lost = [e for e in plan if not _has_output(e["path"])]
+    if lost:
+        for e in lost:
+            e["cached"] = False
+        render(lost)
+        lost = [e["name"] for e in plan if not _has_output(e["path"])]
+        if lost:
+            raise RuntimeError(f"section videos disappeared before concat for {scene_name}: {lost}")
+
+    # 애니메이션이 없는 섹션(.empty 마커)만 빠진다
+    parts = [e["path"] for e in plan if e["path"].exists()]
+    if not parts:
+        raise RuntimeError(f"manim produced no output for {scene_name}")
+    concat_videos(parts, out_path, token=token)
+    prune_files(SECTION_CACHE_DIR, SECTION_CACHE_QUOTA_BYTES)
+    job.render_stats = {"sections": len(plan), "rendered": sum(1 for e in plan if not e["cached"])}
+
+    return {
+        "path": str(out_path),
+        "sections": [{"name": e["name"], "key": e["key"], "cached": e["cached"]} for e in plan],
+        "rendered": sum(1 for e in plan if not e["cached"]),
+    }
+
+
+def _has_output(path: Path) -> bool:
+    """섹션 영상 또는 '영상 없음' 마커가 있는지."""
+    return path.exists() or _empty_marker(path).exists()
+
+
+def _plan_entry(name: str, key: str, namespace: str, fmt: str) -> Dict[str, Any]:
+    path = _cache_path(namespace, key, fmt)
+    cached = False
+    for p in (path, _empty_marker(path)):
+        if p.exists():
+            # LRU: 캐시 적중 시 마지막 접근 시각 갱신
+            os.utime(p)
+            cached = True
+    return {"name": name, "key": key, "path": path, "cached": cached}
+
+
+def _render_parallel(
+    entries: List[Dict[str, Any]],
+    build_scene_code: Callable[[Optional[List[str]]], str],
+    scene_name: str,
+    work_dir: Path,
+    quality: str,
+    fmt: str,
+    token: Optional[CancelToken],
+    env: Optional[Dict[str, str]],
+) -> None:
+    """없는 섹션들을 섹션당 manim 프로세스 하나씩, 최대 SECTION_WORKERS개 동시에 렌더."""
+    if not entries:
+        return
+    workers = min(len(entries), SECTION_WORKERS)
+    if workers == 1:
+        for entry in entries:
+            if token is not None:
+                token.check()
+            _render_one(entry, build_scene_code([entry["name"]]), scene_name, work_dir, quality, fmt, token, env)
+        return
+
+    # 스레드는 manim 서브프로세스를 띄우고 기다리기만 한다 (실제 렌더는 프로세스별로 병렬)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _render_one, entry, build_scene_code([entry["name"]]), scene_name, work_dir,
+                quality, fmt, token, env,
+            )
+            for entry in entries
+        ]
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for fut in pending:
+            # 하나라도 실패하면 아직 시작 안 한 섹션은 건너뛴다
+            fut.cancel()
+        for fut in futures:
+            if fut.done() and not fut.cancelled():
+                fut.result()
+
+
+def _render_one(
+    entry: Dict[str, Any],
+    scene_code: str,
+    scene_name: str,
+    work_dir: Path,
+    quality: str,
+    fmt: str,
+    token: Optional[CancelToken],
+    env: Optional[Dict[str, str]],
+) -> None:
+    """섹션 하나를 렌더해서 캐시에 넣는다. 애니메이션이 없는 섹션은 .empty 마커만 남긴다."""
+    path: Path = entry["path"]
+    staged = work_dir / f"{entry['key']}.{fmt}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not render_scene_file(scene_code, scene_name, staged, work_dir, quality, fmt, token, env):
+        _empty_marker(path).touch()
+        return
+    # 같은 섹션을 동시에 렌더하는 요청이 있어도 반쯤 쓴 파일이 보이지 않게 rename으로 게시
+    part = path.with_name(f"{path.name}.{uuid.uuid4().hex[:12]}.part")
+    shutil.move(str(staged), str(part))
+    os.replace(part, path)
@@ -0,0 +1,477 @@
+# app/storyboard.py
+"""
+영상 렌더 전에 확인용 정지 키프레임(storyboard) 만들기.
+
+manim을 띄우지 않고 (시작만 수 초) 렌더러 IR에서 바로 SVG를 그린다.
+렌더러마다 처음 상태 / 대표 step 몇 개 / 마지막 상태를 MAX_KEYFRAMES장 안으로 돌려준다.
+좌표는 manim 프레임 단위(가운데 원점, y 위쪽)로 잡고 씬과 같은 배치 규칙을 쓴다
+(노드 크기 / 간격은 layout_utils, graph 배치는 app.graph_layout).
+
+  frames = REGISTRY["cnn"].storyboard(trace)      # [{"label": "input", "svg": "<svg ...>"}, ...]
+  write_storyboard(frames, job, fmt="svg")        # job 디렉토리에 storyboard_00.svg ...
+
+PNG는 cairosvg가 설치되어 있을 때만 (없으면 ValueError).
+"""
+from __future__ import annotations
+
+import math
+from html import escape
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.compact_trace import load_trace
+from app.graph_layout import DEFAULT_SIZE
+
+try:
+    import cairosvg
+except ImportError:  # PNG 출력은 선택
+    cairosvg = None
+
+FRAME_WIDTH = 14.2
+FRAME_HEIGHT = 8.0
+# manim 1 단위 → px (852 x 480, 저화질 렌더와 같은 크기)
+PX = 60
+MAX_KEYFRAMES = 5
+STORYBOARD_FORMATS = ("svg", "png")
+
+# layout_utils와 같은 값
+H_GAP = 1.2
+V_GAP = 0.8
+
+# manim 기본 색 (씬과 같은 색을 쓰도록)
+BACKGROUND = "#000000"
+WHITE = "#FFFFFF"
+GRAY = "#888888"
+GRAY_B = "#BBBBBB"
+YELLOW = "#FFFF00"
+YELLOW_B = "#FFEA94"
+BLUE = "#58C4DD"
+BLUE_B = "#9CDCEB"
+BLUE_E = "#236B8E"
+GREEN = "#83C167"
+RED = "#FC6255"
+
+Frame = Dict[str, str]
+
+
+class Canvas:
+    """manim 좌표로 도형을 받아 SVG 문자열로 모은다."""
+
+    def __init__(self, title: str):
+        self.parts: List[str] = []
+        self.text(0, FRAME_HEIGHT / 2 - 0.7, title, size=0.42, color=YELLOW_B)
+
+    @staticmethod
+    def _x(x: float) -> float:
+        return round((x + FRAME_WIDTH / 2) * PX, 1)
+
+    @staticmethod
+    def _y(y: float) -> float:
+        return round((FRAME_HEIGHT / 2 - y) * PX, 1)
+
+    def rect(self, x: float, y: float, w: float, h: float, stroke=WHITE, fill="none",
+             fill_opacity: float = 0.3, stroke_width: float = 2) -> None:
+        self.parts.append(
+            f'<rect x="{self._x(x - w / 2)}" y="{self._y(y + h / 2)}" width="{round(w * PX, 1)}" '
+            f'height="{round(h * PX, 1)}" stroke="{stroke}" stroke-width="{stroke_width}" '
+            f'fill="{fill}" fill-opacity="{fill_opacity}"/>'
+        )
+
+    def circle(self, x: float, y: float, r: float, stroke=WHITE, fill="none",
+               fill_opacity: float = 0.3, stroke_width: float = 2) -> None:
+        self.parts.append(
+            f'<circle cx="{self._x(x)}" cy="{self._y(y)}" r="{round(r * PX, 1)}" stroke="{stroke}" '
+            f'stroke-width="{stroke_width}" fill="{fill}" fill-opacity="{fill_opacity}"/>'
+        )
+
+    def line(self, x0: float, y0: float, x1: float, y1: float, color=GRAY, width: float = 2,
+             opacity: float = 1.0, arrow: bool = False) -> None:
+        marker = ' marker-end="url(#tip)"' if arrow else ""
+        self.parts.append(
+            f'<line x1="{self._x(x0)}" y1="{self._y(y0)}" x2="{self._x(x1)}" y2="{self._y(y1)}" '
+            f'stroke="{color}" stroke-width="{round(width, 2)}" stroke-opacity="{round(opacity, 3)}"{marker}/>'
+        )
+
+    def text(self, x: float, y: float, s: Any, size: float = 0.3, color=WHITE, anchor: str = "middle") -> None:
+        self.parts.append(
+            f'<text x="{self._x(x)}" y="{self._y(y)}" font-size="{round(size * PX, 1)}" fill="{color}" '
+            f'text-anchor="{anchor}" dominant-baseline="central" font-family="sans-serif">{escape(str(s))}</text>'
+        )
+
+    def caption(self, s: str) -> None:
+        self.text(0, -FRAME_HEIGHT / 2 + 0.5, s, size=0.3, color=GRAY_B)
+
+    def svg(self) -> str:
+        w, h = round(FRAME_WIDTH * PX), round(FRAME_HEIGHT * PX)
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">'
+            f'<defs><marker id="tip" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="6" markerHeight="6" '
+            f'orient="auto-start-reverse"><path d="M0,0 L10,5 L0,10 z" fill="{GRAY}"/></marker></defs>'
+            f'<rect width="100%" height="100%" fill="{BACKGROUND}"/>' + "".join(self.parts) + "</svg>"
+        )
+
+
+def keyframe_steps(n: int, count: int = MAX_KEYFRAMES - 2) -> List[int]:
+    """step 0..n-1 중 대표 step 인덱스 (처음 / 마지막 상태 프레임은 따로)."""
+    if n <= 0:
+        return []
+    if n <= count:
+        return list(range(n))
+    return sorted({round(i * (n - 1) / (count - 1)) for i in range(count)}) if count > 1 else [n // 2]
+
+
+def _fmt(v: Any, decimals: int = 0) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float) and decimals:
+        return f"{v:.{decimals}f}"
+    return str(int(round(v))) if isinstance(v, (int, float)) else str(v)
+
+
+def _frame(label: str, canvas: Canvas) -> Frame:
+    return {"label": label, "svg": canvas.svg()}
+
+
+# === 공통 도형 묶음 ===
+
+def _cell_row(canvas: Canvas, values: Sequence[Any], y: float = 0.0, colors: Optional[Dict[int, str]] = None,
+              max_width: float = 12.0, box: float = 0.8) -> List[float]:
+    """값 상자를 가로 한 줄로 (layout_row 규칙: 가운데 정렬). 반환: 상자 중심 x 목록."""
+    n = max(1, len(values))
+    gap = 0.15
+    box = min(box, (max_width - gap * (n - 1)) / n)
+    xs = [(-(n - 1) / 2 + k) * (box + gap) for k in range(len(values))]
+    for k, (x, v) in enumerate(zip(xs, values)):
+        color = (colors or {}).get(k, BLUE_E)
+        canvas.rect(x, y, box, box, stroke=WHITE if color == BLUE_E else color, fill=color, fill_opacity=0.35)
+        if box >= 0.3:
+            canvas.text(x, y, v, size=min(0.32, box * 0.45))
+    return xs
+
+
+def _matrix(canvas: Canvas, values: Sequence[Sequence[Any]], cx: float, cy: float, cell: float,
+            color=GRAY, marks: Optional[Dict[Tuple[int, int], str]] = None, decimals: int = 0,
+            label: str = "", label_color=GRAY_B) -> None:
+    """격자 (Square + arrange_in_grid 규칙, 값은 칸 가운데). marks: (r, c) → 채움 색."""
+    rows, cols = len(values), len(values[0]) if values else 0
+    step = cell * 1.05
+    x0, y0 = cx - (cols - 1) * step / 2, cy + (rows - 1) * step / 2
+    for r in range(rows):
+        for c in range(cols):
+            fill = (marks or {}).get((r, c))
+            canvas.rect(x0 + c * step, y0 - r * step, cell, cell, stroke=fill or color,
+                        fill=fill or color, fill_opacity=0.5 if fill else 0.15, stroke_width=1.5)
+            if cell >= 0.28 and values[r][c] is not None:
+                canvas.text(x0 + c * step, y0 - r * step, _fmt(values[r][c], decimals), size=cell * 0.42)
+    if label:
+        canvas.text(cx, cy - rows * step / 2 - 0.35, label, size=0.3, color=label_color)
+
+
+def _region(r0: int, c0: int, r1: int, c1: int, color: str = YELLOW) -> Dict[Tuple[int, int], str]:
+    return {(r, c): color for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)}
+
+
+# === 렌더러별 storyboard ===
+
+def sorting_storyboard(ir: Dict[str, Any]) -> List[Frame]:
+    """초기 배열 / 대표 비교 step (비교 노랑, swap 빨강, 최소 후보 초록) / 정렬 결과."""
+    trace = load_trace(ir)
+    title = trace.algorithm.replace("_", " ").title()
+    frames = []
+    canvas = Canvas(title)
+    _cell_row(canvas, trace.initial)
+    canvas.caption(f"input ({len(trace.initial)} values)")
+    frames.append(_frame("initial", canvas))
+    for k in keyframe_steps(len(trace)):
+        step = trace.step(k)
+        colors = {}
+        if "min_index" in step:
+            colors[step["min_index"]] = GREEN
+        for i in step.get("compare", []):
+            colors[i] = RED if step["swap"] else YELLOW
+        canvas = Canvas(title)
+        _cell_row(canvas, trace.snapshot(k), colors=colors)
+        what = f"compare {step['compare']}" if "compare" in step else "step"
+        canvas.caption(f"step {step['step']}: {what}" + (" → swap" if step["swap"] else ""))
+        frames.append(_frame(f"step_{step['step']}", canvas))
+    final = trace.final()
+    canvas = Canvas(title)
+    _cell_row(canvas, final, colors={k: GREEN for k in range(len(final))})
+    canvas.caption(f"sorted after {len(trace)} steps")
+    frames.append(_frame("final", canvas))
+    return frames
+
+
+def cnn_storyboard(ir: Dict[str, Any]) -> List[Frame]:
+    """입력 + 커널 / 첫 합성곱 위치 / 가운데 위치 / ReLU + pooling / softmax."""
+    p = ir["params"]
+    k, stride = p["kernel_size"], p["stride"]
+    padded, kernel, fmap = ir["padded"], ir["kernel"], ir["feature_map"]
+    out = ir["out_size"]
+    size = len(padded)
+    cell = min(0.42, 5.2 / max(size, 1))
+    title = f"CNN: {p['input_size']}x{p['input_size']} input, {k}x{k} kernel, stride {stride}, padding {p['padding']}"
+    empty = [[None] * out for _ in range(out)]
+
+    def conv_frame(label: str, pos: Optional[Tuple[int, int]], shown: List[List[Any]]) -> Frame:
+        canvas = Canvas(title)
+        marks = _region(pos[0] * stride, pos[1] * stride, pos[0] * stride + k - 1, pos[1] * stride + k - 1) if pos else {}
+        _matrix(canvas, padded, -3.6, 0.0, cell, marks=marks, label="padded input")
+        _matrix(canvas, kernel, 0.0, 0.0, min(0.42, 2.4 / k), color=YELLOW, label="kernel", label_color=YELLOW_B)
+        fm_marks = {pos: YELLOW} if pos else {}
+        _matrix(canvas, shown, 3.6, 0.0, min(0.42, 4.0 / max(out, 1)), color=BLUE, marks=fm_marks,
+                label="feature map", label_color=BLUE_B)
+        if pos:
+            canvas.caption(f"output[{pos[0]}][{pos[1]}] = {fmap[pos[0]][pos[1]]}")
+        else:
+            canvas.caption(f"output size = ({size} - {k}) // {stride} + 1 = {out}")
+        return _frame(label, canvas)
+
+    frames = [conv_frame("input", None, empty)]
+    first = [row[:] for row in empty]
+    first[0][0] = fmap[0][0]
+    frames.append(conv_frame("conv_first", (0, 0), first))
+    mid = (out // 2, out // 2)
+    partial = [[fmap[r][c] if (r, c) <= mid else None for c in range(out)] for r in range(out)]
+    frames.append(conv_frame("conv_middle", mid, partial))
+
+    canvas = Canvas(title)
+    relu_marks = {(r, c): RED for r in range(out) for c in range(out) if not ir["relu_mask"][r][c]}
+    _matrix(canvas, ir["relu"], -2.5, 0.0, min(0.42, 5.0 / max(out, 1)), color=BLUE, marks=relu_marks,
+            label="ReLU (red = clipped)", label_color=BLUE_B)
+    if ir["pooled"]:
+        pooled = ir["pooled"]
+        _matrix(canvas, pooled, 2.5, 0.0, min(0.5, 4.0 / max(len(pooled), 1)), color=GREEN,
+                label=f"{ir['pool_size']}x{ir['pool_size']} max pooling", label_color=GREEN)
+    canvas.caption(f"flatten → {len(ir['flatten'])} values")
+    frames.append(_frame("relu_pool", canvas))
+
+    canvas = Canvas(title)
+    soft = ir["softmax"]
+    best = max(range(len(soft)), key=lambda i: soft[i])
+    for i, v in enumerate(soft):
+        x = (i - (len(soft) - 1) / 2) * 1.2
+        h = 3.0 * v + 0.2
+        canvas.rect(x, -1.5 + h / 2, 0.6, h, fill=YELLOW if i == best else BLUE, fill_opacity=0.7)
+        canvas.text(x, -1.9, f"class {i + 1}", size=0.26, color=GRAY_B)
+        canvas.text(x, -1.5 + h + 0.25, f"{v:.2f}", size=0.26)
+    canvas.caption(f"Predicted Class: {best + 1}")
+    frames.append(_frame("softmax", canvas))
+    return frames
+
+
+def attention_storyboard(ir: Dict[str, Any]) -> List[Frame]:
+    """토큰 / query 강조 / attention 가중치 (선 굵기 + 막대)."""
+    tokens, q = ir["tokens"], ir["query_index"]
+    weights = ir["weights"]
+    row = weights[q] if isinstance(weights[0], list) else weights
+    max_w = max(row) if row and max(row) > 0 else 1.0
+    title = ir.get("raw_text") or "Self-Attention"
+    n = len(tokens)
+    r = min(0.45, 11.0 / max(n, 1) / 2.6)
+    xs = [(i - (n - 1) / 2) * r * 2.6 for i in range(n)]
+    y = 1.0
+
+    def tokens_canvas(query: bool) -> Canvas:
+        canvas = Canvas(title)
+        for i, (x, t) in enumerate(zip(xs, tokens)):
+            canvas.circle(x, y, r, fill=BLUE_E)
+            canvas.text(x, y, t, size=min(0.28, r * 0.8))
+        if query:
+            canvas.circle(xs[q], y, r * 1.45, stroke=YELLOW, stroke_width=4)
+        return canvas
+
+    frames = []
+    canvas = tokens_canvas(False)
+    canvas.caption(f"{n} tokens")
+    frames.append(_frame("tokens", canvas))
+    canvas = tokens_canvas(True)
+    canvas.caption(f"query: '{tokens[q]}'")
+    frames.append(_frame("query", canvas))
+
+    canvas = tokens_canvas(True)
+    for i, (x, w) in enumerate(zip(xs, row)):
+        s = w / max_w
+        canvas.line(xs[q], y - r, x, y + r, color=BLUE_B, width=2 + 6 * s, opacity=0.25 + 0.75 * s)
+        h = 0.35 + 1.2 * s
+        canvas.rect(x, y - r - 0.4 - h / 2, 0.18, h, fill=BLUE, fill_opacity=0.65, stroke_width=1)
+        if r >= 0.2:
+            canvas.text(x, y - r - 0.6 - h, f"{w:.2f}", size=0.22)
+    best = max(range(len(row)), key=lambda i: row[i])
+    canvas.caption(f"'{tokens[q]}' attends most to '{tokens[best]}' ({row[best]:.2f})")
+    frames.append(_frame("weights", canvas))
+    return frames
+
+
+def _flow_positions(ir: Dict[str, Any]) -> List[Tuple[float, float]]:
+    """render_flow 씬과 같은 배치 (row / column / grid, graph면 미리 계산된 좌표)."""
+    ents = ir["entities"]
+    if ir["layout"] == "graph":
+        pos = [tuple(p) for p in ir["positions"]]
+    else:
+        cols = ir["cols"] if ir["layout"] != "row" else len(ents)
+        cols = 1 if ir["layout"] == "column" else cols
+        col_w = max(e["width"] for e in ents) + H_GAP
+        row_h = DEFAULT_SIZE[1] + V_GAP
+        if ir["layout"] == "row":
+            widths = [e["width"] for e in ents]
+            total = sum(widths) + H_GAP * (len(ents) - 1)
+            x, pos = -total / 2, []
+            for w in widths:
+                pos.append((x + w / 2, 0.0))
+                x += w + H_GAP
+        else:
+            rows = math.ceil(len(ents) / cols)
+            pos = [((k % cols - (cols - 1) / 2) * col_w, ((rows - 1) / 2 - k // cols) * row_h)
+                   for k in range(len(ents))]
+    # autorescale_group(max_height=5.0) 와 같은 축소 후 DOWN * 0.2
+    xs = [p[0] for p in pos]
+    ys = [p[1] for p in pos]
+    width = max(x + e["width"] / 2 for x, e in zip(xs, ents)) - min(x - e["width"] / 2 for x, e in zip(xs, ents))
+    height = max(ys) - min(ys) + DEFAULT_SIZE[1]
+    scale = min(1.0, 12.0 / width if width else 1.0, 5.0 / height if height else 1.0)
+    return [(x * scale, y * scale - 0.2) for x, y in pos]
+
+
+def flow_storyboard(ir: Dict[str, Any]) -> List[Frame]:
+    """엔티티 배치 / 대표 연산 (subject → target 강조) / 모든 간선."""
+    ents, ops = ir["entities"], ir["ops"]
+    pos = _flow_positions(ir)
+    h = DEFAULT_SIZE[1]
+
+    def draw(shown: set, edges: Sequence[Sequence[int]], focus: Tuple[Optional[int], Optional[int]] = (None, None),
+             faded: set = frozenset()) -> Canvas:
+        canvas = Canvas(ir["title"])
+        for a, b in edges:
+            (x0, y0), (x1, y1) = pos[a], pos[b]
+            hot = (a, b) == focus
+            dx = ents[a]["width"] / 2 if abs(x1 - x0) >= abs(y1 - y0) else 0.0
+            dy = 0.0 if dx else h / 2
+            sx, sy = (1 if x1 > x0 else -1), (1 if y1 > y0 else -1)
+            canvas.line(x0 + sx * dx, y0 + sy * dy, x1 - sx * (ents[b]["width"] / 2 if dx else 0.0),
+                        y1 - sy * dy, color=YELLOW if hot else GRAY, width=3 if hot else 2, arrow=True)
+        for k in sorted(shown):
+            x, y = pos[k]
+            hot = k in focus
+            canvas.rect(x, y, ents[k]["width"], h, stroke=YELLOW if hot else WHITE,
+                        fill=BLUE_E, fill_opacity=0.1 if k in faded else 0.3)
+            canvas.text(x, y, ents[k]["label"], size=0.26, color=GRAY if k in faded else WHITE)
+        return canvas
+
+    shown = {k for k, e in enumerate(ents) if not e["deferred"]}
+    frames = []
+    canvas = draw(shown, [])
+    canvas.caption(f"{len(ents)} entities, {len(ops)} operations ({ir['layout']} layout)")
+    frames.append(_frame("intro", canvas))
+
+    drawn: List[List[int]] = []
+    faded: set = set()
+    picks = set(keyframe_steps(len(ops)))
+    for i, op in enumerate(ops):
+        s, t = op["subject"], op["target"]
+        shown.update(k for k in (s, t) if k is not None)
+        if op["kind"] == "flow" and [s, t] not in drawn:
+            drawn.append([s, t])
+        if op["kind"] == "fade":
+            faded.add(s)
+        elif op["kind"] == "create":
+            faded.discard(s)
+        if i in picks:
+            canvas = draw(shown, drawn, (s, t), faded)
+            canvas.caption(op["caption"])
+            frames.append(_frame(f"op_{i}", canvas))
+
+    canvas = draw(set(range(len(ents))), ir["edges"], faded=faded)
+    canvas.caption("done")
+    frames.append(_frame("done", canvas))
+    return frames
+
+
+def grid_storyboard(ir: Dict[str, Any]) -> List[Frame]:
+    """행렬 초기값 / 대표 step (하이라이트 + 지금까지 채운 값) / 마지막 값."""
+    mats = ir["matrices"]
+    steps = ir["steps"]
+    decimals = ir["decimals"]
+    values = [[row[:] for row in m["values"]] for m in mats]
+    span = 12.0 / max(len(mats), 1)
+    cells = [min(0.42, (span - 0.9) / max(m["cols"], 1), 5.0 / max(m["rows"], 1)) for m in mats]
+    xs = [(i - (len(mats) - 1) / 2) * span for i in range(len(mats))]
+    colors = [GRAY, YELLOW, BLUE, GREEN]
+
+    def draw(marks: List[Dict[Tuple[int, int], str]], caption: str) -> Canvas:
+        canvas = Canvas(ir["title"])
+        for i, m in enumerate(mats):
+            _matrix(canvas, values[i], xs[i], 0.0, cells[i], color=colors[i % len(colors)], marks=marks[i],
+                    decimals=decimals, label=m["name"], label_color=colors[i % len(colors)])
+        canvas.caption(caption)
+        return canvas
+
+    frames = [_frame("intro", draw([{} for _ in mats], f"{len(steps)} steps"))]
+    picks = set(keyframe_steps(len(steps)))
+    for k, step in enumerate(steps):
+        for m, r, c, v in step["writes"]:
+            values[m][r][c] = v
+        if k in picks:
+            marks: List[Dict[Tuple[int, int], str]] = [{} for _ in mats]
+            for m, r0, c0, r1, c1 in step["highlights"]:
+                marks[m].update(_region(r0, c0, r1, c1))
+            for m, r, c, _ in step["writes"]:
+                marks[m][(r, c)] = GREEN
+            frames.append(_frame(f"step_{k}", draw(marks, step["caption"])))
+    frames.append(_frame("done", draw([{} for _ in mats], "done")))
+    return frames
+
+
+def cache_storyboard(ir: Dict[str, Any]) -> List[Frame]:
+    """대표 접근 프레임 (큐 상태, hit / miss) / 결과 요약 (hit ratio, 정책 비교)."""
+    labels, queues, frames_ir = ir["labels"], ir["queues"], ir["frames"]
+    frames = []
+    for k in keyframe_steps(len(frames_ir), MAX_KEYFRAMES - 1):
+        f = frames_ir[k]
+        canvas = Canvas(ir["title"])
+        n_q = len(queues)
+        for qi, (q, keys) in enumerate(zip(queues, f["queues"])):
+            y = ((n_q - 1) / 2 - qi) * 1.4
+            slots = [labels[key] for key in keys] + [""] * max(0, q["capacity"] - len(keys))
+            colors = {i: YELLOW for i, key in enumerate(keys) if key == f["key"]}
+            row_xs = _cell_row(canvas, slots, y=y, colors=colors, max_width=10.0)
+            canvas.text(min(row_xs, default=0.0) - 0.9, y, q["name"] + (" (ghost)" if q["ghost"] else ""),
+                        size=0.26, color=GRAY_B, anchor="end")
+        result = "hit" if f["hit"] else "miss"
+        events = ", ".join(f"{e[0]} {labels[e[1]]}" for e in f["events"] if e[0] not in ("hit", "miss"))
+        canvas.caption(f"access {labels[f['key']]}: {result}" + (f" ({events})" if events else ""))
+        frames.append(_frame(f"access_{k}", canvas))
+
+    summary, compare = ir["summary"], ir["compare"]
+    canvas = Canvas(ir["title"])
+    for i, (policy, ratio) in enumerate(compare.items()):
+        x = (i - (len(compare) - 1) / 2) * 1.8
+        h = 3.0 * ratio + 0.05
+        canvas.rect(x, -1.5 + h / 2, 0.9, h, fill=YELLOW if policy == ir["policy"] else BLUE, fill_opacity=0.7)
+        canvas.text(x, -1.9, policy, size=0.26, color=GRAY_B)
+        canvas.text(x, -1.5 + h + 0.25, f"{ratio:.2f}", size=0.26)
+    canvas.caption(f"{summary['hits']} hits / {summary['accesses']} accesses "
+                   f"(hit ratio {summary['hit_ratio']:.2f}, {summary['evicts']} evictions)")
+    frames.append(_frame("summary", canvas))
+    return frames
+
+
+# === 저장 ===
+
+def write_storyboard(frames: List[Frame], job, fmt: str = "svg") -> List[Dict[str, str]]:
+    """
+    키프레임을 job 디렉토리에 storyboard_00.svg / .png ... 로 저장.
+    반환: [{"label", "name"}] (이름은 /videos/{job_id}/{name} 으로 받을 수 있다).
+    """
+    if fmt not in STORYBOARD_FORMATS:
+        raise ValueError(f"unknown storyboard format: {fmt} (choose from {list(STORYBOARD_FORMATS)})")
+    if fmt == "png" and cairosvg is None:
+        raise ValueError("png storyboards need cairosvg (pip install cairosvg)")
+    out = []
+    for i, frame in enumerate(frames):
+        path = job.output_path(f"storyboard_{i:02d}", fmt)
+        if fmt == "svg":
+            path.write_text(frame["svg"], encoding="utf-8")
+        else:
+            cairosvg.svg2png(bytestring=frame["svg"].encode("utf-8"), write_to=str(path))
+        out.append({"label": frame["label"], "name": path.name})
+    return out
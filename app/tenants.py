@@ -0,0 +1,110 @@
+# app/tenants.py
+"""
+테넌트(강의/호출자)별 정책.
+
+요청마다 tenant 키(GenerateRequest.tenant 또는 X-Tenant 헤더, 없으면 "default")를 붙이고,
+테넌트마다
+  weight       : 공정 분배 가중치 (스케줄러가 받은 서비스량 / weight가 작은 테넌트부터)
+  klass        : "interactive" | "batch"  (batch는 남는 용량만 쓴다)
+  max_renders  : 동시에 돌 수 있는 manim 렌더 수
+  max_llm      : 동시에 진행할 수 있는 LLM 호출 수
+  rate_per_min : 분당 /generate 요청 수 (token bucket, burst까지 몰아서 허용)
+를 둔다.
+
+설정에 없는 tenant 키는 전부 "default" 하나로 합친다 (요청마다 새 키를 보내서
+rate limit / batch 우선순위를 피하거나 bucket을 끝없이 늘리지 못하게).
+"default"는 TENANT_POLICIES에 직접 적지 않으면 제한이 없다 (rate limit 없음, 동시 실행은
+스케줄러 슬롯 전체) → 정책을 설정하지 않은 배포는 테넌트 기능이 없던 때와 똑같이 동작한다.
+
+정책은 TENANT_POLICIES 환경변수(JSON) 또는 TENANT_POLICIES_FILE(JSON 파일)로 설정:
+  {"cs101-batch": {"weight": 0.5, "klass": "batch", "max_renders": 4, "rate_per_min": 600}}
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+DEFAULT_TENANT = "default"
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+@dataclass(frozen=True)
+class TenantPolicy:
+    weight: float = 1.0
+    klass: str = INTERACTIVE
+    max_renders: int = 2
+    max_llm: int = 4
+    rate_per_min: float = 30.0
+    burst: int = 10
+
+
+# 설정된 테넌트에서 빠진 필드의 기본값
+DEFAULT_POLICY = TenantPolicy()
+# 설정되지 않은 "default" 테넌트 (상한은 FairScheduler 슬롯 수가 대신 건다)
+UNLIMITED_POLICY = TenantPolicy(max_renders=sys.maxsize, max_llm=sys.maxsize, rate_per_min=math.inf)
+# Retry-After 상한 (rate_per_min이 0이면 차단으로 보고 이 값)
+MAX_RETRY_AFTER_S = 3600.0
+
+
+def _load_policies() -> Dict[str, TenantPolicy]:
+    raw = os.getenv("TENANT_POLICIES")
+    path = os.getenv("TENANT_POLICIES_FILE")
+    if not raw and path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            raw = f.read()
+    if not raw:
+        return {}
+    policies = {}
+    for name, fields in json.loads(raw).items():
+        policies[name] = replace(DEFAULT_POLICY, **fields)
+    return policies
+
+
+POLICIES: Dict[str, TenantPolicy] = _load_policies()
+
+
+def resolve_tenant(tenant: Optional[str]) -> str:
+    """요청이 보낸 tenant 키 → 정책이 있는 키 (설정에 없으면 DEFAULT_TENANT)."""
+    return tenant if tenant in POLICIES else DEFAULT_TENANT
+
+
+def policy_for(tenant: Optional[str]) -> TenantPolicy:
+    return POLICIES.get(resolve_tenant(tenant), UNLIMITED_POLICY)
+
+
+class RateLimiter:
+    """테넌트별 token bucket. 초당 rate_per_min/60 개씩 채워지고 burst개까지 쌓인다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, list] = {}  # tenant -> [tokens, last_refill]
+
+    def try_acquire(self, tenant: str) -> float:
+        """허용이면 0.0, 아니면 다음 요청까지 기다려야 하는 초 (Retry-After)."""
+        tenant = resolve_tenant(tenant)
+        pol = policy_for(tenant)
+        rate = pol.rate_per_min / 60.0
+        if math.isinf(rate):
+            return 0.0
+        if rate <= 0:
+            # rate_per_min 0 = 차단 (burst도 주지 않는다)
+            return MAX_RETRY_AFTER_S
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(tenant, [float(pol.burst), now])
+            tokens = min(float(pol.burst), tokens + (now - last) * rate)
+            if tokens >= 1.0:
+                self._buckets[tenant] = [tokens - 1.0, now]
+                return 0.0
+            self._buckets[tenant] = [tokens, now]
+            return min((1.0 - tokens) / rate, MAX_RETRY_AFTER_S)
+
+
+RATE_LIMITER = RateLimiter()
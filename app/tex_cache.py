@@ -0,0 +1,82 @@
+# app/tex_cache.py
+"""
+렌더 워커 전체가 공유하는 Tex / Text SVG 캐시.
+
+manim은 MathTex 문자열마다 latex + dvisvgm을 돌리고 결과를 {media_dir}/Tex 에
+"tex 문서 내용의 해시" 이름으로 저장한다. 기본 media_dir은 CWD 기준이라
+요청/워커마다 캐시가 따로 생긴다.
+
+여기서는
+  1) 모든 씬이 같은 디렉토리(MANIM_TEX_CACHE)를 tex_dir / text_dir로 쓰게 하고
+  2) 배포 시 자주 쓰는 숫자(-100..100 정수, 0.00..1.00 확률)를 미리 컴파일해 두고
+  3) (선택) 숫자를 LaTeX 한 번 없이 캐시된 숫자 글리프 조합으로 만들 수 있게 한다.
+
+배포 시 pre-warm:
+    python -m app.tex_cache --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+SHARED_CACHE_ROOT = Path(
+    os.getenv("MANIM_TEX_CACHE", str(Path.home() / ".cache" / "manim_patterns"))
+).resolve()
+TEX_DIR = SHARED_CACHE_ROOT / "Tex"
+TEXT_DIR = SHARED_CACHE_ROOT / "texts"
+
+# True 면 숫자를 MathTex 대신 캐시된 숫자 글리프 조합(DecimalNumber)으로 만든다.
+COMPOSE_NUMBERS = os.getenv("MANIM_COMPOSE_NUMBERS", "1") == "1"
+
+# 조합용 글리프 (DecimalNumber가 쓰는 문자)
+GLYPHS = "0123456789-."
+
+
+def use_shared_tex_cache() -> None:
+    """씬 파일 맨 위에서 호출: manim config의 tex_dir / text_dir를 공유 캐시로 바꾼다."""
+    from manim import config
+
+    TEX_DIR.mkdir(parents=True, exist_ok=True)
+    TEXT_DIR.mkdir(parents=True, exist_ok=True)
+    config.tex_dir = str(TEX_DIR)
+    config.text_dir = str(TEXT_DIR)
+
+
+def common_numerals() -> List[str]:
+    """pre-warm 대상: CNN 값(정수)과 attention / softmax 확률(소수 둘째 자리)."""
+    ints = [str(v) for v in range(-100, 101)]
+    probs = [f"{v / 100:.2f}" for v in range(0, 101)]
+    return ints + probs
+
+
+def _compile_chunk(strings: List[str]) -> int:
+    from manim import MathTex, SingleStringMathTex
+
+    use_shared_tex_cache()
+    for s in strings:
+        if len(s) == 1 and s in GLYPHS:
+            SingleStringMathTex(s)
+        MathTex(s)
+    return len(strings)
+
+
+def prewarm(strings: Optional[Iterable[str]] = None, workers: Optional[int] = None) -> int:
+    """strings(기본: common_numerals + 글리프)를 공유 캐시에 미리 컴파일. 이미 있으면 건너뛴다."""
+    items = list(strings) if strings is not None else common_numerals() + list(GLYPHS)
+    workers = workers or os.cpu_count() or 1
+    chunks = [items[i::workers] for i in range(workers) if items[i::workers]]
+    if len(chunks) <= 1:
+        return _compile_chunk(items)
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        return sum(pool.map(_compile_chunk, chunks))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm the shared manim Tex cache.")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    n = prewarm(workers=args.workers)
+    print(f"✅ pre-warmed {n} Tex strings into {TEX_DIR}")
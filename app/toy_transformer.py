@@ -0,0 +1,164 @@
+# app/toy_transformer.py
+"""
+프로세스 내부 NumPy 토이 transformer.
+
+LLM에게 attention weight / next-token 확률을 지어내게 하는 대신,
+토큰만 받아서 실제 scaled dot-product attention을 계산해 seq_attention IR을 만든다.
+
+  tokens ──hash──▶ vocab id ──▶ 임베딩(시드 고정) + 사인 위치 인코딩
+         ──▶ head별 Q/K/V 투영 ──▶ softmax(QKᵀ/√d + causal mask)
+         ──▶ query 위치의 context ──▶ 후보 단어 임베딩과 내적 ──▶ next-token 분포
+
+값은 의미적으로 "학습된" 것이 아니지만, 항상 유효한 softmax 출력이고
+같은 입력이면 항상 같은 결과가 나온다.
+"""
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+VOCAB_SIZE = 4096
+D_MODEL = 32
+DEFAULT_SEED = 0
+# head별 히트맵을 가로로 나란히 그리므로 이 이상은 읽을 수 없다
+MAX_HEADS = 8
+
+# 출력 헤드가 고르는 후보 단어 (해시 vocab 안의 id로 매핑됨)
+CANDIDATE_WORDS: Tuple[str, ...] = (
+    "the", "a", "to", "and", "of", "is", "it", "you", "that", "in",
+    "now", "more", "again", "today", "tomorrow", "here", "there", "home",
+    "food", "pizza", "something", "games", "music", "outside", "well", "soon",
+    "with", "for", "on", "at", "up", "out", "too", "very", "much", "this",
+)
+
+
+def token_id(token: str) -> int:
+    """토큰 문자열 → 해시 vocab id (프로세스/머신과 무관하게 고정)."""
+    digest = hashlib.blake2b(token.lower().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % VOCAB_SIZE
+
+
+@lru_cache(maxsize=8)
+def _weights(seed: int, num_heads: int) -> Dict[str, np.ndarray]:
+    """시드 고정 파라미터 (임베딩 테이블 + head별 Q/K/V 투영)."""
+    rng = np.random.default_rng(seed)
+    d_head = D_MODEL // num_heads
+    scale = 1.0 / np.sqrt(D_MODEL)
+    return {
+        "embed": rng.standard_normal((VOCAB_SIZE, D_MODEL)),
+        "wq": rng.standard_normal((num_heads, D_MODEL, d_head)) * scale,
+        "wk": rng.standard_normal((num_heads, D_MODEL, d_head)) * scale,
+        "wv": rng.standard_normal((num_heads, D_MODEL, d_head)) * scale,
+        "wo": rng.standard_normal((num_heads * d_head, D_MODEL)) * scale,
+    }
+
+
+def _positional_encoding(n: int) -> np.ndarray:
+    pos = np.arange(n)[:, None]
+    i = np.arange(D_MODEL // 2)[None, :]
+    angle = pos / np.power(10000.0, 2 * i / D_MODEL)
+    pe = np.zeros((n, D_MODEL))
+    pe[:, 0::2] = np.sin(angle)
+    pe[:, 1::2] = np.cos(angle)
+    return pe
+
+
+def _softmax(x: np.ndarray, axis: int = -1) -> np.ndarray:
+    x = x - x.max(axis=axis, keepdims=True)
+    e = np.exp(x)
+    return e / e.sum(axis=axis, keepdims=True)
+
+
+def attention(
+    tokens: List[str],
+    num_heads: int = 1,
+    causal: bool = True,
+    seed: int = DEFAULT_SEED,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    tokens → (weights, context)
+      weights: (num_heads, N, N) attention 확률 (각 행 합 = 1)
+      context: (N, D_MODEL) head를 합친 출력
+    """
+    if not 1 <= num_heads <= MAX_HEADS or D_MODEL % num_heads:
+        raise ValueError(f"num_heads must be between 1 and {MAX_HEADS} and divide {D_MODEL}, got {num_heads}")
+    p = _weights(seed, num_heads)
+    n = len(tokens)
+
+    ids = np.array([token_id(t) for t in tokens])
+    x = p["embed"][ids] + _positional_encoding(n)                   # (N, D)
+
+    q = np.einsum("nd,hde->hne", x, p["wq"])                        # (H, N, d_head)
+    k = np.einsum("nd,hde->hne", x, p["wk"])
+    v = np.einsum("nd,hde->hne", x, p["wv"])
+
+    scores = q @ k.transpose(0, 2, 1) / np.sqrt(q.shape[-1])        # (H, N, N)
+    if causal:
+        scores = np.where(np.tril(np.ones((n, n), dtype=bool)), scores, -np.inf)
+    weights = _softmax(scores, axis=-1)
+
+    heads_out = weights @ v                                          # (H, N, d_head)
+    context = heads_out.transpose(1, 0, 2).reshape(n, -1) @ p["wo"]  # (N, D)
+    return weights, context
+
+
+def next_token_distribution(
+    context_vec: np.ndarray,
+    top_k: int = 4,
+    seed: int = DEFAULT_SEED,
+    exclude: Optional[List[str]] = None,
+) -> Tuple[List[str], List[float]]:
+    """query 위치의 context → CANDIDATE_WORDS 위의 softmax에서 상위 top_k (합 1로 재정규화)."""
+    embed = _weights(seed, 1)["embed"]
+    skip = {t.lower() for t in (exclude or [])}
+    words = [w for w in CANDIDATE_WORDS if w not in skip] or list(CANDIDATE_WORDS)
+    logits = embed[[token_id(w) for w in words]] @ context_vec / np.sqrt(D_MODEL)
+    probs = _softmax(logits)
+    top = np.argsort(probs)[::-1][:top_k]
+    top_probs = probs[top] / probs[top].sum()
+    return [words[i] for i in top], [round(float(p), 4) for p in top_probs]
+
+
+def build_attention_ir(
+    raw_text: str,
+    tokens: Optional[List[str]] = None,
+    query_index: Optional[int] = None,
+    num_heads: int = 1,
+    top_k: int = 4,
+    seed: int = DEFAULT_SEED,
+) -> Dict[str, Any]:
+    """
+    문장 → seq_attention IR (render_seq_attention 입력 형식).
+
+    - tokens가 없으면 whitespace split (LLM 프롬프트 규칙과 동일)
+    - weights: head 0의 query 행 (1D)
+    - num_heads > 1 이면 heads에 head별 N x N 행렬도 포함
+    """
+    tokens = tokens or raw_text.split()
+    if not tokens:
+        raise ValueError("no tokens to attend over")
+    n = len(tokens)
+    q_idx = n - 1 if query_index is None else query_index
+    if not 0 <= q_idx < n:
+        raise ValueError("query_index out of range")
+
+    weights, context = attention(tokens, num_heads=num_heads, seed=seed)
+    candidates, probs = next_token_distribution(context[q_idx], top_k=top_k, seed=seed, exclude=tokens)
+
+    ir: Dict[str, Any] = {
+        "pattern_type": "seq_attention",
+        "raw_text": raw_text,
+        "tokens": tokens,
+        "weights": [round(float(w), 4) for w in weights[0, q_idx]],
+        "query_index": q_idx,
+        "next_token": {"candidates": candidates, "probs": probs},
+    }
+    if num_heads > 1:
+        ir["heads"] = [
+            {"name": f"head {h}", "weights": np.round(weights[h], 4).tolist()}
+            for h in range(num_heads)
+        ]
+    return ir
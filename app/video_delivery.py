@@ -0,0 +1,191 @@
+# app/video_delivery.py
+"""
+media store 결과 파일을 HTTP로 내보내기 (/videos/{job_id}[/{name}]).
+
+- 강한 ETag: 파일 내용 sha256 (경로 + 크기 + mtime 기준으로 프로세스 안에서 캐시)
+- 완료된 job의 파일은 바뀌지 않으므로 Cache-Control: immutable (CDN / 브라우저 캐시)
+- 조건부 GET: If-None-Match → 304, If-Range가 ETag와 다르면 Range 무시하고 200
+- Range: 단일 구간(bytes=a-b / a- / -n)만 206, 범위 밖이면 416. 여러 구간은 무시하고 200
+- 본문 전송
+    ASGI 서버가 "http.response.zerocopysend" 확장을 지원하면 파일 디스크립터를 넘겨서 OS sendfile
+    VIDEO_ACCEL_REDIRECT가 설정되어 있으면 X-Accel-Redirect 헤더만 보내고 nginx가 sendfile
+    (예: location /_media/ { internal; alias <MEDIA_STORE_DIR>/; } + VIDEO_ACCEL_REDIRECT=/_media)
+    둘 다 아니면 스레드에서 os.pread로 CHUNK_SIZE씩 읽어 보낸다
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 256 * 1024
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# nginx internal location prefix (비어 있으면 앱이 직접 전송)
+ACCEL_REDIRECT = os.getenv("VIDEO_ACCEL_REDIRECT", "").rstrip("/")
+
+MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".mov": "video/quicktime",
+    ".webm": "video/webm",
+    ".gif": "image/gif",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".svg": "image/svg+xml",
+}
+
+# (경로, 크기, mtime_ns) → ETag
+_ETAGS: Dict[Tuple[str, int, int], str] = {}
+_ETAGS_MAX = 4096
+_ETAGS_LOCK = threading.Lock()
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def content_etag(path: Path) -> str:
+    """파일 내용 sha256 기반 강한 ETag ("..." 포함). 같은 파일은 한 번만 해시."""
+    st = path.stat()
+    key = (str(path), st.st_size, st.st_mtime_ns)
+    with _ETAGS_LOCK:
+        etag = _ETAGS.get(key)
+    if etag is not None:
+        return etag
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    etag = f'"{h.hexdigest()[:32]}"'
+    with _ETAGS_LOCK:
+        if len(_ETAGS) >= _ETAGS_MAX:
+            _ETAGS.clear()
+        _ETAGS[key] = etag
+    return etag
+
+
+def _etag_listed(header: str, etag: str) -> bool:
+    """If-None-Match 비교 (약한 비교: W/ 무시)."""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Range 헤더 → (start, end) (end 포함). 헤더가 없거나 단일 bytes 구간이 아니면 None (전체 전송).
+    만족할 수 없는 구간이면 RangeNotSatisfiable.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # bytes=-n : 마지막 n 바이트
+            n = int(last)
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if first == "":
+        if n <= 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - n), size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """파일의 [offset, offset + count) 구간을 보내는 응답 (zerocopysend / pread 청크)."""
+
+    def __init__(self, path: Path, offset: int, count: int, status_code: int, headers: Mapping[str, str],
+                 send_body: bool = True):
+        super().__init__(content=None, status_code=status_code, headers=dict(headers))
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.send_body = send_body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        with open(self.path, "rb") as fh:
+            if "http.response.zerocopysend" in (scope.get("extensions") or {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fh,
+                    "offset": self.offset,
+                    "count": self.count,
+                    "more_body": False,
+                })
+                return
+            fd, pos, end = fh.fileno(), self.offset, self.offset + self.count
+            while pos < end:
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, min(CHUNK_SIZE, end - pos), pos)
+                if not chunk:
+                    break
+                pos += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": pos < end})
+            if pos < end:
+                # 전송 중 파일이 잘렸으면 빈 본문으로 닫는다 (Content-Length와 어긋나므로 클라이언트가 재요청)
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def video_response(path: Path, job_id: str, request_headers: Mapping[str, str], method: str = "GET") -> Response:
+    """
+    media store 파일 하나에 대한 응답 (200 / 206 / 304 / 416). 파일 해시가 필요하면 블로킹이므로
+    이벤트 루프 밖(스레드)에서 부른다.
+    """
+    size = path.stat().st_size
+    etag = content_etag(path)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        "Content-Type": MEDIA_TYPES.get(path.suffix.lower(), "application/octet-stream"),
+    }
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and _etag_listed(if_none_match, etag):
+        return Response(status_code=304, headers={k: headers[k] for k in ("ETag", "Cache-Control")})
+
+    try:
+        byte_range = parse_range(request_headers.get("range"), size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    # If-Range는 강한 비교: ETag가 바뀌었으면 전체를 다시 보낸다
+    if_range = request_headers.get("if-range")
+    if byte_range is not None and if_range is not None and if_range.strip() != etag:
+        byte_range = None
+
+    if byte_range is None:
+        start, end, status = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    count = max(0, end - start + 1)
+    headers["Content-Length"] = str(count)
+
+    if ACCEL_REDIRECT:
+        # nginx가 같은 Range 헤더로 파일을 sendfile. 조건부 처리는 위에서 끝났다
+        accel = {k: v for k, v in headers.items() if k not in ("Content-Length", "Content-Range")}
+        accel["X-Accel-Redirect"] = f"{ACCEL_REDIRECT}/{job_id}/{path.name}"
+        return Response(status_code=200, headers=accel)
+    return FileRangeResponse(path, start, count, status, headers, send_body=method != "HEAD")